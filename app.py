@@ -3,18 +3,73 @@
 Google Apps Script를 대체하는 로컬 웹서버
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file, g
 from flask_cors import CORS
 import sqlite3
 import json
+import os
+import tempfile
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from contextlib import closing
 
+import numpy as np
+
+import spc
+import rollup
+import backup
+import maintenance
+import archive
+import measurements
+import statements
+import formulas
+import recompute
+import jobs
+import rejudge
+import specs
+import importer
+import watcher
+import labels
+import recipes
+import idempotency
+import coherence
+import locks
+from migrate_db import apply_migrations, REF_DATA_TABLES
+
 app = Flask(__name__)
 CORS(app)
 
 DATABASE = 'database.db'
+DEBUG = True
+
+# 온라인 백업 스케줄러 (서버 시작 시 start_background_services에서 시작)
+backup_scheduler = backup.BackupScheduler(DATABASE)
+
+# WAL checkpoint / optimize / ANALYZE 스케줄러
+maintenance_scheduler = maintenance.MaintenanceScheduler(DATABASE)
+
+# 백그라운드 작업 (입출력 작업은 스레드 풀, 계산 작업은 프로세스 풀 / 상태는 job 테이블에 저장)
+job_manager = jobs.JobManager(DATABASE)
+
+# 분말별 규격 버전 구간 인덱스 (규격 변경 시 해당 분말만 무효화)
+spec_index = specs.SpecIndex()
+
+# 제품별 컴파일된 Recipe (관리자 Recipe 변경 시 무효화)
+recipe_cache = recipes.RecipeCache()
+
+# 다른 서버 프로세스의 변경 반영 (요청마다 1회 확인, 바뀐 테이블의 캐시만 무효화)
+cache_coherence = coherence.CacheCoherence(DATABASE)
+cache_coherence.register('powder_spec_version', spec_index.invalidate)
+cache_coherence.register('recipe', recipe_cache.invalidate)
+
+# 같은 LOT의 검사 항목 저장 직렬화 (진행 상태 읽기-수정-쓰기 보호, 다른 LOT은 병렬)
+lot_locks = locks.StripedLock()
+
+# 저장 요청 재전송 시 중복 처리 방지 (Idempotency-Key 헤더별 성공 응답)
+idempotency_store = idempotency.IdempotencyStore(DATABASE)
+
+# 장비 결과 파일 투입 폴더 감시 (INSPECTION_DROP_DIR, 기본 instrument_drop/)
+drop_watcher = watcher.DropFolderWatcher(DATABASE, spec_index=spec_index, lot_locks=lot_locks)
 
 # ============================================
 # 데이터베이스 헬퍼 함수
@@ -22,13 +77,30 @@ DATABASE = 'database.db'
 
 def get_db():
     """데이터베이스 연결"""
-    conn = sqlite3.connect(DATABASE, timeout=30.0)  # 30초 타임아웃
+    conn = sqlite3.connect(DATABASE, timeout=30.0, cached_statements=statements.STATEMENT_CACHE_SIZE)  # 30초 타임아웃
     conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 반환
     conn.execute('PRAGMA busy_timeout = 30000')  # 30초 대기
     conn.execute('PRAGMA journal_mode = WAL')  # WAL 모드로 동시성 향상
+    conn.execute('PRAGMA foreign_keys = ON')  # 배합 작업 삭제 시 원재료 투입도 함께 삭제 (ON DELETE CASCADE)
+    conn.execute(f'PRAGMA journal_size_limit = {maintenance.JOURNAL_SIZE_LIMIT}')  # checkpoint 후 WAL 파일 축소
     return conn
 
 
+def ensure_schema():
+    """확장 테이블/인덱스 생성 (서버 시작 시 1회)"""
+    with closing(get_db()) as conn:
+        apply_migrations(conn)
+
+
+def start_background_services():
+    """백그라운드 작업 시작 (백업, DB 유지보수 등)"""
+    backup_scheduler.start()
+    maintenance_scheduler.start()
+    job_manager.recover()
+    idempotency_store.purge()
+    drop_watcher.start()
+
+
 def to_kst_str(value, fmt='%Y-%m-%d %H:%M'):
     """주어진 시간 문자열/객체를 KST 문자열로 변환해서 반환합니다.
 
@@ -81,6 +153,98 @@ def dict_from_row(row):
     """sqlite3.Row를 딕셔너리로 변환"""
     return dict(zip(row.keys(), row))
 
+
+def like_pattern(text, prefix_only=False):
+    """LIKE 검색 패턴 생성 (와일드카드 문자는 ESCAPE '\\' 로 이스케이프)"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%' if prefix_only else f'%{escaped}%'
+
+
+def fts_phrase(text, column=None):
+    """FTS5 trigram MATCH 구문 생성 (3자 미만은 trigram으로 찾을 수 없으므로 None)"""
+    text = (text or '').strip()
+    if len(text) < 3:
+        return None
+    phrase = '"' + text.replace('"', '""') + '"'
+    return f'{column} : {phrase}' if column else phrase
+
+
+_lot_search_available = None
+
+
+def has_lot_search(conn):
+    """LOT 검색 FTS 인덱스 사용 가능 여부 (프로세스당 1회 확인)"""
+    global _lot_search_available
+    if _lot_search_available is None:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'lot_search'")
+        _lot_search_available = cursor.fetchone() is not None
+    return _lot_search_available
+
+# ============================================
+# 요청 전처리: 캐시 일관성 / 요청 멱등성 (Idempotency-Key)
+# ============================================
+
+@app.before_request
+def check_cache_coherence():
+    """다른 프로세스가 바꾼 테이블의 메모리 캐시 무효화 (요청마다 1회)"""
+    if request.endpoint == 'static':
+        return None
+    try:
+        cache_coherence.check()
+    except sqlite3.Error as e:
+        # 확인에 실패해도 요청은 처리 (캐시는 다음 요청에서 다시 확인)
+        print(f"[캐시] 변경 확인 실패: {e}")
+    return None
+
+FORM_MIMETYPES = ('multipart/form-data', 'application/x-www-form-urlencoded')
+
+@app.before_request
+def replay_idempotent_request():
+    """같은 Idempotency-Key로 이미 처리된 POST/PUT이면 저장된 응답을 그대로 반환"""
+    key = request.headers.get(idempotency.HEADER)
+    if not key or request.method not in idempotency.METHODS:
+        return None
+    if len(key) > idempotency.MAX_KEY_LENGTH:
+        return jsonify({'success': False, 'message': 'Idempotency-Key가 너무 깁니다.'}), 400
+
+    # 폼/파일 업로드는 본문을 먼저 읽으면 request.files가 비므로 경로만으로 구분
+    body = b'' if request.mimetype in FORM_MIMETYPES else request.get_data(cache=True)
+    request_fingerprint = idempotency.fingerprint(request.method, request.full_path, body)
+
+    try:
+        stored = idempotency_store.begin(key, request_fingerprint)
+    except idempotency.IdempotencyConflict:
+        return jsonify({'success': False, 'message': '같은 Idempotency-Key가 다른 요청에 사용되었습니다.'}), 422
+    except TimeoutError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+
+    if stored is not None:
+        response = app.response_class(stored.body, status=stored.status, content_type=stored.content_type)
+        response.headers[idempotency.REPLAY_HEADER] = 'true'
+        return response
+
+    g.idempotency = (key, request_fingerprint)
+    return None
+
+@app.after_request
+def store_idempotent_response(response):
+    """처리한 요청의 응답 저장 (성공 응답만)"""
+    pending = g.pop('idempotency', None)
+    if pending:
+        if response.direct_passthrough or response.is_streamed:
+            idempotency_store.finish(*pending)
+        else:
+            idempotency_store.finish(*pending, response.status_code, response.get_data(), response.content_type)
+    return response
+
+@app.teardown_request
+def release_idempotency_key(exc):
+    """처리 중 예외로 응답이 저장되지 않은 경우 대기 중인 같은 키 요청을 깨움"""
+    pending = g.pop('idempotency', None)
+    if pending:
+        idempotency_store.finish(*pending)
+
 # ============================================
 # 메인 페이지
 # ============================================
@@ -94,34 +258,61 @@ def index():
 # API: 분말 목록
 # ============================================
 
+def query_powder_list(cursor, category=None):
+    """분말명 목록 (category 지정 시 해당 분류만)"""
+    if category:
+        cursor.execute('SELECT powder_name FROM powder_spec WHERE category = ? ORDER BY powder_name', (category,))
+    else:
+        cursor.execute('SELECT powder_name FROM powder_spec ORDER BY powder_name')
+    return [row[0] for row in cursor.fetchall()]
+
 @app.route('/api/powder-list', methods=['GET'])
 def get_powder_list():
     """분말 목록 조회 (category 파라미터로 필터링 가능)"""
     try:
         category = request.args.get('category', None)
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-            if category:
-                cursor.execute('SELECT powder_name FROM powder_spec WHERE category = ? ORDER BY powder_name', (category,))
-            else:
-                cursor.execute('SELECT powder_name FROM powder_spec ORDER BY powder_name')
-            powders = [row[0] for row in cursor.fetchall()]
+            powders = query_powder_list(conn.cursor(), category)
             return jsonify({'success': True, 'data': powders})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+# ============================================
+# API: 기준 정보 버전
+# ============================================
+
+def query_ref_versions(cursor):
+    """기준 정보 테이블별 버전 ('변경 횟수-마지막 변경 시각', 백업 복원 등으로 횟수가 되돌아가도 값이 달라짐)"""
+    cursor.execute(f'''
+        SELECT table_name, version, updated_at FROM ref_data_version
+        WHERE table_name IN ({', '.join('?' * len(REF_DATA_TABLES))})
+    ''', REF_DATA_TABLES)
+    return {row[0]: f'{row[1]}-{row[2]}' for row in cursor.fetchall()}
+
+@app.route('/api/ref-data/version', methods=['GET'])
+def get_ref_data_version():
+    """기준 정보 테이블별 버전 (클라이언트는 버전이 바뀐 테이블의 목록만 다시 받음)"""
+    try:
+        with closing(get_db()) as conn:
+            versions = query_ref_versions(conn.cursor())
+            return jsonify({'success': True, 'data': versions})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # API: 검사자 목록
 # ============================================
 
+def query_inspector_list(cursor):
+    cursor.execute('SELECT name FROM inspector ORDER BY name')
+    return [row[0] for row in cursor.fetchall()]
+
 @app.route('/api/inspector-list', methods=['GET'])
 def get_inspector_list():
     """검사자 목록 조회"""
     try:
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT name FROM inspector ORDER BY name')
-            inspectors = [row[0] for row in cursor.fetchall()]
+            inspectors = query_inspector_list(conn.cursor())
             return jsonify({'success': True, 'data': inspectors})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -170,13 +361,14 @@ def get_particle_size_spec(powder_name):
 # API: 검사 항목 필터링
 # ============================================
 
-def get_inspection_items(powder_name, inspection_type, conn=None):
+def get_inspection_items(powder_name, inspection_type, conn=None, at=None):
     """검사 타입에 따라 필요한 검사 항목 반환
 
     Args:
         powder_name: 분말명
         inspection_type: 검사 타입
         conn: 기존 DB 연결 (없으면 새로 생성)
+        at: 기준 시각 (UTC, 없으면 현재) - 그 시각에 적용되던 규격 버전 사용
     """
     # 연결이 제공되지 않은 경우 새로 생성
     owns_connection = conn is None
@@ -184,98 +376,46 @@ def get_inspection_items(powder_name, inspection_type, conn=None):
         conn = get_db()
 
     try:
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM powder_spec WHERE powder_name = ?', (powder_name,))
-        spec = cursor.fetchone()
-
-        if not spec:
+        version = spec_version_at(conn, powder_name, at)
+        if not version:
             return []
+        return specs.build_inspection_items(version['spec'], version['particle_specs'], inspection_type)
+    finally:
+        # 직접 생성한 연결만 닫기
+        if owns_connection:
+            conn.close()
 
-        spec = dict_from_row(spec)
-
-        # 모든 검사 항목 정의
-        all_items = [
-            {'name': 'FlowRate', 'displayName': '유동도', 'unit': 's/50g',
-             'min': spec['flow_rate_min'], 'max': spec['flow_rate_max'], 'type': spec['flow_rate_type']},
-
-            {'name': 'ApparentDensity', 'displayName': '겉보기밀도', 'unit': 'g/cm³',
-             'min': spec['apparent_density_min'], 'max': spec['apparent_density_max'], 'type': spec['apparent_density_type'],
-             'isWeightBased': True},
-
-            {'name': 'CContent', 'displayName': 'C함량', 'unit': '%',
-             'min': spec['c_content_min'], 'max': spec['c_content_max'], 'type': spec['c_content_type']},
-
-            {'name': 'CuContent', 'displayName': 'Cu함량', 'unit': '%',
-             'min': spec['cu_content_min'], 'max': spec['cu_content_max'], 'type': spec['cu_content_type']},
-
-            {'name': 'Moisture', 'displayName': '수분도', 'unit': '%',
-             'min': spec['moisture_min'], 'max': spec['moisture_max'], 'type': spec['moisture_type'],
-             'isWeightBased': True},
 
-            {'name': 'Ash', 'displayName': '회분도', 'unit': '%',
-             'min': spec['ash_min'], 'max': spec['ash_max'], 'type': spec['ash_type'],
-             'isWeightBased': True},
+def spec_version_at(conn, powder_name, at=None):
+    """시각 at(UTC)에 적용되던 규격 버전 (해당 버전이 없으면 현재 규격, 사양도 없으면 None)"""
+    version = spec_index.lookup(conn, powder_name, at)
+    if version is None:
+        version = specs.snapshot(conn, powder_name)
+    return version
 
-            {'name': 'SinterChangeRate', 'displayName': '소결변화율', 'unit': '%',
-             'min': spec['sinter_change_rate_min'], 'max': spec['sinter_change_rate_max'], 'type': spec['sinter_change_rate_type']},
 
-            {'name': 'SinterStrength', 'displayName': '소결강도', 'unit': 'MPa',
-             'min': spec['sinter_strength_min'], 'max': spec['sinter_strength_max'], 'type': spec['sinter_strength_type']},
+def parse_effective_from(value):
+    """규격 적용 시작 시각(KST 'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM')을 UTC 문자열로 (없으면 None = 지금부터)"""
+    try:
+        return specs.kst_to_utc(value)
+    except ValueError:
+        raise ValueError(f'적용 시작 시각 형식이 올바르지 않습니다: {value}')
 
-            {'name': 'FormingStrength', 'displayName': '성형강도', 'unit': 'N',
-             'min': spec['forming_strength_min'], 'max': spec['forming_strength_max'], 'type': spec['forming_strength_type']},
 
-            {'name': 'FormingLoad', 'displayName': '성형하중', 'unit': 'MPa',
-             'min': spec['forming_load_min'], 'max': spec['forming_load_max'], 'type': spec['forming_load_type']},
-        ]
+def commit_spec_change(conn, powder_names, effective_from=None):
+    """변경된 분말 규격을 새 버전으로 기록하고 커밋 (커밋 후 규격 인덱스 무효화)
 
-        # 검사 타입에 따라 필터링
-        filtered_items = []
-        for item in all_items:
-            item_type = item['type']
-
-            # 검사 타입 필터링
-            if inspection_type == '일상점검' and item_type == '일상':
-                if item['min'] is not None or item['max'] is not None:
-                    filtered_items.append(item)
-            elif inspection_type == '정기점검' and (item_type == '일상' or item_type == '정기'):
-                if item['min'] is not None or item['max'] is not None:
-                    filtered_items.append(item)
-
-        # 입도분석 항목 추가
-        if spec['particle_size_type']:
-            cursor.execute('''
-                SELECT mesh_size, min_value, max_value
-                FROM particle_size
-                WHERE powder_name = ?
-            ''', (powder_name,))
-            particle_specs = [dict_from_row(row) for row in cursor.fetchall()]
-
-            if particle_specs:
-                particle_item_type = spec['particle_size_type']
-
-                if inspection_type == '일상점검' and particle_item_type == '일상':
-                    filtered_items.append({
-                        'name': 'ParticleSize',
-                        'displayName': '입도분석',
-                        'unit': '%',
-                        'isParticleSize': True,
-                        'particleSpecs': particle_specs
-                    })
-                elif inspection_type == '정기점검' and (particle_item_type == '일상' or particle_item_type == '정기'):
-                    filtered_items.append({
-                        'name': 'ParticleSize',
-                        'displayName': '입도분석',
-                        'unit': '%',
-                        'isParticleSize': True,
-                        'particleSpecs': particle_specs
-                    })
+    Args:
+        powder_names: 규격이 바뀐 분말명 목록 (이름 변경 시 이전/새 이름 모두)
+        effective_from: 적용 시작 시각 (UTC, 없으면 지금)
+    """
+    names = [name for name in dict.fromkeys(powder_names) if name]
+    for name in names:
+        specs.record_version(conn, name, effective_from)
+    conn.commit()
+    for name in names:
+        spec_index.invalidate(name)
 
-        return filtered_items
-    finally:
-        # 직접 생성한 연결만 닫기
-        if owns_connection:
-            conn.close()
 
 # ============================================
 # API: 검사 시작
@@ -289,6 +429,7 @@ def _do_start_inspection():
     inspection_type = data.get('inspectionType')
     inspector = data.get('inspector')
     category = data.get('category', 'incoming')  # 기본값은 incoming
+    received_qty = data.get('receivedQty')       # 수입검사 입고 수량 (선택, kg)
 
     if not all([powder_name, lot_number]):
         return jsonify({'success': False, 'message': '필수 입력 항목이 누락되었습니다.'})
@@ -306,7 +447,9 @@ def _do_start_inspection():
         if progress_row:
             # 기존 진행중 검사가 있음
             progress_data = dict_from_row(progress_row)
-            items = get_inspection_items(powder_name, progress_data['inspection_type'], conn)
+            # 이어하기는 검사를 시작한 시점의 규격으로
+            items = get_inspection_items(powder_name, progress_data['inspection_type'], conn,
+                                         at=progress_data['start_time'])
             return jsonify({
                 'success': True,
                 'isExisting': True,
@@ -361,6 +504,9 @@ def _do_start_inspection():
         ''', (powder_name, lot_number, inspection_type, inspector,
               json.dumps([]), json.dumps(item_names), f'0/{len(item_names)}', category))
 
+        if category == 'incoming' and received_qty not in (None, ''):
+            set_received_qty(cursor, powder_name, lot_number, float(received_qty))
+
         conn.commit()
 
         return jsonify({
@@ -404,21 +550,23 @@ def start_inspection():
 # API: 미완료 검사 목록
 # ============================================
 
+def query_incomplete_inspections(cursor):
+    """진행중인 검사 목록 (JSON 파싱 및 시간 KST 변환)"""
+    cursor.execute('SELECT * FROM inspection_progress ORDER BY start_time DESC')
+    inspections = [dict_from_row(row) for row in cursor.fetchall()]
+
+    for inspection in inspections:
+        inspection['completedItems'] = json.loads(inspection['completed_items'] or '[]')
+        inspection['totalItems'] = json.loads(inspection['total_items'] or '[]')
+        convert_times_in_dict(inspection)
+    return inspections
+
 @app.route('/api/incomplete-inspections', methods=['GET'])
 def get_incomplete_inspections():
     """진행중인 검사 목록 조회"""
     try:
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM inspection_progress ORDER BY start_time DESC')
-            inspections = [dict_from_row(row) for row in cursor.fetchall()]
-
-            # JSON 파싱 및 시간(KST) 변환
-            for inspection in inspections:
-                inspection['completedItems'] = json.loads(inspection['completed_items'] or '[]')
-                inspection['totalItems'] = json.loads(inspection['total_items'] or '[]')
-                convert_times_in_dict(inspection)
-
+            inspections = query_incomplete_inspections(conn.cursor())
             return jsonify({'success': True, 'data': inspections})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -477,13 +625,9 @@ def save_inspection_item():
 
             print(f"저장 요청: {powder_name}, {lot_number}, {item_name}, {values}")
 
-            # 특수 항목 처리
-            if item_name == 'ApparentDensity':
-                return save_apparent_density(powder_name, lot_number, values)
-            elif item_name == 'Moisture':
-                return save_moisture(powder_name, lot_number, values)
-            elif item_name == 'Ash':
-                return save_ash(powder_name, lot_number, values)
+            # 특수 항목 처리 (무게 기반 계산)
+            if item_name in formulas.WEIGHT_ITEMS:
+                return save_weight_item(powder_name, lot_number, item_name, values)
 
             # 일반 항목 처리
             valid_values = [float(v) for v in values if v != '' and v is not None]
@@ -494,8 +638,8 @@ def save_inspection_item():
             average = sum(valid_values) / len(valid_values)
             average = round(average, 2)
 
-            # 단일 트랜잭션으로 모든 작업 수행
-            with closing(get_db()) as conn:
+            # 단일 트랜잭션으로 모든 작업 수행 (같은 LOT의 저장은 차례로)
+            with lot_locks.hold(powder_name, lot_number), closing(get_db()) as conn:
                 # 규격 확인
                 result = check_spec(powder_name, lot_number, item_name, average, conn)
 
@@ -543,12 +687,12 @@ def save_particle_size():
             lot_number = data.get('lotNumber')
             particle_data = data.get('particleData') or {}
 
-            # DB에 정의된 모든 입도 규격을 조회하여, 모든 항목이 측정되어 있고
+            # 검사 시점에 적용되던 모든 입도 규격을 조회하여, 모든 항목이 측정되어 있고
             # 규격 내에 있는지 확인해야 전체 PASS가 된다.
             with closing(get_db()) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT mesh_size, min_value, max_value FROM particle_size WHERE powder_name = ? ORDER BY id', (powder_name,))
-                specs = [dict_from_row(r) for r in cursor.fetchall()]
+                context = inspection_context(conn, powder_name, lot_number)
+                version = spec_version_at(conn, powder_name, context[1] if context else None)
+                particle_specs = version['particle_specs'] if version else []
 
             overall_result = 'PASS'
 
@@ -556,7 +700,7 @@ def save_particle_size():
             mesh_ids = ['180', '150', '106', '75', '45', '45M']
 
             # 각 규격에 대해 측정값 존재 및 규격 만족 여부 확인
-            for idx, spec in enumerate(specs):
+            for idx, spec in enumerate(particle_specs):
                 key = mesh_ids[idx] if idx < len(mesh_ids) else spec.get('mesh_size')
                 entry = particle_data.get(key)
 
@@ -585,13 +729,13 @@ def save_particle_size():
                     overall_result = 'FAIL'
 
             # 만약 DB에 규격이 하나도 없다면 기존 방식대로 전달된 데이터만으로 불합격 여부 확인
-            if not specs:
+            if not particle_specs:
                 for mesh_id, mesh_data in particle_data.items():
                     if mesh_data.get('result') == '불합격':
                         overall_result = 'FAIL'
 
-            # 단일 트랜잭션으로 모든 작업 수행
-            with closing(get_db()) as conn:
+            # 단일 트랜잭션으로 모든 작업 수행 (같은 LOT의 저장은 차례로)
+            with lot_locks.hold(powder_name, lot_number), closing(get_db()) as conn:
                 # 데이터 저장
                 _do_save_particle_to_result_table(powder_name, lot_number, particle_data, overall_result, conn)
 
@@ -632,7 +776,9 @@ def search_inspection_results():
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            query = 'SELECT * FROM inspection_result WHERE 1=1'
+            # 조회 기간이 보관 기준 이전까지 걸치면 archive.db 데이터도 함께 조회
+            source = archive.history_table(conn, 'inspection_result', date_from + ' 00:00:00' if date_from else None)
+            query = f'SELECT * FROM {source} WHERE 1=1'
             params = []
 
             if category:
@@ -690,26 +836,35 @@ def get_inspection_detail(powder_name, lot_number):
 
             row = cursor.fetchone()
 
+            # 운영 DB에 없으면 보관 데이터에서 조회
+            if not row:
+                source = archive.history_table(conn, 'inspection_result')
+                if source != 'inspection_result':
+                    cursor.execute(f'''
+                        SELECT * FROM {source}
+                        WHERE powder_name = ? AND lot_number = ?
+                    ''', (powder_name, lot_number))
+                    row = cursor.fetchone()
+
             if not row:
                 return jsonify({'success': False, 'message': '검사 결과를 찾을 수 없습니다.'})
 
             result = dict_from_row(row)
 
-            # 분말 사양 추가
-            cursor.execute('SELECT * FROM powder_spec WHERE powder_name = ?', (powder_name,))
-            spec_row = cursor.fetchone()
-            if spec_row:
-                result['powderSpec'] = dict_from_row(spec_row)
-
-            # 입도분석 규격 추가
-            cursor.execute('''
-                SELECT mesh_size, min_value, max_value
-                FROM particle_size
-                WHERE powder_name = ?
-            ''', (powder_name,))
-            particle_specs = [dict_from_row(r) for r in cursor.fetchall()]
-            if particle_specs:
-                result['particleSizeSpecs'] = particle_specs
+            # 검사 시점에 적용되던 분말 사양 / 입도분석 규격 추가
+            version = spec_version_at(conn, powder_name, result.get('inspection_time'))
+            if version:
+                result['powderSpec'] = dict(version['spec'])
+                if version['particle_specs']:
+                    result['particleSizeSpecs'] = version['particle_specs']
+                if 'effective_from' in version:
+                    result['specVersion'] = {
+                        'id': version['id'],
+                        # 최초 버전은 시작 시각 없음
+                        'effectiveFrom': None if version['effective_from'] == specs.EPOCH
+                        else to_kst_str(version['effective_from']),
+                        'effectiveTo': to_kst_str(version['effective_to']),
+                    }
 
             # 시간 필드 KST 변환
             convert_times_in_dict(result)
@@ -719,6 +874,37 @@ def get_inspection_detail(powder_name, lot_number):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/inspection-measurements/<powder_name>/<lot_number>', methods=['GET'])
+def get_inspection_measurements(powder_name, lot_number):
+    """측정된 항목만 세로형(항목별 반복 측정값 목록)으로 조회"""
+    try:
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+
+            # 보관(archive.db)된 검사 결과와 측정값도 조회
+            cursor.execute(f'''
+                SELECT id, powder_name, lot_number, inspector, inspection_time,
+                       inspection_type, category, particle_size_result, final_result
+                FROM {archive.history_table(conn, 'inspection_result')}
+                WHERE powder_name = ? AND lot_number = ?
+            ''', (powder_name, lot_number))
+            row = cursor.fetchone()
+
+            if not row:
+                return jsonify({'success': False, 'message': '검사 결과를 찾을 수 없습니다.'})
+
+            result = dict_from_row(row)
+            result['items'] = measurements.load_measurements(
+                conn, row['id'],
+                archive.history_table(conn, 'measurement'),
+                archive.history_table(conn, 'measurement_summary'))
+            convert_times_in_dict(result)
+
+            return jsonify({'success': True, 'data': result})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # API: 검사 삭제
 # ============================================
@@ -734,18 +920,31 @@ def delete_inspection():
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
+            # 삭제 전 집계 그룹 확인
+            rollup_group = rollup.lot_group(conn, powder_name, lot_number)
+
             # 검사 결과 삭제
             cursor.execute('''
                 DELETE FROM inspection_result
                 WHERE powder_name = ? AND lot_number = ?
             ''', (powder_name, lot_number))
 
+            # FIFO 추천 대상에서 제외 (보관 이동은 추천에 영향이 없도록 삭제 트리거 대신 여기서 처리)
+            cursor.execute('''
+                UPDATE lot_inventory SET passed_at = NULL
+                WHERE powder_name = ? AND lot_number = ?
+            ''', (powder_name, lot_number))
+
             # 진행중 검사 삭제
             cursor.execute('''
                 DELETE FROM inspection_progress
                 WHERE powder_name = ? AND lot_number = ?
             ''', (powder_name, lot_number))
 
+            # 일별 품질 집계 갱신 (같은 트랜잭션)
+            if rollup_group:
+                rollup.refresh_group(conn, *rollup_group)
+
             conn.commit()
 
             return jsonify({'success': True})
@@ -757,8 +956,8 @@ def delete_inspection():
 # 헬퍼 함수들
 # ============================================
 
-def save_apparent_density(powder_name, lot_number, values):
-    """겉보기밀도 저장 (단일 트랜잭션으로 통합)"""
+def save_weight_item(powder_name, lot_number, item_name, values):
+    """무게 기반 항목 (겉보기밀도, 수분도, 회분도) 저장 (단일 트랜잭션으로 통합)"""
     import time
     max_retries = 5
     retry_delay = 0.05  # 50ms
@@ -766,69 +965,17 @@ def save_apparent_density(powder_name, lot_number, values):
     last_error = None
     for attempt in range(max_retries):
         try:
-            # values: [emptyCup1, powderWeight1, emptyCup2, powderWeight2, emptyCup3, powderWeight3]
-            densities = []
-            for i in range(3):
-                empty_cup = values[i * 2]
-                powder_weight = values[i * 2 + 1]
-                if empty_cup and powder_weight:
-                    density = (float(powder_weight) - float(empty_cup)) / 25
-                    densities.append(density)
-
-            if not densities:
-                return jsonify({'success': False, 'message': '유효한 측정값이 없습니다.'})
-
-            average = round(sum(densities) / len(densities), 2)
-
-            # 단일 트랜잭션으로 모든 작업 수행
-            with closing(get_db()) as conn:
-                result = check_spec(powder_name, lot_number, 'ApparentDensity', average, conn)
-                _do_save_to_result_table(powder_name, lot_number, 'ApparentDensity', values, average, result, conn)
-                _do_update_progress(powder_name, lot_number, 'ApparentDensity', conn)
-                conn.commit()
-
-            return jsonify({'success': True, 'average': f'{average:.2f}', 'result': result})
-
-        except Exception as e:
-            if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
-                last_error = e
-                print(f"재시도 {attempt + 1}/{max_retries}: {str(e)}")
-                time.sleep(retry_delay * (2 ** attempt))
-                continue
-            else:
-                return jsonify({'success': False, 'message': str(e)})
-
-    if last_error:
-        return jsonify({'success': False, 'message': str(last_error)})
+            # values: [원본1_1, 원본2_1, 원본1_2, 원본2_2, 원본1_3, 원본2_3]
+            _, average = formulas.compute_item(item_name, values)
 
-def save_moisture(powder_name, lot_number, values):
-    """수분도 저장 (단일 트랜잭션으로 통합)"""
-    import time
-    max_retries = 5
-    retry_delay = 0.05  # 50ms
-
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            # values: [initialWeight1, driedWeight1, initialWeight2, driedWeight2, initialWeight3, driedWeight3]
-            moisture_values = []
-            for i in range(3):
-                initial = values[i * 2]
-                dried = values[i * 2 + 1]
-                if initial and dried:
-                    moisture = ((float(initial) - float(dried)) / float(initial)) * 100
-                    moisture_values.append(moisture)
-
-            if not moisture_values:
+            if average is None:
                 return jsonify({'success': False, 'message': '유효한 측정값이 없습니다.'})
 
-            average = round(sum(moisture_values) / len(moisture_values), 2)
-
-            # 단일 트랜잭션으로 모든 작업 수행
-            with closing(get_db()) as conn:
-                result = check_spec(powder_name, lot_number, 'Moisture', average, conn)
-                _do_save_to_result_table(powder_name, lot_number, 'Moisture', values, average, result, conn)
-                _do_update_progress(powder_name, lot_number, 'Moisture', conn)
+            # 단일 트랜잭션으로 모든 작업 수행 (같은 LOT의 저장은 차례로)
+            with lot_locks.hold(powder_name, lot_number), closing(get_db()) as conn:
+                result = check_spec(powder_name, lot_number, item_name, average, conn)
+                _do_save_to_result_table(powder_name, lot_number, item_name, values, average, result, conn)
+                _do_update_progress(powder_name, lot_number, item_name, conn)
                 conn.commit()
 
             return jsonify({'success': True, 'average': f'{average:.2f}', 'result': result})
@@ -845,49 +992,30 @@ def save_moisture(powder_name, lot_number, values):
     if last_error:
         return jsonify({'success': False, 'message': str(last_error)})
 
-def save_ash(powder_name, lot_number, values):
-    """회분도 저장 (단일 트랜잭션으로 통합)"""
-    import time
-    max_retries = 5
-    retry_delay = 0.05  # 50ms
-
-    last_error = None
-    for attempt in range(max_retries):
-        try:
-            # values: [initialWeight1, ashWeight1, initialWeight2, ashWeight2, initialWeight3, ashWeight3]
-            ash_values = []
-            for i in range(3):
-                initial = values[i * 2]
-                ash = values[i * 2 + 1]
-                if initial and ash:
-                    ash_percent = ((float(initial) - float(ash)) / float(initial)) * 100
-                    ash_values.append(ash_percent)
-
-            if not ash_values:
-                return jsonify({'success': False, 'message': '유효한 측정값이 없습니다.'})
+def inspection_context(conn, powder_name, lot_number):
+    """LOT의 검사 타입과 규격 기준 시각 (검사 결과 행의 검사 시각, 아직 없으면 검사 시작 시각)
 
-            average = round(sum(ash_values) / len(ash_values), 2)
-
-            # 단일 트랜잭션으로 모든 작업 수행
-            with closing(get_db()) as conn:
-                result = check_spec(powder_name, lot_number, 'Ash', average, conn)
-                _do_save_to_result_table(powder_name, lot_number, 'Ash', values, average, result, conn)
-                _do_update_progress(powder_name, lot_number, 'Ash', conn)
-                conn.commit()
+    Returns:
+        tuple: (검사 타입, 기준 시각 UTC) / 진행중·완료 검사가 모두 없으면 None
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT inspection_type, start_time FROM inspection_progress
+        WHERE powder_name = ? AND lot_number = ?
+    ''', (powder_name, lot_number))
+    progress_row = cursor.fetchone()
 
-            return jsonify({'success': True, 'average': f'{average:.2f}', 'result': result})
+    cursor.execute('''
+        SELECT inspection_type, inspection_time FROM inspection_result
+        WHERE powder_name = ? AND lot_number = ?
+    ''', (powder_name, lot_number))
+    result_row = cursor.fetchone()
 
-        except Exception as e:
-            if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
-                last_error = e
-                print(f"재시도 {attempt + 1}/{max_retries}: {str(e)}")
-                time.sleep(retry_delay * (2 ** attempt))
-                continue
-            else:
-                return jsonify({'success': False, 'message': str(e)})
+    if not progress_row and not result_row:
+        return None
 
-    if last_error:
-        return jsonify({'success': False, 'message': str(last_error)})
+    inspection_type = (progress_row or result_row)[0]
+    return inspection_type, (result_row or progress_row)[1]
 
 def check_spec(powder_name, lot_number, item_name, average, conn=None):
     """규격 확인하여 PASS/FAIL 판정
@@ -907,25 +1035,12 @@ def check_spec(powder_name, lot_number, item_name, average, conn=None):
     try:
         cursor = conn.cursor()
 
-        # 검사 타입 확인
-        cursor.execute('''
-            SELECT inspection_type FROM inspection_progress
-            WHERE powder_name = ? AND lot_number = ?
-        ''', (powder_name, lot_number))
-        progress_row = cursor.fetchone()
-
-        if not progress_row:
-            cursor.execute('''
-                SELECT inspection_type FROM inspection_result
-                WHERE powder_name = ? AND lot_number = ?
-            ''', (powder_name, lot_number))
-            progress_row = cursor.fetchone()
-
-        if not progress_row:
+        context = inspection_context(conn, powder_name, lot_number)
+        if not context:
             return 'PASS'
 
-        inspection_type = progress_row[0]
-        items = get_inspection_items(powder_name, inspection_type, conn)
+        inspection_type, judged_at = context
+        items = get_inspection_items(powder_name, inspection_type, conn, at=judged_at)
 
         for item in items:
             if item['name'] == item_name:
@@ -952,7 +1067,8 @@ def save_to_result_table(powder_name, lot_number, item_name, values, average, re
     last_error = None
     for attempt in range(max_retries):
         try:
-            _do_save_to_result_table(powder_name, lot_number, item_name, values, average, result)
+            with lot_locks.hold(powder_name, lot_number):
+                _do_save_to_result_table(powder_name, lot_number, item_name, values, average, result)
             return  # 성공하면 즉시 반환
         except Exception as e:
             if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
@@ -980,122 +1096,22 @@ def _do_save_to_result_table(powder_name, lot_number, item_name, values, average
     try:
         cursor = conn.cursor()
 
-        # 기존 행 확인
-        cursor.execute('''
-            SELECT id FROM inspection_result
-            WHERE powder_name = ? AND lot_number = ?
-        ''', (powder_name, lot_number))
+        # 기존 행 확인 (없으면 새 행 생성)
+        cursor.execute(statements.FIND_RESULT_ID, (powder_name, lot_number))
         existing = cursor.fetchone()
+        row_id = existing[0] if existing else _insert_result_row(cursor, powder_name, lot_number)
 
-        # 컬럼명 매핑
-        column_map = {
-            'FlowRate': ['flow_rate_1', 'flow_rate_2', 'flow_rate_3', 'flow_rate_avg', 'flow_rate_result'],
-            'ApparentDensity': [
-                'apparent_density_empty_cup_1', 'apparent_density_powder_weight_1', 'apparent_density_1',
-                'apparent_density_empty_cup_2', 'apparent_density_powder_weight_2', 'apparent_density_2',
-                'apparent_density_empty_cup_3', 'apparent_density_powder_weight_3', 'apparent_density_3',
-                'apparent_density_avg', 'apparent_density_result'
-            ],
-            'CContent': ['c_content_1', 'c_content_2', 'c_content_3', 'c_content_avg', 'c_content_result'],
-            'CuContent': ['cu_content_1', 'cu_content_2', 'cu_content_3', 'cu_content_avg', 'cu_content_result'],
-            'Moisture': [
-                'moisture_initial_weight_1', 'moisture_dried_weight_1', 'moisture_1',
-                'moisture_initial_weight_2', 'moisture_dried_weight_2', 'moisture_2',
-                'moisture_initial_weight_3', 'moisture_dried_weight_3', 'moisture_3',
-                'moisture_avg', 'moisture_result'
-            ],
-            'Ash': [
-                'ash_initial_weight_1', 'ash_ash_weight_1', 'ash_1',
-                'ash_initial_weight_2', 'ash_ash_weight_2', 'ash_2',
-                'ash_initial_weight_3', 'ash_ash_weight_3', 'ash_3',
-                'ash_avg', 'ash_result'
-            ],
-            'SinterChangeRate': ['sinter_change_rate_1', 'sinter_change_rate_2', 'sinter_change_rate_3', 'sinter_change_rate_avg', 'sinter_change_rate_result'],
-            'SinterStrength': ['sinter_strength_1', 'sinter_strength_2', 'sinter_strength_3', 'sinter_strength_avg', 'sinter_strength_result'],
-            'FormingStrength': ['forming_strength_1', 'forming_strength_2', 'forming_strength_3', 'forming_strength_avg', 'forming_strength_result'],
-            'FormingLoad': ['forming_load_1', 'forming_load_2', 'forming_load_3', 'forming_load_avg', 'forming_load_result']
-        }
-
-        if existing:
-            # 기존 행 업데이트
-            columns = column_map.get(item_name, [])
-
-            if item_name in ['ApparentDensity', 'Moisture', 'Ash']:
-                # 특수 항목 (계산값 포함)
-                update_special_item(cursor, existing[0], item_name, columns, values, average, result)
-            else:
-                # 일반 항목
-                update_parts = []
-                update_values = []
-
-                if len(values) >= 1 and values[0]:
-                    update_parts.append(f'{columns[0]} = ?')
-                    update_values.append(float(values[0]))
-                if len(values) >= 2 and values[1]:
-                    update_parts.append(f'{columns[1]} = ?')
-                    update_values.append(float(values[1]))
-                if len(values) >= 3 and values[2]:
-                    update_parts.append(f'{columns[2]} = ?')
-                    update_values.append(float(values[2]))
-
-                update_parts.append(f'{columns[3]} = ?')
-                update_values.append(average)
-
-                update_parts.append(f'{columns[4]} = ?')
-                update_values.append(result)
-
-                update_values.append(existing[0])
-
-                query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-                cursor.execute(query, update_values)
-
+        if item_name in formulas.WEIGHT_ITEMS:
+            # 특수 항목 (계산값 포함)
+            update_special_item(cursor, row_id, item_name, values, average, result)
         else:
-            # 새 행 생성
-            cursor.execute('''
-                SELECT inspection_type, inspector FROM inspection_progress
-                WHERE powder_name = ? AND lot_number = ?
-            ''', (powder_name, lot_number))
-            progress_data = cursor.fetchone()
-
-            inspection_type = progress_data[0] if progress_data else '일상점검'
-            inspector = progress_data[1] if progress_data else '미지정'
-
-            cursor.execute('''
-                INSERT INTO inspection_result (powder_name, lot_number, inspection_type, inspector)
-                VALUES (?, ?, ?, ?)
-            ''', (powder_name, lot_number, inspection_type, inspector))
-
-            new_id = cursor.lastrowid
-
-            # 방금 생성한 행에 데이터 업데이트
-            columns = column_map.get(item_name, [])
-
-            if item_name in ['ApparentDensity', 'Moisture', 'Ash']:
-                update_special_item(cursor, new_id, item_name, columns, values, average, result)
-            else:
-                update_parts = []
-                update_values = []
-
-                if len(values) >= 1 and values[0]:
-                    update_parts.append(f'{columns[0]} = ?')
-                    update_values.append(float(values[0]))
-                if len(values) >= 2 and values[1]:
-                    update_parts.append(f'{columns[1]} = ?')
-                    update_values.append(float(values[1]))
-                if len(values) >= 3 and values[2]:
-                    update_parts.append(f'{columns[2]} = ?')
-                    update_values.append(float(values[2]))
+            # 일반 항목: 비어 있는 반복 측정값은 None으로 전달하여 기존 값 유지
+            params = [statements.to_number(values[i]) if i < len(values) else None for i in range(3)]
+            params.extend([average, result, row_id])
+            cursor.execute(statements.ITEM_UPDATE[item_name], params)
 
-                update_parts.append(f'{columns[3]} = ?')
-                update_values.append(average)
-
-                update_parts.append(f'{columns[4]} = ?')
-                update_values.append(result)
-
-                update_values.append(new_id)
-
-                query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-                cursor.execute(query, update_values)
+        # 세로형 측정값 테이블 동시 기록 (전환 기간 dual-write)
+        measurements.sync_result(conn, row_id, [item_name])
 
         # 연결을 직접 생성한 경우에만 커밋
         if owns_connection:
@@ -1105,78 +1121,36 @@ def _do_save_to_result_table(powder_name, lot_number, item_name, values, average
         if owns_connection:
             conn.close()
 
-def update_special_item(cursor, row_id, item_name, columns, values, average, result):
-    """특수 항목 (겉보기밀도, 수분도, 회분도) 업데이트"""
-
-    if item_name == 'ApparentDensity':
-        # 겉보기밀도: 원본 데이터 + 계산값 저장
-        update_parts = []
-        update_values = []
-
-        for i in range(3):
-            empty_cup = values[i * 2] if i * 2 < len(values) else None
-            powder_weight = values[i * 2 + 1] if i * 2 + 1 < len(values) else None
-
-            if empty_cup:
-                update_parts.append(f'{columns[i * 3]} = ?')
-                update_values.append(float(empty_cup))
-
-            if powder_weight:
-                update_parts.append(f'{columns[i * 3 + 1]} = ?')
-                update_values.append(float(powder_weight))
-
-            if empty_cup and powder_weight:
-                density = (float(powder_weight) - float(empty_cup)) / 25
-                update_parts.append(f'{columns[i * 3 + 2]} = ?')
-                update_values.append(round(density, 2))
-
-        update_parts.append(f'{columns[9]} = ?')
-        update_values.append(average)
-
-        update_parts.append(f'{columns[10]} = ?')
-        update_values.append(result)
-
-        update_values.append(row_id)
-
-        query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-        cursor.execute(query, update_values)
-
-    elif item_name in ['Moisture', 'Ash']:
-        # 수분도/회분도: 원본 데이터 + 계산값 저장
-        update_parts = []
-        update_values = []
-
-        for i in range(3):
-            val1 = values[i * 2] if i * 2 < len(values) else None
-            val2 = values[i * 2 + 1] if i * 2 + 1 < len(values) else None
-
-            if val1:
-                update_parts.append(f'{columns[i * 3]} = ?')
-                update_values.append(float(val1))
-
-            if val2:
-                update_parts.append(f'{columns[i * 3 + 1]} = ?')
-                update_values.append(float(val2))
+def _insert_result_row(cursor, powder_name, lot_number):
+    """진행중 검사 정보로 검사 결과 행 생성 후 id 반환"""
+    cursor.execute('''
+        SELECT inspection_type, inspector FROM inspection_progress
+        WHERE powder_name = ? AND lot_number = ?
+    ''', (powder_name, lot_number))
+    progress_data = cursor.fetchone()
 
-            if val1 and val2:
-                if item_name == 'Moisture':
-                    calc_val = ((float(val1) - float(val2)) / float(val1)) * 100
-                else:  # Ash
-                    calc_val = (float(val2) / float(val1)) * 100
+    inspection_type = progress_data[0] if progress_data else '일상점검'
+    inspector = progress_data[1] if progress_data else '미지정'
 
-                update_parts.append(f'{columns[i * 3 + 2]} = ?')
-                update_values.append(round(calc_val, 2))
+    cursor.execute('''
+        INSERT INTO inspection_result (powder_name, lot_number, inspection_type, inspector)
+        VALUES (?, ?, ?, ?)
+    ''', (powder_name, lot_number, inspection_type, inspector))
 
-        update_parts.append(f'{columns[9]} = ?')
-        update_values.append(average)
+    return cursor.lastrowid
 
-        update_parts.append(f'{columns[10]} = ?')
-        update_values.append(result)
+def update_special_item(cursor, row_id, item_name, values, average, result):
+    """특수 항목 (겉보기밀도, 수분도, 회분도) 업데이트: 원본 데이터 + 계산값 저장"""
+    replicates, _ = formulas.compute_item(item_name, values)
+    params = []
 
-        update_values.append(row_id)
+    for i in range(3):
+        val1 = statements.to_number(values[i * 2]) if i * 2 < len(values) else None
+        val2 = statements.to_number(values[i * 2 + 1]) if i * 2 + 1 < len(values) else None
+        params.extend([val1, val2, replicates[i]])
 
-        query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-        cursor.execute(query, update_values)
+    params.extend([average, result, row_id])
+    cursor.execute(statements.ITEM_UPDATE[item_name], params)
 
 def save_particle_to_result_table(powder_name, lot_number, particle_data, overall_result):
     """입도분석 결과 저장 (재시도 로직 포함)"""
@@ -1187,7 +1161,8 @@ def save_particle_to_result_table(powder_name, lot_number, particle_data, overal
     last_error = None
     for attempt in range(max_retries):
         try:
-            _do_save_particle_to_result_table(powder_name, lot_number, particle_data, overall_result)
+            with lot_locks.hold(powder_name, lot_number):
+                _do_save_particle_to_result_table(powder_name, lot_number, particle_data, overall_result)
             return  # 성공하면 즉시 반환
         except Exception as e:
             if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
@@ -1215,84 +1190,45 @@ def _do_save_particle_to_result_table(powder_name, lot_number, particle_data, ov
     try:
         cursor = conn.cursor()
 
-        # 기존 행 확인
-        cursor.execute('''
-            SELECT id FROM inspection_result
-            WHERE powder_name = ? AND lot_number = ?
-        ''', (powder_name, lot_number))
+        # 기존 행 확인 (없으면 새 행 생성)
+        cursor.execute(statements.FIND_RESULT_ID, (powder_name, lot_number))
         existing = cursor.fetchone()
+        row_id = existing[0] if existing else _insert_result_row(cursor, powder_name, lot_number)
 
-        mesh_mapping = {
-            '180': 'particle_size_180',
-            '150': 'particle_size_150',
-            '106': 'particle_size_106',
-            '75': 'particle_size_75',
-            '45': 'particle_size_45',
-            '45M': 'particle_size_45m'
-        }
-
-        update_parts = []
-        update_values = []
+        params = []
+        saved_items = []
 
-        for mesh_id, prefix in mesh_mapping.items():
+        for mesh_id, item_name in statements.PARTICLE_MESH_ITEMS.items():
             data = particle_data.get(mesh_id)
 
             # Only update columns for meshes that were actually provided in the payload.
             # This prevents overwriting existing DB values with FAIL when the client
             # omitted a mesh key unintentionally.
             if not data:
+                params.extend([None, None, None, None])
                 continue
 
-            val1 = data.get('val1')
-            val2 = data.get('val2')
-            avg = data.get('avg')
-            mesh_result = 'PASS' if data.get('result') == '합격' else 'FAIL'
-
-            if val1 is not None and val1 != '':
-                update_parts.append(f'{prefix}_1 = ?')
-                update_values.append(float(val1))
-            if val2 is not None and val2 != '':
-                update_parts.append(f'{prefix}_2 = ?')
-                update_values.append(float(val2))
             # avg may be '0' or '0.0' string; check against None and empty string
-            if avg is not None and avg != '':
-                try:
-                    update_parts.append(f'{prefix}_avg = ?')
-                    update_values.append(float(avg))
-                except Exception:
-                    # if parsing fails, skip avg
-                    pass
-
-            update_parts.append(f'{prefix}_result = ?')
-            update_values.append(mesh_result)
-
-        update_parts.append('particle_size_result = ?')
-        update_values.append(overall_result)
-
-        if existing:
-            update_values.append(existing[0])
-            query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-            cursor.execute(query, update_values)
-        else:
-            cursor.execute('''
-                SELECT inspection_type, inspector FROM inspection_progress
-                WHERE powder_name = ? AND lot_number = ?
-            ''', (powder_name, lot_number))
-            progress_data = cursor.fetchone()
-
-            inspection_type = progress_data[0] if progress_data else '일상점검'
-            inspector = progress_data[1] if progress_data else '미지정'
+            try:
+                avg = statements.to_number(data.get('avg'))
+            except Exception:
+                # if parsing fails, skip avg
+                avg = None
 
-            cursor.execute('''
-                INSERT INTO inspection_result (powder_name, lot_number, inspection_type, inspector)
-                VALUES (?, ?, ?, ?)
-            ''', (powder_name, lot_number, inspection_type, inspector))
+            mesh_result = 'PASS' if data.get('result') == '합격' else 'FAIL'
+            params.extend([
+                statements.to_number(data.get('val1')),
+                statements.to_number(data.get('val2')),
+                avg,
+                mesh_result,
+            ])
+            saved_items.append(item_name)
 
-            new_id = cursor.lastrowid
-            update_values.append(new_id)
+        params.extend([overall_result, row_id])
+        cursor.execute(statements.PARTICLE_UPDATE, params)
 
-            query = f"UPDATE inspection_result SET {', '.join(update_parts)} WHERE id = ?"
-            cursor.execute(query, update_values)
+        # 세로형 측정값 테이블 동시 기록 (전환 기간 dual-write)
+        measurements.sync_result(conn, row_id, saved_items)
 
         # 연결을 직접 생성한 경우에만 커밋
         if owns_connection:
@@ -1311,7 +1247,8 @@ def update_progress(powder_name, lot_number, item_name):
     last_error = None
     for attempt in range(max_retries):
         try:
-            _do_update_progress(powder_name, lot_number, item_name)
+            with lot_locks.hold(powder_name, lot_number):
+                _do_update_progress(powder_name, lot_number, item_name)
             return
         except Exception as e:
             if 'database is locked' in str(e).lower() and attempt < max_retries - 1:
@@ -1421,6 +1358,9 @@ def update_final_result(powder_name, lot_number, conn=None):
             WHERE powder_name = ? AND lot_number = ?
         ''', (final_result, powder_name, lot_number))
 
+        # 일별 품질 집계 갱신 (같은 트랜잭션)
+        rollup.refresh_for_lot(conn, powder_name, lot_number)
+
         # 연결을 직접 생성한 경우에만 커밋
         if owns_connection:
             conn.commit()
@@ -1519,7 +1459,7 @@ def admin_add_powder_spec():
                 data.get('category', 'incoming')
             ))
 
-            conn.commit()
+            commit_spec_change(conn, [data['powder_name']], parse_effective_from(data.get('effective_from')))
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1527,13 +1467,17 @@ def admin_add_powder_spec():
 
 @app.route('/api/admin/powder-spec/<int:spec_id>', methods=['PUT'])
 def admin_update_powder_spec(spec_id):
-    """분말 사양 수정"""
+    """분말 사양 수정 (effective_from 지정 시 그 시각부터 적용, 없으면 지금부터)"""
     try:
         data = request.json
+        effective_from = parse_effective_from(data.get('effective_from'))
 
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
+            cursor.execute('SELECT powder_name FROM powder_spec WHERE id = ?', (spec_id,))
+            old_row = cursor.fetchone()
+
             cursor.execute('''
                 UPDATE powder_spec SET
                     powder_name = ?,
@@ -1567,8 +1511,10 @@ def admin_update_powder_spec(spec_id):
                 spec_id
             ))
 
-            conn.commit()
-            return jsonify({'success': True})
+            commit_spec_change(conn, [old_row[0] if old_row else None, data.get('powder_name')], effective_from)
+
+        # 바뀐 규격으로 기존 검사 결과 재판정 (백그라운드)
+        return jsonify({'success': True, **rejudge_after_spec_change(data.get('powder_name'))})
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -1579,8 +1525,10 @@ def admin_delete_powder_spec(spec_id):
     try:
         with closing(get_db()) as conn:
             cursor = conn.cursor()
+            cursor.execute('SELECT powder_name FROM powder_spec WHERE id = ?', (spec_id,))
+            row = cursor.fetchone()
             cursor.execute('DELETE FROM powder_spec WHERE id = ?', (spec_id,))
-            conn.commit()
+            commit_spec_change(conn, [row[0] if row else None])
             return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -1636,7 +1584,7 @@ def admin_add_particle_size():
                 VALUES (?, ?, ?, ?)
             ''', (data['powder_name'], data['mesh_size'], data['min_value'], data['max_value']))
 
-            conn.commit()
+            commit_spec_change(conn, [data['powder_name']], parse_effective_from(data.get('effective_from')))
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1650,13 +1598,17 @@ def admin_update_particle_size(spec_id):
 
         with closing(get_db()) as conn:
             cursor = conn.cursor()
+            cursor.execute('SELECT powder_name FROM particle_size WHERE id = ?', (spec_id,))
+            old_row = cursor.fetchone()
+
             cursor.execute('''
                 UPDATE particle_size SET
                     powder_name = ?, mesh_size = ?, min_value = ?, max_value = ?
                 WHERE id = ?
             ''', (data['powder_name'], data['mesh_size'], data['min_value'], data['max_value'], spec_id))
 
-            conn.commit()
+            commit_spec_change(conn, [old_row[0] if old_row else None, data['powder_name']],
+                               parse_effective_from(data.get('effective_from')))
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1668,19 +1620,22 @@ def admin_delete_particle_size(spec_id):
     try:
         with closing(get_db()) as conn:
             cursor = conn.cursor()
+            cursor.execute('SELECT powder_name FROM particle_size WHERE id = ?', (spec_id,))
+            row = cursor.fetchone()
             cursor.execute('DELETE FROM particle_size WHERE id = ?', (spec_id,))
-            conn.commit()
+            commit_spec_change(conn, [row[0] if row else None])
             return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
 @app.route('/api/admin/particle-size/bulk', methods=['POST'])
 def admin_bulk_save_particle_size():
-    """입도분석 규격 일괄 저장"""
+    """입도분석 규격 일괄 저장 (effective_from 지정 시 그 시각부터 적용)"""
     try:
         data = request.json
         powder_name = data.get('powder_name')
-        specs = data.get('specs', [])
+        mesh_specs = data.get('specs', [])
+        effective_from = parse_effective_from(data.get('effective_from'))
 
         with closing(get_db()) as conn:
             cursor = conn.cursor()
@@ -1689,14 +1644,16 @@ def admin_bulk_save_particle_size():
             cursor.execute('DELETE FROM particle_size WHERE powder_name = ?', (powder_name,))
 
             # 새 규격 추가
-            for spec in specs:
+            for spec in mesh_specs:
                 cursor.execute('''
                     INSERT INTO particle_size (powder_name, mesh_size, min_value, max_value)
                     VALUES (?, ?, ?, ?)
                 ''', (spec['powder_name'], spec['mesh_size'], spec['min_value'], spec['max_value']))
 
-            conn.commit()
-            return jsonify({'success': True})
+            commit_spec_change(conn, [powder_name], effective_from)
+
+        # 바뀐 입도 규격으로 기존 검사 결과 재판정 (백그라운드)
+        return jsonify({'success': True, **rejudge_after_spec_change(powder_name)})
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -1758,14 +1715,16 @@ def admin_delete_inspector(inspector_id):
 # API: 작업자 관리 (Operator Management)
 # ============================================
 
+def query_operator_list(cursor):
+    cursor.execute('SELECT name FROM operator ORDER BY name')
+    return [row[0] for row in cursor.fetchall()]
+
 @app.route('/api/operator-list', methods=['GET'])
 def get_operator_list():
     """작업자 목록 조회"""
     try:
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT name FROM operator ORDER BY name')
-            operators = [row[0] for row in cursor.fetchall()]
+            operators = query_operator_list(conn.cursor())
             return jsonify({'success': True, 'data': operators})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -1830,43 +1789,25 @@ def admin_get_recipes():
         product_name = request.args.get('product_name', None)
 
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-
             if product_name:
                 # 특정 제품의 Recipe만 조회
-                cursor.execute('''
-                    SELECT * FROM recipe
-                    WHERE product_name = ? AND is_active = 1
-                    ORDER BY id
-                ''', (product_name,))
+                compiled = [recipe_cache.get(conn, product_name)]
             else:
                 # 모든 Recipe 조회
-                cursor.execute('''
-                    SELECT * FROM recipe
-                    WHERE is_active = 1
-                    ORDER BY product_name, id
-                ''')
-
-            recipes = [dict_from_row(row) for row in cursor.fetchall()]
-
-            # 제품별 그룹핑
-            products = {}
-            for recipe in recipes:
-                pname = recipe['product_name']
-                if pname not in products:
-                    products[pname] = {
-                        'product_name': pname,
-                        'product_code': recipe['product_code'],
-                        'recipes': []
-                    }
-                products[pname]['recipes'].append(recipe)
+                compiled = recipe_cache.all(conn)
 
-            return jsonify({
-                'success': True,
-                'data': list(products.values()),
-                'total_products': len(products),
-                'total_recipes': len(recipes)
-            })
+        # 제품별 그룹핑
+        products = [
+            {'product_name': c.product_name, 'product_code': c.product_code, 'recipes': c.to_rows()}
+            for c in compiled if len(c)
+        ]
+
+        return jsonify({
+            'success': True,
+            'data': products,
+            'total_products': len(products),
+            'total_recipes': sum(len(p['recipes']) for p in products)
+        })
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -1902,6 +1843,7 @@ def admin_add_recipe():
             ))
 
             conn.commit()
+            recipe_cache.invalidate(data['product_name'])
             return jsonify({'success': True, 'recipe_id': cursor.lastrowid})
 
     except Exception as e:
@@ -1941,6 +1883,8 @@ def admin_update_recipe(recipe_id):
             ))
 
             conn.commit()
+            # 제품명이 바뀔 수 있으므로 전체 무효화
+            recipe_cache.invalidate()
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1957,9 +1901,13 @@ def admin_delete_recipe(recipe_id):
             cursor.execute('''
                 UPDATE recipe SET is_active = 0, updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
+                RETURNING product_name
             ''', (recipe_id,))
+            row = cursor.fetchone()
 
             conn.commit()
+            if row:
+                recipe_cache.invalidate(row[0])
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1978,6 +1926,7 @@ def admin_delete_product_recipes(product_name):
             ''', (product_name,))
 
             conn.commit()
+            recipe_cache.invalidate(product_name)
             return jsonify({'success': True})
 
     except Exception as e:
@@ -1987,21 +1936,22 @@ def admin_delete_product_recipes(product_name):
 # API: 배합 작업 (Blending Work)
 # ============================================
 
+def query_blending_products(cursor):
+    """배합 가능한 제품 목록 (Recipe가 있는 제품만)"""
+    cursor.execute('''
+        SELECT DISTINCT product_name, product_code
+        FROM recipe
+        WHERE is_active = 1
+        ORDER BY product_name
+    ''')
+    return [dict_from_row(row) for row in cursor.fetchall()]
+
 @app.route('/api/blending/products', methods=['GET'])
 def get_blending_products():
     """배합 가능한 제품 목록 조회 (Recipe가 있는 제품만)"""
     try:
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT DISTINCT product_name, product_code
-                FROM recipe
-                WHERE is_active = 1
-                ORDER BY product_name
-            ''')
-
-            products = [dict_from_row(row) for row in cursor.fetchall()]
+            products = query_blending_products(conn.cursor())
 
             return jsonify({'success': True, 'data': products})
 
@@ -2013,17 +1963,9 @@ def get_blending_recipe(product_name):
     """특정 제품의 Recipe 조회"""
     try:
         with closing(get_db()) as conn:
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                SELECT * FROM recipe
-                WHERE product_name = ? AND is_active = 1
-                ORDER BY id
-            ''', (product_name,))
+            recipe_rows = recipe_cache.get(conn, product_name).to_rows()
 
-            recipes = [dict_from_row(row) for row in cursor.fetchall()]
-
-            return jsonify({'success': True, 'data': recipes})
+            return jsonify({'success': True, 'data': recipe_rows})
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
@@ -2162,14 +2104,10 @@ def get_blending_work(work_id):
             else:
                 work['main_powder_weights'] = {}
 
-            # Recipe 조회
-            cursor.execute('''
-                SELECT * FROM recipe
-                WHERE product_name = ? AND is_active = 1
-                ORDER BY id
-            ''', (work['product_name'],))
-
-            recipes = [dict_from_row(row) for row in cursor.fetchall()]
+            # Recipe (캐시) 및 각 Recipe의 목표 중량 계산
+            compiled = recipe_cache.get(conn, work['product_name'])
+            weights = compiled.target_weights(work['target_total_weight'], work['main_powder_weights'])
+            recipe_rows = compiled.to_rows(weights)
 
             # 이미 투입된 원재료 조회
             cursor.execute('''
@@ -2180,33 +2118,10 @@ def get_blending_work(work_id):
 
             material_inputs = [dict_from_row(row) for row in cursor.fetchall()]
 
-            # Main 분말들 찾기
-            main_recipes = [r for r in recipes if r.get('is_main')]
-
-            # 각 Recipe에 목표 중량 계산
-            if main_recipes:
-                # Main 분말 중량 합계 및 비율 합계
-                total_main_weight = sum(work['main_powder_weights'].get(r['powder_name'], 0) for r in main_recipes)
-                total_main_ratio = sum(r['ratio'] for r in main_recipes)
-
-                for recipe in recipes:
-                    if recipe.get('is_main'):
-                        # Main 분말: 개별 지정 중량
-                        recipe['calculated_weight'] = work['main_powder_weights'].get(recipe['powder_name'], 0)
-                    elif total_main_weight > 0 and total_main_ratio > 0:
-                        # 다른 분말: 전체 main 중량 × (해당 비율 / 전체 main 비율)
-                        recipe['calculated_weight'] = total_main_weight * (recipe['ratio'] / total_main_ratio)
-                    else:
-                        recipe['calculated_weight'] = 0
-            else:
-                # Main 분말이 없는 경우 기존 방식
-                for recipe in recipes:
-                    recipe['calculated_weight'] = (work['target_total_weight'] * recipe['ratio'] / 100) if work['target_total_weight'] else 0
-
             return jsonify({
                 'success': True,
                 'work': work,
-                'recipes': recipes,
+                'recipes': recipe_rows,
                 'material_inputs': material_inputs
             })
 
@@ -2233,12 +2148,7 @@ def delete_blending_work(work_id):
             if work[0] == 'completed':
                 return jsonify({'success': False, 'message': '완료된 작업은 삭제할 수 없습니다.'})
 
-            # 관련 원재료 투입 데이터 삭제
-            cursor.execute('''
-                DELETE FROM material_input WHERE blending_work_id = ?
-            ''', (work_id,))
-
-            # 배합 작업 삭제
+            # 배합 작업 삭제 (원재료 투입은 외래 키 ON DELETE CASCADE로 함께 삭제)
             cursor.execute('''
                 DELETE FROM blending_work WHERE id = ?
             ''', (work_id,))
@@ -2253,6 +2163,141 @@ def delete_blending_work(work_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+# ============================================
+# API: 원재료 LOT 재고
+# ============================================
+
+def set_received_qty(cursor, powder_name, lot_number, received_qty):
+    """LOT 입고 수량 기록 (재고 원장 행이 없으면 생성)"""
+    cursor.execute('''
+        INSERT INTO lot_inventory (powder_name, lot_number, received_qty, received_at, updated_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+        ON CONFLICT(powder_name, lot_number) DO UPDATE SET
+            received_qty = excluded.received_qty,
+            received_at = COALESCE(received_at, excluded.received_at),
+            updated_at = CURRENT_TIMESTAMP
+    ''', (powder_name, lot_number, received_qty))
+
+@app.route('/api/lot-inventory', methods=['GET'])
+def get_lot_inventory():
+    """원재료 LOT 재고 현황
+
+    Query:
+        powder_name: 분말명 (선택)
+        available: 1이면 잔량이 남은 LOT(입고 수량 미입력 포함)만
+    """
+    try:
+        powder_name = request.args.get('powder_name', '')
+        available = request.args.get('available') == '1'
+
+        query = '''
+            SELECT i.powder_name, i.lot_number, i.received_qty, i.used_qty,
+                   i.received_qty - i.used_qty AS remaining_qty,
+                   i.received_at, i.updated_at, r.final_result, r.inspection_time
+            FROM lot_inventory i
+            LEFT JOIN inspection_result r
+                   ON r.powder_name = i.powder_name AND r.lot_number = i.lot_number AND r.category = 'incoming'
+            WHERE 1 = 1
+        '''
+        params = []
+        if powder_name:
+            query += ' AND i.powder_name = ?'
+            params.append(powder_name)
+        if available:
+            query += ' AND (i.received_qty IS NULL OR i.received_qty - i.used_qty > 0)'
+        query += ' ORDER BY i.powder_name, i.lot_number'
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            lots = [dict_from_row(row) for row in cursor.fetchall()]
+
+        return jsonify({'success': True, 'data': lots, 'total': len(lots)})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/lot-inventory', methods=['PUT'])
+def update_lot_inventory():
+    """LOT 입고 수량 입력/정정 (JSON: powder_name, lot_number, received_qty)"""
+    try:
+        data = request.json or {}
+        if not all(data.get(field) not in (None, '') for field in ('powder_name', 'lot_number', 'received_qty')):
+            return jsonify({'success': False, 'message': '필수 항목이 누락되었습니다.'})
+
+        received_qty = float(data['received_qty'])
+        if received_qty < 0:
+            return jsonify({'success': False, 'message': '입고 수량은 0 이상이어야 합니다.'})
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+            set_received_qty(cursor, data['powder_name'], data['lot_number'], received_qty)
+            conn.commit()
+
+            cursor.execute('''
+                SELECT received_qty, used_qty, received_qty - used_qty AS remaining_qty
+                FROM lot_inventory WHERE powder_name = ? AND lot_number = ?
+            ''', (data['powder_name'], data['lot_number']))
+            lot = dict_from_row(cursor.fetchone())
+
+        return jsonify({'success': True, 'data': lot})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# API: 배합 LOT 라벨 일괄 출력
+# ============================================
+
+@app.route('/api/labels', methods=['GET'])
+def get_blending_labels():
+    """배합 작업의 Pack 라벨 전체를 인쇄용 문서 1개로 반환 (라벨 1개 = 1페이지)
+
+    Query:
+        workId 또는 batchLot: 배합 작업
+        packs: 출력할 Pack 번호 (쉼표 구분, 없으면 전체)
+        company: 라벨 회사명 (선택)
+        labelDate, labelPack, labelWeight: 라벨 항목명 (선택, 화면 언어 기준)
+        print: 0이면 자동 인쇄 안 함
+    """
+    try:
+        work_id = request.args.get('workId', type=int)
+        batch_lot = request.args.get('batchLot')
+        if not work_id and not batch_lot:
+            return jsonify({'success': False, 'message': 'workId 또는 batchLot을 지정하세요.'})
+
+        packs = None
+        if request.args.get('packs'):
+            packs = {int(p) for p in request.args['packs'].split(',') if p.strip()}
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+            if work_id:
+                cursor.execute('SELECT * FROM blending_work WHERE id = ?', (work_id,))
+            else:
+                cursor.execute('SELECT * FROM blending_work WHERE batch_lot = ?', (batch_lot,))
+            work = cursor.fetchone()
+
+        if not work:
+            return jsonify({'success': False, 'message': '배합 작업을 찾을 수 없습니다.'})
+
+        # 작업날짜: 완료 시각(없으면 현재 시각), KST
+        date_str = to_kst_str(work['end_time']) if work['end_time'] else datetime.now(ZoneInfo('Asia/Seoul')).strftime('%Y-%m-%d %H:%M')
+        items = labels.build_labels(dict_from_row(work), date_str, request.args.get('company'), packs)
+        if not items:
+            return jsonify({'success': False, 'message': '출력할 라벨이 없습니다.'})
+
+        captions = {
+            'date': request.args.get('labelDate'),
+            'pack': request.args.get('labelPack'),
+            'weight': request.args.get('labelWeight'),
+        }
+        html = labels.render_document(items, captions, auto_print=request.args.get('print') != '0')
+        return app.response_class(html, mimetype='text/html')
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/completed-lots/<powder_name>', methods=['GET'])
 def get_completed_lots(powder_name):
     """특정 분말의 수입검사 완료된 LOT 번호 목록 조회"""
@@ -2262,12 +2307,14 @@ def get_completed_lots(powder_name):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            # 수입검사 완료(PASS)된 LOT만 조회 (최근 5개)
+            # 수입검사 완료(PASS)된 LOT만 조회 (최근 5개, 재고 원장의 잔량 포함)
             cursor.execute('''
-                SELECT lot_number, inspection_time, final_result
-                FROM inspection_result
-                WHERE powder_name = ? AND category = ? AND final_result = 'PASS'
-                ORDER BY inspection_time DESC
+                SELECT r.lot_number, r.inspection_time, r.final_result,
+                       i.received_qty, i.received_qty - i.used_qty AS remaining_qty
+                FROM inspection_result r
+                LEFT JOIN lot_inventory i ON i.powder_name = r.powder_name AND i.lot_number = r.lot_number
+                WHERE r.powder_name = ? AND r.category = ? AND r.final_result = 'PASS'
+                ORDER BY r.inspection_time DESC
                 LIMIT 5
             ''', (powder_name, category))
 
@@ -2276,7 +2323,9 @@ def get_completed_lots(powder_name):
                 lot_dict = dict_from_row(row)
                 lots.append({
                     'lot_number': lot_dict['lot_number'],
-                    'inspection_time': lot_dict['inspection_time']
+                    'inspection_time': lot_dict['inspection_time'],
+                    'received_qty': lot_dict['received_qty'],
+                    'remaining_qty': lot_dict['remaining_qty']
                 })
 
             return jsonify({'success': True, 'lots': lots})
@@ -2284,6 +2333,37 @@ def get_completed_lots(powder_name):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+FIFO_LOT_LIMIT = 5
+MAX_FIFO_LOT_LIMIT = 50
+
+@app.route('/api/lot-recommendation/<powder_name>', methods=['GET'])
+def recommend_lots(powder_name):
+    """선입선출 투입 LOT 추천: 수입검사 합격 후 소진되지 않은 LOT을 오래된 순으로
+
+    입고 수량이 입력되지 않은 LOT은 소진 여부를 알 수 없으므로 포함합니다.
+    (idx_lot_inventory_fifo 부분 인덱스와 같은 조건으로 조회)
+    """
+    try:
+        limit = min(request.args.get('limit', FIFO_LOT_LIMIT, type=int), MAX_FIFO_LOT_LIMIT)
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT lot_number, passed_at AS inspection_time, received_qty,
+                       received_qty - used_qty AS remaining_qty
+                FROM lot_inventory
+                WHERE powder_name = ?
+                  AND passed_at IS NOT NULL AND (received_qty IS NULL OR used_qty < received_qty)
+                ORDER BY passed_at
+                LIMIT ?
+            ''', (powder_name, limit))
+            lots = [dict_from_row(row) for row in cursor.fetchall()]
+
+        return jsonify({'success': True, 'lots': lots})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/blending/validate-lot/<lot_number>', methods=['GET'])
 def validate_material_lot(lot_number):
     """원재료 LOT 검증 (수입검사 완료 여부 확인)"""
@@ -2291,11 +2371,13 @@ def validate_material_lot(lot_number):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            # 수입검사 결과에서 LOT 조회
-            cursor.execute('''
-                SELECT powder_name, lot_number, final_result, inspection_time
-                FROM inspection_result
-                WHERE lot_number = ? AND category = 'incoming'
+            # 수입검사 결과에서 LOT 조회 (보관된 검사 결과 포함)
+            cursor.execute(f'''
+                SELECT r.powder_name, r.lot_number, r.final_result, r.inspection_time,
+                       i.received_qty, i.received_qty - i.used_qty AS remaining_qty
+                FROM {archive.history_table(conn, 'inspection_result')} r
+                LEFT JOIN lot_inventory i ON i.powder_name = r.powder_name AND i.lot_number = r.lot_number
+                WHERE r.lot_number = ? AND r.category = 'incoming'
             ''', (lot_number,))
 
             row = cursor.fetchone()
@@ -2321,12 +2403,142 @@ def validate_material_lot(lot_number):
                 'valid': True,
                 'powder_name': result['powder_name'],
                 'lot_number': result['lot_number'],
-                'inspection_time': result['inspection_time']
+                'inspection_time': result['inspection_time'],
+                'received_qty': result['received_qty'],
+                'remaining_qty': result['remaining_qty']
             })
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+def split_material_lots(material_lot):
+    """쉼표로 구분된 복수 LOT 분리"""
+    return [lot.strip() for lot in str(material_lot).split(',') if lot.strip()]
+
+def check_material_lots(cursor, entries):
+    """투입 LOT 일괄 검증 (전체 LOT을 한 번의 IN 조회로 확인)
+
+    Args:
+        entries: [(분말명, LOT번호), ...]
+
+    Returns:
+        list: 입력 순서대로 {'powder_name', 'lot', 'status', 'actual_powder'}
+              status: found, failed(수입검사 FAIL), wrong_powder(다른 분말의 LOT), missing
+    """
+    lots = sorted({lot for _, lot in entries})
+    found = {}
+    if lots:
+        # 보관(archive.db)된 수입검사 결과도 함께 확인
+        source = archive.history_table(cursor.connection, 'inspection_result')
+        cursor.execute(f'''
+            SELECT lot_number, powder_name, final_result FROM {source}
+            WHERE category = 'incoming' AND lot_number IN ({', '.join('?' * len(lots))})
+        ''', lots)
+        for lot_number, powder_name, final_result in cursor.fetchall():
+            found.setdefault(lot_number, {})[powder_name] = final_result
+
+    results = []
+    for powder_name, lot in entries:
+        # 제품명과 LOT 번호로 함께 비교 (lot번호가 동일해도 제품명이 다르면 구분)
+        by_powder = found.get(lot, {})
+        if powder_name in by_powder:
+            status = 'failed' if by_powder[powder_name] == 'FAIL' else 'found'
+            actual_powder = powder_name
+        elif by_powder:
+            status, actual_powder = 'wrong_powder', next(iter(by_powder))
+        else:
+            status, actual_powder = 'missing', None
+        results.append({'powder_name': powder_name, 'lot': lot, 'status': status, 'actual_powder': actual_powder})
+    return results
+
+def material_lot_error(result):
+    """LOT 검증 결과의 오류 응답 (정상이면 None)"""
+    lot, powder_name = result['lot'], result['powder_name']
+    if result['status'] == 'missing':
+        return {'success': False, 'message': f'LOT {lot}의 수입검사 기록을 찾을 수 없습니다.'}
+    if result['status'] == 'wrong_powder':
+        return {
+            'success': False,
+            'message': f'이종분말 검출! 투입하려는 분말({powder_name})과 LOT {lot}의 실제 분말({result["actual_powder"]})이 다릅니다.',
+            'is_wrong_material': True
+        }
+    if result['status'] == 'failed':
+        return {'success': False, 'message': f'LOT {lot}는 수입검사에서 불합격 처리되었습니다.', 'is_failed_lot': True}
+    return None
+
+def check_input_weight(data):
+    """중량 편차 계산 및 허용 오차 확인
+
+    Returns:
+        tuple: (목표 중량, 실제 중량, 편차 %, 부적정 시 오류 응답 / 적정이면 None)
+    """
+    target_weight = float(data['target_weight'])
+    actual_weight = float(data['actual_weight'])
+    weight_deviation = ((actual_weight - target_weight) / target_weight * 100) if target_weight > 0 else 0
+    weight_deviation = round(weight_deviation, 2)
+
+    tolerance = float(data.get('tolerance_percent', 5.0))
+    if abs(weight_deviation) <= tolerance:
+        return target_weight, actual_weight, weight_deviation, None
+
+    validation_message = f'중량 편차({abs(weight_deviation):.2f}%)가 허용 오차({tolerance}%)를 초과했습니다.'
+    # NG(부적정) 판정일 경우 저장 거부
+    return target_weight, actual_weight, weight_deviation, {
+        'success': False,
+        'is_valid': False,
+        'message': f'부적정(NG) 판정되어 저장할 수 없습니다.\n{validation_message}',
+        'validation_message': validation_message,
+        'weight_deviation': weight_deviation
+    }
+
+MATERIAL_INPUT_INSERT = '''
+    INSERT INTO material_input (
+        blending_work_id, powder_name, powder_category, material_lot,
+        target_weight, actual_weight, weight_deviation, is_valid,
+        validation_message, input_by
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, 1, NULL, ?)
+'''
+
+LOT_WEIGHT_TOLERANCE = 0.01   # LOT별 중량 합계와 실제 중량의 허용 차이 (kg)
+
+def lot_usage(data, actual_weight):
+    """투입 1건의 LOT별 사용 중량
+
+    lot_weights(material_lot의 LOT 순서대로의 중량 목록)가 있으면 그대로(같은 LOT은 합산),
+    없으면 실제 중량을 균등 분할합니다.
+
+    Returns:
+        tuple: ([(LOT, 중량), ...], 잘못된 lot_weights이면 오류 응답 / 정상이면 None)
+    """
+    lots = split_material_lots(data['material_lot'])
+    lot_weights = data.get('lot_weights')
+    if not lot_weights:
+        unique_lots = list(dict.fromkeys(lots))
+        return [(lot, actual_weight / len(unique_lots)) for lot in unique_lots], None
+
+    if len(lot_weights) != len(lots):
+        return None, {'success': False, 'message': 'LOT별 중량 개수가 LOT 수와 다릅니다.'}
+    weights = [float(weight or 0) for weight in lot_weights]
+    if any(weight < 0 for weight in weights):
+        return None, {'success': False, 'message': 'LOT별 중량은 0 이상이어야 합니다.'}
+    if abs(sum(weights) - actual_weight) > LOT_WEIGHT_TOLERANCE:
+        return None, {
+            'success': False,
+            'message': f'LOT별 중량 합계({sum(weights):.2f}kg)가 실제 중량({actual_weight:.2f}kg)과 다릅니다.'
+        }
+
+    usage = {}
+    for lot, weight in zip(lots, weights):
+        usage[lot] = usage.get(lot, 0) + weight
+    return list(usage.items()), None
+
+def record_lot_usage(cursor, material_input_id, powder_name, usage):
+    """LOT별 사용 기록 저장 (재고 원장 lot_inventory는 트리거가 차감)"""
+    cursor.executemany('''
+        INSERT INTO material_input_lot (material_input_id, powder_name, lot_number, weight)
+        VALUES (?, ?, ?, ?)
+    ''', [(material_input_id, powder_name, lot, weight) for lot, weight in usage])
+
 @app.route('/api/blending/material-input', methods=['POST'])
 def save_material_input():
     """원재료 투입 기록 저장"""
@@ -2340,73 +2552,26 @@ def save_material_input():
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            # 1. 이종분말 검증 (제품명과 LOT번호 둘 다 비교하여 검증)
-            # 복수 LOT 지원: 쉼표로 구분된 LOT를 분리하여 검증
-            material_lots = [lot.strip() for lot in data['material_lot'].split(',')]
-
-            for lot in material_lots:
-                # 제품명과 LOT 번호로 함께 조회 (lot번호가 동일해도 제품명이 다르면 구분)
-                cursor.execute('''
-                    SELECT powder_name FROM inspection_result
-                    WHERE lot_number = ? AND powder_name = ? AND category = 'incoming'
-                ''', (lot, data['powder_name']))
-
-                lot_row = cursor.fetchone()
-
-                if not lot_row:
-                    # 먼저 LOT가 존재하는지 확인
-                    cursor.execute('''
-                        SELECT powder_name FROM inspection_result
-                        WHERE lot_number = ? AND category = 'incoming'
-                    ''', (lot,))
-                    
-                    check_row = cursor.fetchone()
-                    
-                    if not check_row:
-                        return jsonify({
-                            'success': False,
-                            'message': f'LOT {lot}의 수입검사 기록을 찾을 수 없습니다.'
-                        })
-                    else:
-                        # LOT는 있지만 제품명이 다른 경우
-                        actual_powder = check_row[0]
-                        return jsonify({
-                            'success': False,
-                            'message': f'이종분말 검출! 투입하려는 분말({data["powder_name"]})과 LOT {lot}의 실제 분말({actual_powder})이 다릅니다.',
-                            'is_wrong_material': True
-                        })
-
-            # 2. 중량 편차 계산
-            target_weight = float(data['target_weight'])
-            actual_weight = float(data['actual_weight'])
-            weight_deviation = ((actual_weight - target_weight) / target_weight * 100) if target_weight > 0 else 0
-            weight_deviation = round(weight_deviation, 2)
-
-            # 3. 허용 오차 확인
-            tolerance = float(data.get('tolerance_percent', 5.0))
-            is_valid = abs(weight_deviation) <= tolerance
-
-            validation_message = None
-            if not is_valid:
-                validation_message = f'중량 편차({abs(weight_deviation):.2f}%)가 허용 오차({tolerance}%)를 초과했습니다.'
-
-                # NG(부적정) 판정일 경우 저장 거부
-                return jsonify({
-                    'success': False,
-                    'is_valid': False,
-                    'message': f'부적정(NG) 판정되어 저장할 수 없습니다.\n{validation_message}',
-                    'validation_message': validation_message,
-                    'weight_deviation': weight_deviation
-                })
-
-            # 4. material_input 테이블에 저장 (적정 판정된 경우만)
-            cursor.execute('''
-                INSERT INTO material_input (
-                    blending_work_id, powder_name, powder_category, material_lot,
-                    target_weight, actual_weight, weight_deviation, is_valid,
-                    validation_message, input_by
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            # 1. 이종분말/불합격 LOT 검증 (복수 LOT는 쉼표로 구분, 한 번에 조회)
+            lot_results = check_material_lots(
+                cursor, [(data['powder_name'], lot) for lot in split_material_lots(data['material_lot'])])
+            for result in lot_results:
+                error = material_lot_error(result)
+                if error:
+                    return jsonify(error)
+
+            # 2. 중량 편차 계산 및 허용 오차 확인
+            target_weight, actual_weight, weight_deviation, error = check_input_weight(data)
+            if error:
+                return jsonify(error)
+
+            # LOT별 사용 중량 (재고 차감용, 합계가 실제 중량과 같아야 함)
+            usage, error = lot_usage(data, actual_weight)
+            if error:
+                return jsonify(error)
+
+            # 3. material_input 테이블에 저장 (적정 판정된 경우만)
+            cursor.execute(MATERIAL_INPUT_INSERT, (
                 data['blending_work_id'],
                 data['powder_name'],
                 data.get('powder_category', 'incoming'),
@@ -2414,40 +2579,104 @@ def save_material_input():
                 target_weight,
                 actual_weight,
                 weight_deviation,
-                1 if is_valid else 0,
-                validation_message,
                 data.get('operator', '미지정')
             ))
 
             material_input_id = cursor.lastrowid
+            record_lot_usage(cursor, material_input_id, data['powder_name'], usage)
 
-            # 5. 배합 작업의 실제 총 중량 업데이트
-            cursor.execute('''
-                SELECT COALESCE(SUM(actual_weight), 0) FROM material_input
-                WHERE blending_work_id = ?
-            ''', (data['blending_work_id'],))
-
-            total_actual_weight = cursor.fetchone()[0]
-
-            cursor.execute('''
-                UPDATE blending_work
-                SET actual_total_weight = ?
-                WHERE id = ?
-            ''', (total_actual_weight, data['blending_work_id']))
-
+            # 배합 작업의 실제 총 중량/투입 수, LOT 재고는 트리거가 갱신
             conn.commit()
 
             return jsonify({
                 'success': True,
                 'material_input_id': material_input_id,
                 'weight_deviation': weight_deviation,
-                'is_valid': is_valid,
-                'validation_message': validation_message
+                'is_valid': True,
+                'validation_message': None
             })
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/blending/material-inputs', methods=['POST'])
+def save_material_inputs():
+    """원재료 투입 기록 여러 건을 한 트랜잭션으로 저장 (계량대에서 Recipe 전체 투입 등록)
+
+    JSON:
+        blending_work_id, operator,
+        inputs: [{powder_name, material_lot, target_weight, actual_weight, tolerance_percent, powder_category,
+                  lot_weights}, ...]
+
+    한 건이라도 검증에 실패하면 아무것도 저장하지 않고 해당 행 번호(row, 0부터)와 사유를 반환합니다.
+    """
+    try:
+        data = request.json or {}
+        inputs = data.get('inputs') or []
+        work_id = data.get('blending_work_id')
+
+        if not work_id or not inputs:
+            return jsonify({'success': False, 'message': '필수 항목이 누락되었습니다.'})
+
+        required_fields = ['powder_name', 'material_lot', 'target_weight', 'actual_weight']
+        for i, item in enumerate(inputs):
+            if not all(field in item for field in required_fields):
+                return jsonify({'success': False, 'row': i, 'message': f'{i + 1}번째 투입의 필수 항목이 누락되었습니다.'})
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('SELECT status FROM blending_work WHERE id = ?', (work_id,))
+            work = cursor.fetchone()
+            if not work:
+                return jsonify({'success': False, 'message': '배합 작업을 찾을 수 없습니다.'})
+            if work[0] == 'completed':
+                return jsonify({'success': False, 'message': '완료된 작업에는 투입할 수 없습니다.'})
+
+            # 1. 전체 투입의 LOT를 한 번에 검증
+            entries, rows = [], []
+            for i, item in enumerate(inputs):
+                for lot in split_material_lots(item['material_lot']):
+                    entries.append((item['powder_name'], lot))
+                    rows.append(i)
+            for i, result in zip(rows, check_material_lots(cursor, entries)):
+                error = material_lot_error(result)
+                if error:
+                    error['row'] = i
+                    return jsonify(error)
+
+            # 2. 중량 검증
+            params = []
+            usages = []
+            deviations = []
+            for i, item in enumerate(inputs):
+                target_weight, actual_weight, weight_deviation, error = check_input_weight(item)
+                if error:
+                    error['row'] = i
+                    return jsonify(error)
+                usage, error = lot_usage(item, actual_weight)
+                if error:
+                    error['row'] = i
+                    return jsonify(error)
+                deviations.append(weight_deviation)
+                usages.append(usage)
+                params.append((
+                    work_id, item['powder_name'], item.get('powder_category', 'incoming'), item['material_lot'],
+                    target_weight, actual_weight, weight_deviation,
+                    item.get('operator') or data.get('operator', '미지정')
+                ))
+
+            # 3. 저장 (한 트랜잭션, 총 중량/투입 수와 LOT 재고는 트리거가 갱신)
+            for item, row, usage in zip(inputs, params, usages):
+                cursor.execute(MATERIAL_INPUT_INSERT, row)
+                record_lot_usage(cursor, cursor.lastrowid, item['powder_name'], usage)
+            conn.commit()
+
+            return jsonify({'success': True, 'count': len(params), 'weight_deviations': deviations})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/blending/complete/<int:work_id>', methods=['PUT'])
 def complete_blending_work(work_id):
     """배합 작업 완료 처리"""
@@ -2455,22 +2684,17 @@ def complete_blending_work(work_id):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            # 모든 원재료가 투입되었는지 확인
+            # 모든 원재료가 투입되었는지 확인 (투입 수/Recipe 원재료 수는 트리거가 유지)
             cursor.execute('''
-                SELECT COUNT(*) FROM recipe
-                WHERE product_name = (
-                    SELECT product_name FROM blending_work WHERE id = ?
-                ) AND is_active = 1
+                SELECT input_count, expected_input_count FROM blending_work
+                WHERE id = ?
             ''', (work_id,))
 
-            expected_count = cursor.fetchone()[0]
-
-            cursor.execute('''
-                SELECT COUNT(*) FROM material_input
-                WHERE blending_work_id = ?
-            ''', (work_id,))
+            counts = cursor.fetchone()
+            if not counts:
+                return jsonify({'success': False, 'message': '배합 작업을 찾을 수 없습니다.'})
 
-            actual_count = cursor.fetchone()[0]
+            actual_count, expected_count = counts
 
             if actual_count < expected_count:
                 return jsonify({
@@ -2504,14 +2728,19 @@ def get_blending_works():
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
+            # 진행 중 작업은 보관되지 않으므로 운영 DB만 조회
+            source = 'blending_work'
+            if status != 'in_progress':
+                source = archive.history_table(conn, 'blending_work', completed_date + ' 00:00:00' if completed_date else None)
+
             # Build dynamic query with optional filters
-            base_select = '''
+            base_select = f'''
                 SELECT
                     id, work_order, product_name, product_code, batch_lot,
                     target_total_weight, actual_total_weight,
                     blending_time, blending_temperature, blending_rpm,
                     operator, status, start_time, end_time, notes
-                FROM blending_work
+                FROM {source}
             '''
 
             where_clauses = []
@@ -2521,13 +2750,26 @@ def get_blending_works():
                 where_clauses.append('status = ?')
                 params.append(status)
 
+            # 부분 검색은 LOT 검색 인덱스(FTS5 trigram)를 우선 사용
+            use_fts = has_lot_search(conn)
+
             if product_name:
-                where_clauses.append('product_name LIKE ?')
-                params.append(f"%{product_name}%")
+                match = fts_phrase(product_name, 'name') if use_fts else None
+                if match:
+                    where_clauses.append("id IN (SELECT ref_id FROM lot_search WHERE lot_search MATCH ? AND kind = 'batch')")
+                    params.append(match)
+                else:
+                    where_clauses.append("product_name LIKE ? ESCAPE '\\'")
+                    params.append(like_pattern(product_name))
 
             if batch_lot:
-                where_clauses.append('batch_lot LIKE ?')
-                params.append(f"%{batch_lot}%")
+                match = fts_phrase(batch_lot, 'lot') if use_fts else None
+                if match:
+                    where_clauses.append("id IN (SELECT ref_id FROM lot_search WHERE lot_search MATCH ? AND kind = 'batch')")
+                    params.append(match)
+                else:
+                    where_clauses.append("batch_lot LIKE ? ESCAPE '\\'")
+                    params.append(like_pattern(batch_lot))
 
             if completed_date:
                 # filter by DATE(end_time) == completed_date
@@ -2564,9 +2806,14 @@ def trace_by_batch_lot(batch_lot):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
+            # 보관(archive.db)된 배합/검사 이력도 함께 추적
+            work_source = archive.history_table(conn, 'blending_work')
+            input_source = archive.history_table(conn, 'material_input')
+            result_source = archive.history_table(conn, 'inspection_result')
+
             # 1. 배합 작업 정보 조회
-            cursor.execute('''
-                SELECT * FROM blending_work
+            cursor.execute(f'''
+                SELECT * FROM {work_source}
                 WHERE batch_lot = ?
             ''', (batch_lot,))
 
@@ -2581,8 +2828,8 @@ def trace_by_batch_lot(batch_lot):
             work = dict_from_row(work_row)
 
             # 2. 원재료 투입 이력 조회
-            cursor.execute('''
-                SELECT * FROM material_input
+            cursor.execute(f'''
+                SELECT * FROM {input_source}
                 WHERE blending_work_id = ?
                 ORDER BY id
             ''', (work['id'],))
@@ -2591,10 +2838,10 @@ def trace_by_batch_lot(batch_lot):
 
             # 3. 각 원재료의 수입검사 결과 조회 (제품명과 lot번호로 조회)
             for material in material_inputs:
-                cursor.execute('''
+                cursor.execute(f'''
                     SELECT powder_name, lot_number, inspection_type, inspector,
                            inspection_time, final_result
-                    FROM inspection_result
+                    FROM {result_source}
                     WHERE lot_number = ? AND powder_name = ? AND category = 'incoming'
                 ''', (material['material_lot'], material['powder_name']))
 
@@ -2623,16 +2870,21 @@ def trace_by_material_lot(material_lot):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
+            # 보관(archive.db)된 배합/검사 이력도 함께 추적
+            work_source = archive.history_table(conn, 'blending_work')
+            input_source = archive.history_table(conn, 'material_input')
+            result_source = archive.history_table(conn, 'inspection_result')
+
             # 1. 수입검사 결과 조회 (제품명과 lot번호로 조회)
             if powder_name:
-                cursor.execute('''
-                    SELECT * FROM inspection_result
+                cursor.execute(f'''
+                    SELECT * FROM {result_source}
                     WHERE lot_number = ? AND powder_name = ? AND category = 'incoming'
                 ''', (material_lot, powder_name))
             else:
                 # powder_name이 없으면 lot번호만으로 검색
-                cursor.execute('''
-                    SELECT * FROM inspection_result
+                cursor.execute(f'''
+                    SELECT * FROM {result_source}
                     WHERE lot_number = ? AND category = 'incoming'
                 ''', (material_lot,))
 
@@ -2653,7 +2905,7 @@ def trace_by_material_lot(material_lot):
             inspection = dict_from_row(inspection_row)
 
             # 2. 이 LOT과 분말명이 사용된 모든 배합 작업 조회
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT
                     mi.*,
                     bw.work_order,
@@ -2665,8 +2917,8 @@ def trace_by_material_lot(material_lot):
                     bw.status,
                     bw.start_time,
                     bw.end_time
-                FROM material_input mi
-                JOIN blending_work bw ON mi.blending_work_id = bw.id
+                FROM {input_source} mi
+                JOIN {work_source} bw ON mi.blending_work_id = bw.id
                 WHERE mi.material_lot = ? AND mi.powder_name = ?
                 ORDER BY bw.start_time DESC
             ''', (material_lot, powder_name))
@@ -2704,9 +2956,12 @@ def search_traceability():
                 'found_as': []
             }
 
+            work_source = archive.history_table(conn, 'blending_work')
+            result_source = archive.history_table(conn, 'inspection_result')
+
             # 1. 배합 LOT로 검색
-            cursor.execute('''
-                SELECT COUNT(*) FROM blending_work
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM {work_source}
                 WHERE batch_lot = ?
             ''', (lot_number,))
 
@@ -2715,13 +2970,13 @@ def search_traceability():
 
             # 2. 원재료 LOT로 검색 (분말명도 함께 검색)
             if powder_name:
-                cursor.execute('''
-                    SELECT COUNT(*) FROM inspection_result
+                cursor.execute(f'''
+                    SELECT COUNT(*) FROM {result_source}
                     WHERE lot_number = ? AND powder_name = ? AND category = 'incoming'
                 ''', (lot_number, powder_name))
             else:
-                cursor.execute('''
-                    SELECT COUNT(*) FROM inspection_result
+                cursor.execute(f'''
+                    SELECT COUNT(*) FROM {result_source}
                     WHERE lot_number = ? AND category = 'incoming'
                 ''', (lot_number,))
 
@@ -2745,6 +3000,108 @@ def search_traceability():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+# ============================================
+# API: LOT 통합 검색
+# ============================================
+
+# FTS 인덱스가 없을 때 사용하는 검색 대상 (lot_search와 같은 컬럼 구성)
+LOT_SEARCH_FALLBACK_SOURCE = '''(
+    SELECT 'batch' AS kind, id AS ref_id, batch_lot AS lot, product_name AS name FROM blending_work
+    UNION ALL
+    SELECT 'material', id, material_lot, powder_name FROM material_input
+    UNION ALL
+    SELECT 'inspection', id, lot_number, powder_name FROM inspection_result
+)'''
+
+@app.route('/api/lot-search', methods=['GET'])
+def search_lots():
+    """배합 LOT / 원재료 LOT / 검사 LOT / 제품·분말명 부분 검색 (일치도 순)
+
+    Query:
+        q: 검색어 (LOT 일부 또는 제품/분말명 일부)
+        kind: batch, material, inspection 중 하나로 제한 (선택)
+        limit: 최대 결과 수 (기본 20, 최대 100)
+    """
+    try:
+        q = request.args.get('q', '').strip()
+        kind = request.args.get('kind', '')
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+        if not q:
+            return jsonify({'success': False, 'message': '검색어를 입력하세요.'})
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+
+            use_fts = has_lot_search(conn)
+            match = fts_phrase(q) if use_fts else None
+            source = 'lot_search' if use_fts else LOT_SEARCH_FALLBACK_SOURCE
+
+            if match:
+                condition = 'lot_search MATCH ?'
+                params = [match]
+                tie_break = 'rank'
+            else:
+                condition = "(lot LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\')"
+                params = [like_pattern(q), like_pattern(q)]
+                tie_break = 'lot'
+
+            if kind:
+                condition += ' AND kind = ?'
+                params.append(kind)
+
+            # 원재료 LOT은 투입 건마다 행이 있으므로 여유 있게 가져와서 중복 제거
+            cursor.execute(f'''
+                SELECT kind, ref_id, lot, name FROM {source}
+                WHERE {condition}
+                ORDER BY (lot = ?) DESC, (lot LIKE ? ESCAPE '\\') DESC, {tie_break}
+                LIMIT ?
+            ''', params + [q, like_pattern(q, prefix_only=True), limit * 5])
+
+            results = []
+            seen = {}
+            for row in cursor.fetchall():
+                key = (row['kind'], row['lot'], row['name'])
+                if key in seen:
+                    seen[key]['count'] += 1
+                    continue
+                if len(results) >= limit:
+                    continue
+                entry = {'kind': row['kind'], 'ref_id': row['ref_id'], 'lot': row['lot'], 'name': row['name'], 'count': 1}
+                seen[key] = entry
+                results.append(entry)
+
+            # 종류별 부가 정보 (상태/판정, 보관된 LOT 포함)
+            batch_ids = [r['ref_id'] for r in results if r['kind'] == 'batch']
+            if batch_ids:
+                cursor.execute(f'''
+                    SELECT id, status, start_time FROM {archive.history_table(conn, 'blending_work')}
+                    WHERE id IN ({','.join('?' * len(batch_ids))})
+                ''', batch_ids)
+                details = {row['id']: row for row in cursor.fetchall()}
+                for r in results:
+                    if r['kind'] == 'batch' and r['ref_id'] in details:
+                        r['status'] = details[r['ref_id']]['status']
+                        r['time'] = to_kst_str(details[r['ref_id']]['start_time'])
+
+            inspection_ids = [r['ref_id'] for r in results if r['kind'] == 'inspection']
+            if inspection_ids:
+                cursor.execute(f'''
+                    SELECT id, category, final_result, inspection_time FROM {archive.history_table(conn, 'inspection_result')}
+                    WHERE id IN ({','.join('?' * len(inspection_ids))})
+                ''', inspection_ids)
+                details = {row['id']: row for row in cursor.fetchall()}
+                for r in results:
+                    if r['kind'] == 'inspection' and r['ref_id'] in details:
+                        r['category'] = details[r['ref_id']]['category']
+                        r['final_result'] = details[r['ref_id']]['final_result']
+                        r['time'] = to_kst_str(details[r['ref_id']]['inspection_time'])
+
+            return jsonify({'success': True, 'query': q, 'data': results})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # 배합작업지시서 (Blending Order) API
 # ============================================
@@ -2828,6 +3185,58 @@ def create_blending_order():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+def query_blending_orders(cursor, status_filter='all'):
+    """배합작업지시서 목록과 진도율 (작업 집계는 한 번의 쿼리)
+
+    진도율이 100%인데 아직 완료 상태가 아닌 지시서는 status를 'completed'로 표시하고
+    autoComplete 플래그를 붙입니다 (저장은 호출자가 담당).
+    완료 중량은 archive.db로 옮겨진 완료 작업까지 포함합니다.
+    """
+    work_table = archive.history_table(cursor.connection, 'blending_work')
+    where = '' if status_filter == 'all' else 'WHERE o.status = ?'
+    params = () if status_filter == 'all' else (status_filter,)
+    cursor.execute(f'''
+        SELECT o.*,
+               COALESCE(SUM(CASE WHEN w.status = 'completed' THEN w.target_total_weight END), 0) AS completed_weight,
+               COALESCE(SUM(w.status = 'in_progress'), 0) AS in_progress_count,
+               COALESCE(SUM(w.status = 'completed'), 0) AS completed_count
+        FROM blending_order o
+        LEFT JOIN {work_table} w ON w.work_order_id = o.id
+        {where}
+        GROUP BY o.id
+        ORDER BY o.created_date DESC, o.id DESC
+    ''', params)
+
+    orders = []
+    for row in cursor.fetchall():
+        order = dict(row)
+        total_target_weight = order['total_target_weight'] or 0
+
+        if total_target_weight > 0:
+            progress_percent = (order['completed_weight'] / total_target_weight) * 100
+        else:
+            progress_percent = 0
+        order['progress_percent'] = round(progress_percent, 1)
+
+        # 진도율 100%면 완료
+        if progress_percent >= 100 and order['status'] != 'completed':
+            order['status'] = 'completed'
+            order['autoComplete'] = True
+
+        orders.append(order)
+    return orders
+
+def save_auto_completed_orders(conn, orders):
+    """query_blending_orders가 autoComplete로 표시한 지시서를 완료 상태로 저장 (플래그는 제거)"""
+    completed_ids = [(order['id'],) for order in orders if order.pop('autoComplete', False)]
+    if completed_ids:
+        conn.executemany('''
+            UPDATE blending_order
+            SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', completed_ids)
+        conn.commit()
+
 @app.route('/api/blending-orders', methods=['GET'])
 def get_blending_orders():
     """배합작업지시서 목록 조회"""
@@ -2836,70 +3245,8 @@ def get_blending_orders():
 
         with closing(get_db()) as conn:
             cursor = conn.cursor()
-
-            if status_filter == 'all':
-                cursor.execute('''
-                    SELECT * FROM blending_order
-                    ORDER BY created_date DESC, id DESC
-                ''')
-            else:
-                cursor.execute('''
-                    SELECT * FROM blending_order
-                    WHERE status = ?
-                    ORDER BY created_date DESC, id DESC
-                ''', (status_filter,))
-
-            rows = cursor.fetchall()
-            orders = []
-
-            for row in rows:
-                order = dict(row)
-
-                # 진도율 계산
-                cursor.execute('''
-                    SELECT COALESCE(SUM(target_total_weight), 0)
-                    FROM blending_work
-                    WHERE work_order_id = ? AND status = 'completed'
-                ''', (order['id'],))
-
-                completed_weight = cursor.fetchone()[0]
-                total_target_weight = order['total_target_weight']
-
-                if total_target_weight > 0:
-                    progress_percent = (completed_weight / total_target_weight) * 100
-                else:
-                    progress_percent = 0
-
-                order['completed_weight'] = completed_weight
-                order['progress_percent'] = round(progress_percent, 1)
-
-                # 진행 중인 배합 작업 수
-                cursor.execute('''
-                    SELECT COUNT(*) FROM blending_work
-                    WHERE work_order_id = ? AND status = 'in_progress'
-                ''', (order['id'],))
-
-                order['in_progress_count'] = cursor.fetchone()[0]
-
-                # 완료된 배합 작업 수
-                cursor.execute('''
-                    SELECT COUNT(*) FROM blending_work
-                    WHERE work_order_id = ? AND status = 'completed'
-                ''', (order['id'],))
-
-                order['completed_count'] = cursor.fetchone()[0]
-
-                # 자동으로 상태 업데이트 (진도율 100%면 완료)
-                if progress_percent >= 100 and order['status'] != 'completed':
-                    cursor.execute('''
-                        UPDATE blending_order
-                        SET status = 'completed', updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (order['id'],))
-                    conn.commit()
-                    order['status'] = 'completed'
-
-                orders.append(order)
+            orders = query_blending_orders(cursor, status_filter)
+            save_auto_completed_orders(conn, orders)
 
             return jsonify({
                 'success': True,
@@ -2924,10 +3271,11 @@ def get_blending_order(order_id):
 
             order = dict(row)
 
-            # 진도율 계산
-            cursor.execute('''
+            # 진도율 계산 (보관된 완료 작업 포함)
+            work_table = archive.history_table(conn, 'blending_work')
+            cursor.execute(f'''
                 SELECT COALESCE(SUM(target_total_weight), 0)
-                FROM blending_work
+                FROM {work_table}
                 WHERE work_order_id = ? AND status = 'completed'
             ''', (order_id,))
 
@@ -2943,8 +3291,8 @@ def get_blending_order(order_id):
             order['progress_percent'] = round(progress_percent, 1)
 
             # 연관된 배합 작업 목록
-            cursor.execute('''
-                SELECT * FROM blending_work
+            cursor.execute(f'''
+                SELECT * FROM {work_table}
                 WHERE work_order_id = ?
                 ORDER BY start_time DESC
             ''', (order_id,))
@@ -2967,8 +3315,9 @@ def delete_blending_order(order_id):
         with closing(get_db()) as conn:
             cursor = conn.cursor()
 
-            # 연관된 배합작업이 있는지 확인
-            cursor.execute('SELECT COUNT(*) FROM blending_work WHERE work_order_id = ?', (order_id,))
+            # 연관된 배합작업이 있는지 확인 (보관된 작업 포함)
+            work_table = archive.history_table(conn, 'blending_work')
+            cursor.execute(f'SELECT COUNT(*) FROM {work_table} WHERE work_order_id = ?', (order_id,))
             cnt = cursor.fetchone()[0]
             if cnt > 0:
                 return jsonify({'success': False, 'message': '연관된 배합작업이 있어 삭제할 수 없습니다. 관련 작업을 먼저 삭제하세요.'})
@@ -2996,10 +3345,11 @@ def get_blending_order_progress(order_id):
 
             total_target_weight = row[0]
 
-            # 완료된 중량 합계
-            cursor.execute('''
+            # 완료된 중량 합계 (보관된 완료 작업 포함)
+            work_table = archive.history_table(conn, 'blending_work')
+            cursor.execute(f'''
                 SELECT COALESCE(SUM(target_total_weight), 0)
-                FROM blending_work
+                FROM {work_table}
                 WHERE work_order_id = ? AND status = 'completed'
             ''', (order_id,))
 
@@ -3025,6 +3375,476 @@ def get_blending_order_progress(order_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+# ============================================
+# API: 통계적 공정관리 (SPC)
+# ============================================
+
+@app.route('/api/analytics/spc', methods=['GET'])
+def get_spc_analysis():
+    """분말/항목별 X̄-R 관리도 및 공정능력지수(Cp/Cpk) 조회
+
+    Query:
+        powder_name: 분말명 (필수)
+        item: 검사 항목명 (필수, 예: FlowRate, CContent, ParticleSize180)
+        category, dateFrom, dateTo: 선택 필터
+        limit: 최근 N개 LOT만 사용 (선택)
+    """
+    try:
+        powder_name = request.args.get('powder_name', '')
+        item_name = request.args.get('item', '')
+        category = request.args.get('category', '')
+        date_from = request.args.get('dateFrom', '')
+        date_to = request.args.get('dateTo', '')
+        limit = request.args.get('limit', type=int)
+
+        if not powder_name or not item_name:
+            return jsonify({'success': False, 'message': '분말명과 검사 항목을 입력하세요.'})
+
+        columns = spc.replicate_columns(item_name)
+        if not columns:
+            return jsonify({'success': False, 'message': f'SPC를 지원하지 않는 항목입니다: {item_name}'})
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+
+            # 측정값을 한 번의 쿼리로 조회
+            query = f'''
+                SELECT lot_number, inspection_time, {', '.join(columns)}
+                FROM inspection_result
+                WHERE powder_name = ? AND final_result IN ('PASS', 'FAIL')
+            '''
+            params = [powder_name]
+
+            if category:
+                query += ' AND category = ?'
+                params.append(category)
+
+            if date_from:
+                query += ' AND inspection_time >= ?'
+                params.append(date_from + ' 00:00:00')
+
+            if date_to:
+                query += ' AND inspection_time <= ?'
+                params.append(date_to + ' 23:59:59')
+
+            if limit:
+                # 최근 N개를 가져온 뒤 시간 순으로 다시 정렬
+                query = f'SELECT * FROM ({query} ORDER BY inspection_time DESC LIMIT ?) ORDER BY inspection_time'
+                params.append(limit)
+            else:
+                query += ' ORDER BY inspection_time'
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+            if not rows:
+                return jsonify({'success': False, 'message': '분석할 검사 결과가 없습니다.'})
+
+            lots = [row[0] for row in rows]
+            times = [row[1] for row in rows]
+
+            # 규격 한계: LOT별로 검사 시각에 적용되던 규격 버전,
+            # 공정능력지수는 조회 구간의 마지막 검사에 적용되던 규격 기준
+            versions, version_idx = spec_index.lookup_many(conn, powder_name, times)
+            current = spec_version_at(conn, powder_name, times[-1])
+            lsl, usl = spc.spec_limits(current, item_name)
+            point_limits = [spc.spec_limits(versions[i], item_name) if i >= 0 else (lsl, usl) for i in version_idx]
+            spec_version = current.get('id') if current else None
+
+        values = np.array([tuple(row)[2:] for row in rows], dtype=float)
+
+        chart = spc.compute_xbar_r(values)
+        if chart is None:
+            return jsonify({'success': False, 'message': '해당 항목의 측정값이 없습니다.'})
+
+        valid_idx = np.flatnonzero(chart['valid_mask'])
+        capability = spc.compute_capability(values[chart['valid_mask']], lsl, usl, chart['sigma_within'])
+
+        ooc = chart['x_out'] | chart['r_out'] | chart['run']
+
+        return jsonify({
+            'success': True,
+            'powder_name': powder_name,
+            'item': item_name,
+            'spec': {'lsl': lsl, 'usl': usl, 'version_id': spec_version},
+            'subgroup_count': int(valid_idx.size),
+            'limits': {
+                'x_center': chart['center'],
+                'r_bar': float(np.nanmean(chart['range'])) if np.any(chart['n'] >= 2) else None,
+                'sigma_within': chart['sigma_within'] if np.isfinite(chart['sigma_within']) else None,
+            },
+            'capability': capability,
+            'points': {
+                'lot_number': [lots[i] for i in valid_idx],
+                'inspection_time': [to_kst_str(times[i]) for i in valid_idx],
+                'n': spc.to_json_list(chart['n']),
+                'xbar': spc.to_json_list(chart['xbar']),
+                'range': spc.to_json_list(chart['range']),
+                'x_ucl': spc.to_json_list(chart['x_ucl']),
+                'x_lcl': spc.to_json_list(chart['x_lcl']),
+                'r_center': spc.to_json_list(chart['r_center']),
+                'r_ucl': spc.to_json_list(chart['r_ucl']),
+                'r_lcl': spc.to_json_list(chart['r_lcl']),
+                'lsl': [point_limits[i][0] for i in valid_idx],
+                'usl': [point_limits[i][1] for i in valid_idx],
+            },
+            'out_of_control': {
+                'count': int(np.count_nonzero(ooc)),
+                'lot_number': [lots[i] for i in valid_idx[ooc]],
+                'x_beyond_limits': spc.to_json_list(np.flatnonzero(chart['x_out'])),
+                'r_beyond_limits': spc.to_json_list(np.flatnonzero(chart['r_out'])),
+                'run_of_7': spc.to_json_list(np.flatnonzero(chart['run'])),
+            }
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/analytics/daily-rollup', methods=['GET'])
+def get_daily_rollup():
+    """기간별 품질 집계 조회 (집계 테이블만 읽음)
+
+    Query:
+        dateFrom, dateTo: KST 기준 일자 범위 (YYYY-MM-DD)
+        powder_name, category: 선택 필터
+    """
+    try:
+        date_from = request.args.get('dateFrom', '')
+        date_to = request.args.get('dateTo', '')
+        powder_name = request.args.get('powder_name', '')
+        category = request.args.get('category', '')
+
+        where_clauses = []
+        params = []
+
+        if date_from:
+            where_clauses.append('day >= ?')
+            params.append(date_from)
+
+        if date_to:
+            where_clauses.append('day <= ?')
+            params.append(date_to)
+
+        if powder_name:
+            where_clauses.append('powder_name = ?')
+            params.append(powder_name)
+
+        if category:
+            where_clauses.append('category = ?')
+            params.append(category)
+
+        where_sql = (' WHERE ' + ' AND '.join(where_clauses)) if where_clauses else ''
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f'''
+                SELECT day, powder_name, category, lot_count, pass_count, fail_count
+                FROM daily_quality_rollup{where_sql}
+                ORDER BY day, powder_name, category
+            ''', params)
+            days = [dict_from_row(row) for row in cursor.fetchall()]
+
+            cursor.execute(f'''
+                SELECT powder_name, category, item,
+                       SUM(sample_count) AS sample_count,
+                       SUM(value_sum) / SUM(sample_count) AS average,
+                       MIN(value_min) AS min,
+                       MAX(value_max) AS max
+                FROM daily_item_rollup{where_sql}
+                GROUP BY powder_name, category, item
+                ORDER BY powder_name, category, item
+            ''', params)
+            items = [dict_from_row(row) for row in cursor.fetchall()]
+
+        for d in days:
+            d['pass_rate'] = round(d['pass_count'] / d['lot_count'] * 100, 1) if d['lot_count'] else None
+
+        lot_count = sum(d['lot_count'] for d in days)
+        pass_count = sum(d['pass_count'] for d in days)
+
+        return jsonify({
+            'success': True,
+            'summary': {
+                'lot_count': lot_count,
+                'pass_count': pass_count,
+                'fail_count': lot_count - pass_count,
+                'pass_rate': round(pass_count / lot_count * 100, 1) if lot_count else None
+            },
+            'days': days,
+            'items': items
+        })
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# 관리자 API: 백업
+# ============================================
+
+@app.route('/api/admin/backup', methods=['GET'])
+def admin_get_backup_status():
+    """온라인 백업 상태 조회 (마지막 성공 시각, 보관 중인 백업 목록)"""
+    try:
+        return jsonify({'success': True, 'data': backup_scheduler.status()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/admin/backup', methods=['POST'])
+def admin_run_backup():
+    """즉시 백업 실행 요청 (백그라운드에서 실행)"""
+    try:
+        if backup_scheduler.running:
+            return jsonify({'success': False, 'message': '백업이 이미 진행 중입니다.'})
+
+        backup_scheduler.trigger()
+        return jsonify({'success': True, 'message': '백업을 시작했습니다.'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# 관리자 API: 데이터베이스 유지보수
+# ============================================
+
+@app.route('/api/admin/maintenance', methods=['GET'])
+def admin_get_maintenance_status():
+    """WAL 크기, checkpoint 지연, 페이지 통계 및 마지막 유지보수 시각 조회"""
+    try:
+        return jsonify({'success': True, 'data': maintenance_scheduler.status()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/admin/maintenance', methods=['POST'])
+def admin_run_maintenance():
+    """유지보수 작업 즉시 실행 (action: checkpoint, truncate, optimize, analyze)"""
+    try:
+        data = request.json or {}
+        action = data.get('action', 'checkpoint')
+
+        if action == 'checkpoint':
+            result = maintenance_scheduler.run_checkpoint('PASSIVE')
+        elif action == 'truncate':
+            result = maintenance_scheduler.run_checkpoint('TRUNCATE')
+        elif action == 'optimize':
+            result = maintenance_scheduler.run_optimize()
+        elif action == 'analyze':
+            result = maintenance_scheduler.run_analyze()
+        else:
+            return jsonify({'success': False, 'message': f'알 수 없는 작업입니다: {action}'})
+
+        return jsonify({'success': True, 'action': action, 'result': result})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/admin/lot-locks', methods=['GET'])
+def admin_get_lot_lock_status():
+    """LOT 저장 잠금 대기 통계 (획득/대기 횟수, 대기 시간, 대기가 많았던 stripe)"""
+    try:
+        return jsonify({'success': True, 'data': lot_locks.status()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# API: 초기 데이터 일괄 조회
+# ============================================
+
+# include 항목 -> 조회 함수 (각 값은 개별 API의 data와 같은 형식)
+BOOTSTRAP_SECTIONS = {
+    'powders': lambda cursor: [
+        {'powder_name': row[0], 'category': row[1]}
+        for row in cursor.execute('SELECT powder_name, category FROM powder_spec ORDER BY powder_name').fetchall()
+    ],
+    'inspectors': query_inspector_list,
+    'operators': query_operator_list,
+    'products': query_blending_products,
+    'incompleteInspections': query_incomplete_inspections,
+    'inProgressOrders': lambda cursor: query_blending_orders(cursor, 'in_progress'),
+}
+
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """화면 시작에 필요한 기준 정보/진행 현황을 한 번에 조회 (연결 1개, 읽기 트랜잭션 1개)
+
+    Query:
+        include: 쉼표 구분 항목 (powders, inspectors, operators, products,
+                 incompleteInspections, inProgressOrders / 없으면 전체)
+
+    powders는 분류별 목록을 만들 수 있도록 [{powder_name, category}] 형식입니다.
+    기준 정보 버전(versions)은 항상 포함합니다.
+    """
+    try:
+        include = request.args.get('include')
+        sections = [s.strip() for s in include.split(',') if s.strip()] if include else list(BOOTSTRAP_SECTIONS)
+        unknown = [s for s in sections if s not in BOOTSTRAP_SECTIONS]
+        if unknown:
+            return jsonify({'success': False, 'message': f'알 수 없는 항목입니다: {", ".join(unknown)}'})
+
+        with closing(get_db()) as conn:
+            cursor = conn.cursor()
+            # 보관 DB ATTACH는 트랜잭션 안에서 할 수 없으므로 먼저 연결 (지시서 진도율의 보관된 완료 작업)
+            if 'inProgressOrders' in sections:
+                archive.history_table(conn, 'blending_work')
+            # 모든 항목을 같은 시점의 데이터로 읽음
+            cursor.execute('BEGIN')
+            try:
+                data = {'versions': query_ref_versions(cursor)}
+                for section in sections:
+                    data[section] = BOOTSTRAP_SECTIONS[section](cursor)
+            finally:
+                conn.rollback()
+
+            # 진도율 100% 지시서의 자동 완료는 읽기 트랜잭션이 끝난 뒤 저장 (/api/blending-orders와 동일)
+            if 'inProgressOrders' in data:
+                save_auto_completed_orders(conn, data['inProgressOrders'])
+
+        return jsonify({'success': True, 'data': data})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# API: 백그라운드 작업
+# ============================================
+
+def submit_rejudge_job(powder_name):
+    """분말 규격 변경 후 재판정 작업 등록 (같은 분말의 대기 중 작업은 합침)"""
+    return job_manager.submit(
+        'rejudge', rejudge.run_rejudge_job, DATABASE, powder_name,
+        params={'powder_name': powder_name}, key=('rejudge', powder_name), pool='process'
+    )
+
+def rejudge_after_spec_change(powder_name):
+    """규격 저장(이미 커밋됨) 후 재판정 작업 등록
+
+    작업 등록이 실패해도 규격 변경은 저장되었으므로 오류는 응답의 rejudge_error로만 알립니다.
+
+    Returns:
+        dict: {'jobId': 작업 ID} 또는 {'rejudge_error': 오류 메시지}
+    """
+    try:
+        return {'jobId': submit_rejudge_job(powder_name).id}
+    except Exception as e:
+        print(f"[재판정] {powder_name} 작업 등록 실패: {e}")
+        return {'rejudge_error': str(e)}
+
+@app.route('/api/jobs', methods=['GET'])
+def get_jobs():
+    """최근 작업 목록"""
+    return jsonify({'success': True, 'data': job_manager.list()})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """작업 상태/진행률/결과 조회"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'})
+    return jsonify({'success': True, 'data': job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """작업 취소 요청 (실행 중인 작업은 다음 진행률 보고 시점에 중단, 이미 커밋된 묶음은 유지)"""
+    job = job_manager.cancel(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'})
+    return jsonify({'success': True, 'data': job.to_dict(include_result=False)})
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_job_result(job_id):
+    """완료된 작업 결과 다운로드 (결과 파일이 있으면 파일, 없으면 결과 JSON)"""
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'})
+    if job.status != 'done':
+        return jsonify({'success': False, 'message': '완료된 작업만 다운로드할 수 있습니다.'})
+
+    if job.result_file and os.path.exists(job.result_file):
+        return send_file(os.path.abspath(job.result_file), as_attachment=True,
+                         download_name=os.path.basename(job.result_file))
+
+    body = json.dumps(job.result, ensure_ascii=False, indent=2, default=str)
+    return app.response_class(body, mimetype='application/json', headers={
+        'Content-Disposition': f'attachment; filename={job.kind}_{job.id}.json'
+    })
+
+# ============================================
+# API: 측정 장비 CSV 가져오기
+# ============================================
+
+@app.route('/api/import/inspections', methods=['POST'])
+def import_inspections():
+    """장비 CSV 업로드 후 백그라운드 가져오기 (진행률/결과/오류 행은 /api/jobs/<id>로 확인)
+
+    form-data:
+        file: CSV 파일
+        mapping: 헤더 매핑 JSON (선택, {"장비 헤더": "표준 컬럼명"})
+    """
+    try:
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({'success': False, 'message': 'CSV 파일을 선택하세요.'})
+
+        mapping = json.loads(request.form['mapping']) if request.form.get('mapping') else None
+
+        # 업로드 파일은 임시 파일로 저장 후 작업이 끝나면 삭제
+        fd, path = tempfile.mkstemp(suffix='.csv', prefix='import_')
+        with os.fdopen(fd, 'wb') as f:
+            upload.save(f)
+
+        job = job_manager.submit(
+            'import', importer.run_import_job, DATABASE, path, mapping, spec_index,
+            filename=upload.filename, remove=True, lot_locks=lot_locks,
+            params={'file': upload.filename}
+        )
+        return jsonify({'success': True, 'jobId': job.id})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/admin/import-watcher', methods=['GET'])
+def admin_get_import_watcher_status():
+    """투입 폴더 감시 상태와 최근 처리 파일 기록 조회"""
+    try:
+        return jsonify({'success': True, 'data': drop_watcher.status()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/admin/import-watcher', methods=['POST'])
+def admin_scan_import_folder():
+    """투입 폴더 즉시 확인 (대기 시간 없이 바로 가져오므로 복사 중인 파일이 없을 때 사용)"""
+    try:
+        submitted = drop_watcher.scan(debounce=0)
+        return jsonify({'success': True, 'files': [os.path.basename(p) for p in submitted]})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+# ============================================
+# API: 계산값 일괄 재계산 (관리자)
+# ============================================
+
+@app.route('/api/admin/recompute', methods=['POST'])
+def admin_recompute_derived():
+    """무게 기반 항목 계산값 재계산 작업 등록 (기본은 차이 보고만, apply: true 시 갱신)
+
+    보고서는 /api/jobs/<id>, 전체 차이 목록 CSV는 /api/jobs/<id>/download로 확인합니다.
+    """
+    try:
+        data = request.json or {}
+        apply = bool(data.get('apply', False))
+        items = data.get('items') or formulas.WEIGHT_ITEMS
+
+        unknown = [i for i in items if i not in formulas.WEIGHT_ITEMS]
+        if unknown:
+            return jsonify({'success': False, 'message': f'재계산할 수 없는 항목입니다: {", ".join(unknown)}'})
+        # 같은 요청끼리 합쳐지도록 항목 순서/중복 정규화
+        items = [i for i in formulas.WEIGHT_ITEMS if i in items]
+
+        job = job_manager.submit(
+            'recompute', recompute.run_recompute_job, DATABASE, items, apply,
+            params={'items': items, 'apply': apply}, key=('recompute',), pool='process'
+        )
+        return jsonify({'success': True, 'jobId': job.id})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 # ============================================
 # 서버 실행
 # ============================================
@@ -3038,4 +3858,10 @@ if __name__ == '__main__':
     print("종료: Ctrl+C")
     print("=" * 50)
 
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    ensure_schema()
+
+    # debug 모드에서는 reloader 감시 프로세스가 아닌 실제 서버 프로세스에서만 시작
+    if not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+
+    app.run(host='0.0.0.0', port=5000, debug=DEBUG)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 오래된 데이터 보관(archive)
+기준 기간보다 오래된 검사 결과(측정값 포함)와 완료된 배합 작업(원재료 투입 포함)을
+archive.db로 옮겨 운영 데이터베이스를 작게 유지합니다.
+
+조회/상세/추적성 API는 history_table()을 통해 보관 데이터까지 투명하게 조회합니다.
+
+사용법:
+    python archive.py --days 365            # 365일 이전 데이터 보관
+    python archive.py --days 365 --dry-run  # 대상 건수만 확인
+    python archive.py --days 365 --vacuum   # 보관 후 운영 DB 파일 크기 축소
+"""
+
+import argparse
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+from migrate_db import LOT_SEARCH_SOURCES, apply_migrations
+
+DB_PATH = 'database.db'
+ARCHIVE_DB = 'archive.db'
+ARCHIVE_SCHEMA = 'archive'
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_BATCH_SIZE = 500
+
+# 검사 결과와 함께 옮기는 측정값 테이블 (result_id로 연결)
+RESULT_CHILD_TABLES = ('measurement', 'measurement_summary')
+
+# 보관 대상 테이블 (history_table로 조회 가능)
+ARCHIVE_TABLES = ('inspection_result', 'blending_work', 'material_input') + RESULT_CHILD_TABLES
+
+# lot_search FTS 인덱스 재등록용: 테이블 -> (종류, rowid 코드, LOT 컬럼, 이름 컬럼)
+_LOT_SEARCH = {
+    table: (kind, code, lot_col, name_col)
+    for kind, (code, table, lot_col, name_col) in LOT_SEARCH_SOURCES.items()
+}
+
+
+def archive_path_for(db_path):
+    """운영 DB와 같은 폴더의 archive.db 경로"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DB)
+
+
+def _main_db_path(conn):
+    for _, name, path in conn.execute('PRAGMA database_list'):
+        if name == 'main':
+            return path
+    return DB_PATH
+
+
+def _is_attached(conn):
+    return any(row[1] == ARCHIVE_SCHEMA for row in conn.execute('PRAGMA database_list'))
+
+
+def _columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def _sync_archive_schema(conn):
+    """archive 테이블 생성 및 운영 테이블에 추가된 컬럼 반영"""
+    for table in ARCHIVE_TABLES:
+        archive_columns = _columns(conn, ARCHIVE_SCHEMA, table)
+        if not archive_columns:
+            row = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+            ddl = row[0].replace(f'CREATE TABLE {table}', f'CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{table}', 1)
+            conn.execute(ddl)
+            continue
+
+        # ALTER TABLE ADD COLUMN은 기본값/제약 없이 타입만 복사
+        for cid, name, col_type, *_ in conn.execute(f'PRAGMA main.table_info({table})'):
+            if name not in archive_columns:
+                conn.execute(f'ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {col_type}')
+
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_result_lot ON inspection_result(lot_number, powder_name)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_result_time ON inspection_result(inspection_time)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_batch_lot ON blending_work(batch_lot)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_input_work ON material_input(blending_work_id)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_input_lot ON material_input(material_lot)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_measurement_item ON measurement(item, result_id)')
+
+
+def attach(conn, archive_path=None, create=False):
+    """archive.db를 ATTACH하고 운영+보관 UNION 임시 뷰(all_<테이블>) 생성
+
+    Returns:
+        bool: 보관 DB가 연결되었는지 여부 (파일이 없고 create=False이면 False)
+    """
+    if _is_attached(conn):
+        return True
+
+    archive_path = archive_path or archive_path_for(_main_db_path(conn))
+    if not create and not os.path.exists(archive_path):
+        return False
+
+    conn.execute(f'ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}', (archive_path,))
+    conn.execute(f'PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL')
+    _sync_archive_schema(conn)
+
+    for table in ARCHIVE_TABLES:
+        column_list = ', '.join(_columns(conn, 'main', table))
+        conn.execute(f'DROP VIEW IF EXISTS temp.all_{table}')
+        conn.execute(f'''
+            CREATE TEMP VIEW all_{table} AS
+            SELECT {column_list} FROM main.{table}
+            UNION ALL
+            SELECT {column_list} FROM {ARCHIVE_SCHEMA}.{table}
+        ''')
+    return True
+
+
+def archived_before(conn, table):
+    """테이블의 보관 기준 시각 (보관 이력이 없으면 None)"""
+    row = conn.execute('SELECT archived_before FROM archive_state WHERE table_name = ?', (table,)).fetchone()
+    return row[0] if row else None
+
+
+def history_table(conn, table, date_from=None):
+    """조회에 사용할 테이블명 반환
+
+    보관된 데이터가 조회 범위에 포함될 수 있으면 archive.db를 연결하고 UNION 뷰 이름을,
+    그렇지 않으면(보관 이력 없음, 또는 date_from이 보관 기준 이후) 운영 테이블명을 반환합니다.
+    """
+    cutoff = archived_before(conn, table)
+    if cutoff is None:
+        return table
+    if date_from and date_from >= cutoff:
+        return table
+    return f'all_{table}' if attach(conn) else table
+
+
+def _copy_batch(conn, table, id_sql, params, ids_table='archive_ids'):
+    """id_sql이 반환하는 id들의 행을 보관 DB로 복사 (복사한 행 수 반환, id 목록은 temp.<ids_table>)"""
+    conn.execute(f'DROP TABLE IF EXISTS temp.{ids_table}')
+    conn.execute(f'CREATE TEMP TABLE {ids_table} AS {id_sql}', params)
+    count = conn.execute(f'SELECT COUNT(*) FROM temp.{ids_table}').fetchone()[0]
+    if not count:
+        return 0
+
+    column_list = ', '.join(_columns(conn, 'main', table))
+    conn.execute(f'''
+        INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({column_list})
+        SELECT {column_list} FROM main.{table} WHERE id IN (SELECT id FROM temp.{ids_table})
+    ''')
+    return count
+
+
+def _delete_batch(conn, table, ids_table='archive_ids'):
+    """보관 DB로 복사한 행을 운영 DB에서 삭제"""
+    conn.execute(f'DELETE FROM main.{table} WHERE id IN (SELECT id FROM temp.{ids_table})')
+
+    # 삭제 트리거로 빠진 LOT 검색 항목을 다시 등록하여 보관 데이터도 검색되도록 유지
+    has_lot_search = conn.execute("SELECT 1 FROM main.sqlite_master WHERE name = 'lot_search'").fetchone()
+    if has_lot_search:
+        kind, code, lot_col, name_col = _LOT_SEARCH[table]
+        conn.execute(f'''
+            INSERT OR REPLACE INTO main.lot_search (rowid, kind, ref_id, lot, name)
+            SELECT id * 4 + {code}, '{kind}', id, {lot_col}, {name_col}
+            FROM {ARCHIVE_SCHEMA}.{table} WHERE id IN (SELECT id FROM temp.{ids_table})
+        ''')
+
+
+def _copy_result_children(conn, ids_table='archive_ids'):
+    """보관 DB로 복사한 검사 결과의 측정값 복사 (테이블별 복사한 행 수 반환)
+
+    운영 DB의 측정값은 검사 결과 삭제 트리거(trg_measurement_inspection_result_ad)가 삭제하므로
+    검사 결과를 삭제하기 전에 복사합니다.
+    """
+    counts = {}
+    for table in RESULT_CHILD_TABLES:
+        column_list = ', '.join(_columns(conn, 'main', table))
+        cursor = conn.execute(f'''
+            INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({column_list})
+            SELECT {column_list} FROM main.{table} WHERE result_id IN (SELECT id FROM temp.{ids_table})
+        ''')
+        counts[table] = cursor.rowcount
+    return counts
+
+
+def _move_batch(conn, table, id_sql, params):
+    """id_sql이 반환하는 id들의 행을 보관 DB로 이동 (이동한 행 수 반환)"""
+    count = _copy_batch(conn, table, id_sql, params)
+    if count:
+        _delete_batch(conn, table)
+    return count
+
+
+def _record_state(conn, table, cutoff, moved):
+    conn.execute('''
+        INSERT INTO archive_state (table_name, archived_before, row_count, last_run)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(table_name) DO UPDATE SET
+            archived_before = MAX(archived_before, excluded.archived_before),
+            row_count = row_count + excluded.row_count,
+            last_run = CURRENT_TIMESTAMP
+    ''', (table, cutoff, moved))
+
+
+# 보관 대상 조건
+_BLENDING_IDS = '''
+    SELECT id FROM main.blending_work
+    WHERE status = 'completed' AND end_time < ?
+    ORDER BY id LIMIT ?
+'''
+
+
+def _movable_result(alias):
+    """검사 결과 행을 보관할 수 있는 조건 (?1: 기준 시각)"""
+    # 운영 DB에 남겨 둘 검사 결과 (LOT 검증/추적/선입선출 추천이 운영 DB만으로 처리되도록)
+    #   - 재고가 남은 합격 수입검사 LOT (입고 수량 미입력 포함, /api/lot-recommendation과 같은 조건)
+    #   - 운영 DB에 남은 원재료 투입이 사용 중인 LOT (복수 LOT 투입은 material_input_lot의 LOT별 행으로 비교)
+    return f'''
+        {alias}.inspection_time < ?1 AND {alias}.final_result IN ('PASS', 'FAIL')
+        AND NOT ({alias}.category IS 'incoming' AND {alias}.final_result IS 'PASS' AND EXISTS (
+            SELECT 1 FROM main.lot_inventory i
+            WHERE i.powder_name = {alias}.powder_name AND i.lot_number = {alias}.lot_number
+              AND (i.received_qty IS NULL OR i.used_qty < i.received_qty)
+        ))
+        AND NOT EXISTS (
+            SELECT 1 FROM main.material_input_lot mil
+            JOIN main.material_input mi ON mi.id = mil.material_input_id
+            WHERE mil.lot_number = {alias}.lot_number AND mil.powder_name = {alias}.powder_name
+        )
+    '''
+
+
+# 일별 품질 집계(rollup.refresh_group)는 운영 DB만 다시 읽으므로,
+# (KST 일자, 분말, 구분) 집계 그룹의 모든 행을 보관할 수 있을 때만 그룹 전체를 옮김
+_INSPECTION_IDS = f'''
+    SELECT r.id FROM main.inspection_result r
+    WHERE {_movable_result('r')}
+      AND NOT EXISTS (
+          SELECT 1 FROM main.inspection_result g
+          WHERE g.powder_name = r.powder_name
+            AND date(g.inspection_time, '+9 hours') = date(r.inspection_time, '+9 hours')
+            AND COALESCE(g.category, 'incoming') = COALESCE(r.category, 'incoming')
+            AND NOT COALESCE(({_movable_result('g')}), 0)
+      )
+    ORDER BY r.id LIMIT ?2
+'''
+
+
+def count_candidates(conn, cutoff):
+    """보관 대상 건수 (배합 작업, 검사 결과)"""
+    works = conn.execute(_BLENDING_IDS.replace('ORDER BY id LIMIT ?', ''), (cutoff,)).fetchall()
+    results = conn.execute(_INSPECTION_IDS.replace('ORDER BY r.id LIMIT ?2', ''), (cutoff,)).fetchall()
+    return len(works), len(results)
+
+
+def archive_old_data(conn, horizon_days=DEFAULT_HORIZON_DAYS, batch_size=DEFAULT_BATCH_SIZE, archive_path=None):
+    """기준 기간보다 오래된 데이터를 배치 단위 트랜잭션으로 보관 DB로 이동
+
+    보관 DB와 운영 DB는 별도 파일이므로, 중간에 중단되면 같은 행이 양쪽에 남을 수 있습니다.
+    이 경우 다시 실행하면 INSERT OR REPLACE 후 삭제되므로 데이터는 유실되지 않습니다.
+
+    Returns:
+        dict: 테이블별 이동 행 수와 기준 시각
+    """
+    # 검사 시간은 UTC로 저장됨
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=horizon_days)).strftime('%Y-%m-%d %H:%M:%S')
+    attach(conn, archive_path, create=True)
+    conn.commit()
+
+    # 보관 DB의 테이블은 운영 DDL을 복사해 외래 키 참조 대상이 없으므로 보관 중에는 외래 키 검사를 끔
+    # (트랜잭션 밖에서만 변경 가능)
+    foreign_keys = conn.execute('PRAGMA foreign_keys').fetchone()[0]
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        moved = {table: 0 for table in ARCHIVE_TABLES}
+
+        # 1. 완료된 배합 작업 + 원재료 투입 (작업 단위로 함께 이동)
+        # 작업을 먼저 복사한 뒤 투입을 옮기고 마지막에 작업을 삭제
+        # (투입 삭제 트리거가 작업의 집계 컬럼을 줄이기 전에 복사)
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                count = _copy_batch(conn, 'blending_work', _BLENDING_IDS, (cutoff, batch_size), 'archive_works')
+                if count:
+                    moved['material_input'] += _move_batch(conn, 'material_input', '''
+                        SELECT id FROM main.material_input
+                        WHERE blending_work_id IN (SELECT id FROM temp.archive_works)
+                    ''', ())
+                    _delete_batch(conn, 'blending_work', 'archive_works')
+                moved['blending_work'] += count
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if count < batch_size:
+                break
+
+        # 2. 확정된 검사 결과 + 측정값 (측정값을 먼저 복사한 뒤 검사 결과 삭제)
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                count = _copy_batch(conn, 'inspection_result', _INSPECTION_IDS, (cutoff, batch_size))
+                if count:
+                    for table, child_count in _copy_result_children(conn).items():
+                        moved[table] += child_count
+                    _delete_batch(conn, 'inspection_result')
+                moved['inspection_result'] += count
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if count < batch_size:
+                break
+
+        for table, count in moved.items():
+            _record_state(conn, table, cutoff, count)
+        conn.commit()
+    finally:
+        conn.execute(f'PRAGMA foreign_keys = {foreign_keys}')
+
+    return {'cutoff': cutoff, 'moved': moved}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='오래된 검사/배합 데이터를 archive.db로 보관')
+    parser.add_argument('--days', type=int, default=DEFAULT_HORIZON_DAYS, help='보관 기준 일수 (기본 365일)')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_SIZE, help='트랜잭션당 이동 행 수')
+    parser.add_argument('--dry-run', action='store_true', help='대상 건수만 출력')
+    parser.add_argument('--vacuum', action='store_true', help='보관 후 VACUUM으로 운영 DB 크기 축소')
+    parser.add_argument('--db', default=DB_PATH, help='운영 데이터베이스 파일 경로')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 데이터베이스 파일이 없습니다: {args.db}")
+        return
+
+    # 트랜잭션은 직접 관리 (BEGIN IMMEDIATE)
+    with closing(sqlite3.connect(args.db, timeout=30.0, isolation_level=None)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+
+        apply_migrations(conn)
+
+        if args.dry_run:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=args.days)).strftime('%Y-%m-%d %H:%M:%S')
+            works, results = count_candidates(conn, cutoff)
+            print(f"기준 시각(UTC): {cutoff}")
+            print(f"  - 배합 작업: {works}건 (원재료 투입 포함)")
+            print(f"  - 검사 결과: {results}건")
+            return
+
+        result = archive_old_data(conn, args.days, args.batch)
+        print(f"✅ 보관 완료 (기준 시각 UTC {result['cutoff']})")
+        for table, count in result['moved'].items():
+            print(f"  - {table}: {count}건")
+
+        if args.vacuum:
+            conn.execute('DETACH DATABASE archive')
+            conn.execute('VACUUM')
+            print("  - VACUUM 완료")
+
+
+if __name__ == '__main__':
+    main()
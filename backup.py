@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 온라인 백업
+sqlite3 backup API로 서버 실행 중에도 안전하게 데이터베이스를 복사합니다.
+작은 페이지 단위로 나누어 복사하고 단계 사이에 잠시 쉬므로 쓰기 작업이 오래 막히지 않습니다.
+백업본은 PRAGMA integrity_check로 검증한 뒤 보관하며, 오래된 백업은 자동 삭제합니다.
+보관(archive.py)으로 옮겨진 이력이 있는 archive.db도 같은 방식으로 따로 백업/보관합니다.
+
+사용법:
+    python backup.py            # 즉시 1회 백업
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime
+
+import archive
+
+DB_PATH = 'database.db'
+BACKUP_DIR = 'backups'
+BACKUP_INTERVAL_HOURS = 6     # 자동 백업 주기
+BACKUP_KEEP = 14              # 보관할 백업 파일 수
+PAGES_PER_STEP = 256          # 한 번에 복사할 페이지 수
+STEP_SLEEP = 0.02             # 단계 사이 대기 시간(초)
+BACKUP_PREFIX = 'database_'
+ARCHIVE_BACKUP_PREFIX = 'archive_'
+
+
+def list_backups(backup_dir=BACKUP_DIR, prefix=BACKUP_PREFIX):
+    """백업 파일 목록 (오래된 순)"""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [n for n in os.listdir(backup_dir) if n.startswith(prefix) and n.endswith('.db')]
+    return sorted(os.path.join(backup_dir, n) for n in names)
+
+
+def rotate_backups(backup_dir=BACKUP_DIR, keep=BACKUP_KEEP, prefix=BACKUP_PREFIX):
+    """보관 개수를 초과한 오래된 백업 삭제"""
+    removed = []
+    backups = list_backups(backup_dir, prefix)
+    for path in backups[:max(0, len(backups) - keep)]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def run_backup(db_path=DB_PATH, backup_dir=BACKUP_DIR, pages=PAGES_PER_STEP, step_sleep=STEP_SLEEP, keep=BACKUP_KEEP):
+    """온라인 백업 1회 실행 (archive.db가 있으면 함께 백업)
+
+    운영 DB를 먼저 백업합니다. 두 백업 사이에 보관이 실행되어도 옮겨진 행은
+    운영 DB 백업에 남아 있으므로 어느 백업에도 없는 행이 생기지 않습니다.
+
+    Returns:
+        dict: 백업 파일 경로, 크기, 소요 시간, 페이지 수, archive(archive.db 백업 결과 또는 None)
+
+    Raises:
+        RuntimeError: 백업본 무결성 검사 실패
+    """
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    result = _backup_file(db_path, backup_dir, f'{BACKUP_PREFIX}{stamp}.db', pages, step_sleep)
+    result['removed'] = rotate_backups(backup_dir, keep)
+
+    result['archive'] = None
+    archive_path = archive.archive_path_for(db_path)
+    if os.path.exists(archive_path):
+        result['archive'] = _backup_file(archive_path, backup_dir, f'{ARCHIVE_BACKUP_PREFIX}{stamp}.db',
+                                         pages, step_sleep)
+        result['archive']['removed'] = rotate_backups(backup_dir, keep, ARCHIVE_BACKUP_PREFIX)
+
+    return result
+
+
+def _backup_file(db_path, backup_dir, filename, pages, step_sleep):
+    """DB 파일 1개를 backup API로 복사하고 무결성 검사 후 보관"""
+    os.makedirs(backup_dir, exist_ok=True)
+
+    final_path = os.path.join(backup_dir, filename)
+    temp_path = final_path + '.tmp'
+
+    started = time.monotonic()
+    total_pages = 0
+
+    def progress(status, remaining, total):
+        nonlocal total_pages
+        total_pages = total
+        # 단계 사이에 쓰기 작업이 끼어들 수 있도록 잠시 대기
+        if remaining and step_sleep:
+            time.sleep(step_sleep)
+
+    try:
+        with closing(sqlite3.connect(db_path, timeout=30.0)) as src, \
+                closing(sqlite3.connect(temp_path)) as dst:
+            src.execute('PRAGMA busy_timeout = 30000')
+            src.backup(dst, pages=pages, progress=progress)
+
+            # 백업본 무결성 검사
+            result = dst.execute('PRAGMA integrity_check').fetchone()[0]
+            if result != 'ok':
+                raise RuntimeError(f'백업 무결성 검사 실패: {result}')
+
+        os.replace(temp_path, final_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {
+        'file': final_path,
+        'size': os.path.getsize(final_path),
+        'pages': total_pages,
+        'duration': round(time.monotonic() - started, 3),
+    }
+
+
+class BackupScheduler:
+    """주기적 온라인 백업 스레드"""
+
+    def __init__(self, db_path=DB_PATH, backup_dir=BACKUP_DIR, interval_hours=BACKUP_INTERVAL_HOURS, keep=BACKUP_KEEP):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval_hours * 3600
+        self.keep = keep
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.running = False
+        self.last_started = None
+        self.last_success = None
+        self.last_error = None
+        self.last_result = None
+        self.next_run = None
+
+    def start(self):
+        """백업 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='backup-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def trigger(self):
+        """즉시 백업 요청 (스레드가 없으면 새 스레드에서 1회 실행)"""
+        if self._thread and self._thread.is_alive():
+            self._wake.set()
+        else:
+            threading.Thread(target=self.run_once, name='backup-once', daemon=True).start()
+
+    def run_once(self):
+        """백업 1회 실행 (동시에 두 번 실행되지 않음)"""
+        if not self._run_lock.acquire(blocking=False):
+            return None
+
+        try:
+            with self._lock:
+                self.running = True
+                self.last_started = datetime.now()
+
+            try:
+                result = run_backup(self.db_path, self.backup_dir, keep=self.keep)
+                with self._lock:
+                    self.last_success = datetime.now()
+                    self.last_result = result
+                    self.last_error = None
+                print(f"[백업] 완료: {result['file']} ({result['duration']}초)")
+                return result
+            except Exception as e:
+                with self._lock:
+                    self.last_error = f'{datetime.now().isoformat(timespec="seconds")} {e}'
+                print(f"[백업] 오류: {e}")
+                return None
+        finally:
+            with self._lock:
+                self.running = False
+            self._run_lock.release()
+
+    def _initial_delay(self):
+        """서버 재시작 시 마지막 백업 이후 경과 시간만큼 대기 시간을 줄임"""
+        backups = list_backups(self.backup_dir)
+        if not backups:
+            return 0
+        age = time.time() - os.path.getmtime(backups[-1])
+        return max(0, self.interval - age)
+
+    def _loop(self):
+        delay = self._initial_delay()
+        while not self._stop.is_set():
+            self.next_run = datetime.fromtimestamp(time.time() + delay)
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.run_once()
+            delay = self.interval
+
+    def status(self):
+        """현재 상태 (관리자 API용)"""
+        with self._lock:
+            return {
+                'scheduler_running': bool(self._thread and self._thread.is_alive()),
+                'backup_in_progress': self.running,
+                'interval_hours': self.interval / 3600,
+                'keep': self.keep,
+                'backup_dir': os.path.abspath(self.backup_dir),
+                'last_started': self.last_started.isoformat(timespec='seconds') if self.last_started else None,
+                'last_success': self.last_success.isoformat(timespec='seconds') if self.last_success else None,
+                'next_run': self.next_run.isoformat(timespec='seconds') if self.next_run else None,
+                'last_error': self.last_error,
+                'last_result': self.last_result,
+                'backups': [
+                    {'file': os.path.basename(p), 'size': os.path.getsize(p)}
+                    for p in list_backups(self.backup_dir)
+                ],
+                'archive_backups': [
+                    {'file': os.path.basename(p), 'size': os.path.getsize(p)}
+                    for p in list_backups(self.backup_dir, ARCHIVE_BACKUP_PREFIX)
+                ],
+            }
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("데이터베이스 온라인 백업")
+    print("=" * 60)
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 데이터베이스 파일이 없습니다: {DB_PATH}")
+    else:
+        try:
+            info = run_backup()
+            print(f"\n✅ 백업 완료: {info['file']}")
+            print(f"  - 크기: {info['size']:,} bytes")
+            print(f"  - 소요 시간: {info['duration']}초")
+            if info['removed']:
+                print(f"  - 오래된 백업 {len(info['removed'])}개 삭제")
+            if info['archive']:
+                print(f"  - 보관 DB 백업: {info['archive']['file']} ({info['archive']['size']:,} bytes)")
+        except Exception as e:
+            print(f"\n❌ 오류 발생: {e}")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - UPDATE 문 카탈로그 마이크로 벤치마크
+값 조합마다 SQL을 새로 만드는 기존 방식과 statements.py 카탈로그 방식을 비교하여
+문장 캐시 적중률과 저장 시간을 측정합니다.
+
+문장이 새로 컴파일될 때만 authorizer 콜백이 호출되므로,
+execute 중 콜백 호출 여부로 캐시 적중/미스를 판정합니다.
+
+사용법:
+    python bench_statements.py                 # 기본 5000회 저장
+    python bench_statements.py --saves 20000 --cache 32
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from contextlib import closing
+
+import measurements
+import statements
+
+DB_PATH = 'database.db'
+
+
+class StatementCounter:
+    """execute 호출별 문장 컴파일 여부 집계"""
+
+    def __init__(self, conn):
+        self.compiled = False
+        self.hits = 0
+        self.misses = 0
+        conn.set_authorizer(self._authorize)
+
+    def _authorize(self, *args):
+        self.compiled = True
+        return sqlite3.SQLITE_OK
+
+    def execute(self, cursor, sql, params):
+        self.compiled = False
+        cursor.execute(sql, params)
+        if self.compiled:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _legacy_sql(item_name, replicate_values):
+    """기존 방식: 값이 있는 컬럼만 SET 절에 포함"""
+    columns = measurements.item_columns(item_name)
+    parts = []
+    for (raw1, raw2, value), data in zip(columns['replicates'], replicate_values):
+        for column, v in zip((raw1, raw2, value), data):
+            if column and v is not None:
+                parts.append(f'{column} = ?')
+    parts.append(f"{columns['avg']} = ?")
+    parts.append(f"{columns['result']} = ?")
+    return f"UPDATE inspection_result SET {', '.join(parts)} WHERE id = ?"
+
+
+def _random_save(rng):
+    """무작위 항목과 일부 비어 있는 반복 측정값 생성"""
+    item_name = rng.choice(statements.RESULT_ITEMS)
+    is_weight = item_name in measurements.RAW_COLUMNS
+    replicate_values = []
+    for _ in range(3):
+        if rng.random() < 0.3:
+            replicate_values.append((None, None, None))
+        elif is_weight:
+            replicate_values.append((rng.uniform(10, 20), rng.uniform(20, 30), rng.uniform(0, 5)))
+        else:
+            replicate_values.append((None, None, rng.uniform(0, 100)))
+    return item_name, replicate_values
+
+
+def _result_table_ddl(db_path):
+    with closing(sqlite3.connect(db_path)) as src:
+        return src.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'inspection_result'").fetchone()[0]
+
+
+def run(mode, saves, cache_size, ddl, seed=1):
+    """메모리 DB에서 같은 무작위 저장 시퀀스를 실행"""
+    rng = random.Random(seed)
+    with closing(sqlite3.connect(':memory:', cached_statements=cache_size)) as conn:
+        conn.execute(ddl)
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO inspection_result (powder_name, lot_number, inspector, inspection_type) VALUES ('B', 'L', 'x', '일상점검')")
+        row_id = cursor.lastrowid
+        conn.commit()
+
+        counter = StatementCounter(conn)
+        started = time.perf_counter()
+
+        for _ in range(saves):
+            item_name, replicate_values = _random_save(rng)
+            is_weight = item_name in measurements.RAW_COLUMNS
+
+            if mode == 'legacy':
+                sql = _legacy_sql(item_name, replicate_values)
+                params = [v for data in replicate_values for v in (data if is_weight else data[2:]) if v is not None]
+            else:
+                sql = statements.ITEM_UPDATE[item_name]
+                params = [v for data in replicate_values for v in (data if is_weight else data[2:])]
+            params.extend([1.0, 'PASS', row_id])
+
+            counter.execute(cursor, sql, params)
+
+        conn.commit()
+        elapsed = time.perf_counter() - started
+
+    return {'mode': mode, 'hit_rate': counter.hit_rate, 'misses': counter.misses, 'elapsed': elapsed, 'per_save_us': elapsed / saves * 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='검사 결과 UPDATE 문 캐시 적중률 벤치마크')
+    parser.add_argument('--saves', type=int, default=5000, help='저장 횟수')
+    parser.add_argument('--cache', type=int, default=statements.STATEMENT_CACHE_SIZE, help='연결당 문장 캐시 크기')
+    parser.add_argument('--db', default=DB_PATH, help='inspection_result 스키마를 가져올 데이터베이스')
+    args = parser.parse_args()
+
+    ddl = _result_table_ddl(args.db)
+
+    print(f"저장 {args.saves}회, 문장 캐시 {args.cache}개, 카탈로그 {len(statements.ITEM_UPDATE) + 1}개 문장")
+    print(f"{'방식':<10}{'적중률':>10}{'컴파일':>10}{'저장당(us)':>14}")
+    for mode in ('legacy', 'catalog'):
+        r = run(mode, args.saves, args.cache, ddl)
+        print(f"{r['mode']:<10}{r['hit_rate']:>10.1%}{r['misses']:>10}{r['per_save_us']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+분말 검사 시스템 - 프로세스 간 캐시 일관성
+여러 서버 프로세스가 같은 DB를 쓸 때, 다른 프로세스의 변경으로 이 프로세스의 메모리 캐시
+(규격 버전 인덱스, 컴파일된 Recipe 등)가 오래된 값이 되지 않도록 요청마다 한 번 변경 여부를 확인합니다.
+
+확인 순서:
+    1. 전용 연결의 PRAGMA data_version - 다른 연결의 커밋이 없었으면 그대로 종료 (DB 읽기 없음)
+    2. ref_data_version(테이블별 변경 횟수, 트리거로 증가) - 횟수가 바뀐 테이블에 등록된 캐시만 무효화
+
+이 프로세스 안의 변경은 각 API가 커밋 직후 해당 항목만 무효화하므로,
+여기서는 다른 프로세스(또는 CLI) 변경을 테이블 단위로 반영합니다.
+"""
+
+import sqlite3
+import threading
+
+
+class CacheCoherence:
+    """테이블 변경 횟수 기반 캐시 무효화"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._versions = None          # 테이블명 -> '변경 횟수-마지막 변경 시각'
+        self._regions = {}             # 테이블명 -> [무효화 함수, ...]
+
+    def register(self, table, invalidate):
+        """테이블이 바뀌면 호출할 무효화 함수 등록"""
+        self._regions.setdefault(table, []).append(invalidate)
+
+    def _connection(self):
+        if self._conn is None:
+            # data_version은 연결별 값이므로 확인 전용 연결을 계속 유지 (읽기만, 트랜잭션을 열지 않음)
+            self._conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute('PRAGMA busy_timeout = 30000')
+        return self._conn
+
+    def check(self):
+        """다른 연결의 변경 확인 후 바뀐 테이블의 캐시 무효화
+
+        Returns:
+            list: 무효화한 테이블명 (변경 없으면 빈 목록)
+        """
+        with self._lock:
+            conn = self._connection()
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+
+            versions = {table: f'{version}-{updated_at}' for table, version, updated_at
+                        in conn.execute('SELECT table_name, version, updated_at FROM ref_data_version')}
+            if self._versions is None:
+                # 첫 확인: 확인 전에 채워진 캐시가 있을 수 있으므로 전체 무효화
+                changed = list(self._regions)
+            else:
+                changed = [table for table in self._regions if versions.get(table) != self._versions.get(table)]
+            self._versions = versions
+
+        for table in changed:
+            for invalidate in self._regions[table]:
+                invalidate()
+        return changed
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            self._data_version = None
+            self._versions = None
@@ -0,0 +1,83 @@
+"""
+분말 검사 시스템 - 무게 기반 항목 계산 커널
+겉보기밀도, 수분도, 회분도의 반복별 계산값과 평균을 NumPy 벡터 연산으로 계산합니다.
+검사 저장(1건)과 과거 데이터 일괄 재계산(recompute.py)이 같은 계산식을 사용합니다.
+
+계산식 (raw1, raw2 = 입력 순서대로의 두 무게):
+    겉보기밀도 = (분말 무게 - 빈 컵 무게) / 25
+    수분도     = (초기 무게 - 건조 무게) / 초기 무게 * 100
+    회분도     = (초기 무게 - 회분 무게) / 초기 무게 * 100   (화면 계산/판정과 동일한 감소율)
+"""
+
+import numpy as np
+
+# 겉보기밀도 측정 컵 부피 (cm³)
+APPARENT_DENSITY_CUP_VOLUME = 25
+
+WEIGHT_ITEMS = ('ApparentDensity', 'Moisture', 'Ash')
+
+DECIMALS = 2
+
+
+def replicate_values(item_name, raw1, raw2):
+    """반복별 계산값 (원본이 없거나 계산할 수 없으면 NaN)
+
+    Args:
+        raw1, raw2: 같은 모양의 float 배열 (빈 값은 NaN)
+    """
+    raw1 = np.asarray(raw1, dtype=float)
+    raw2 = np.asarray(raw2, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if item_name == 'ApparentDensity':
+            values = (raw2 - raw1) / APPARENT_DENSITY_CUP_VOLUME
+        elif item_name in ('Moisture', 'Ash'):
+            values = (raw1 - raw2) / raw1 * 100
+            values[raw1 == 0] = np.nan
+        else:
+            raise ValueError(f'무게 기반 항목이 아닙니다: {item_name}')
+
+    values[~np.isfinite(values)] = np.nan
+    return values
+
+
+def compute(item_name, raw1, raw2):
+    """행 단위 계산 (n행 x 반복 수)
+
+    Returns:
+        tuple: (반복별 계산값 - 소수 둘째 자리 반올림, 평균 - 반올림 전 값의 평균을 반올림, 유효 반복 수)
+               값이 없는 칸/행은 NaN
+    """
+    values = replicate_values(item_name, raw1, raw2)
+    counts = np.sum(~np.isnan(values), axis=-1)
+
+    with np.errstate(invalid='ignore'):
+        sums = np.nansum(values, axis=-1)
+        averages = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    return np.round(values, DECIMALS), np.round(averages, DECIMALS), counts
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return np.nan
+    return float(value)
+
+
+def compute_item(item_name, values):
+    """화면 입력값 1건 계산
+
+    Args:
+        values: [raw1_1, raw2_1, raw1_2, raw2_2, raw1_3, raw2_3] (빈 값은 '' 또는 None)
+
+    Returns:
+        tuple: (반복별 계산값 목록 - 계산 불가 시 None, 평균 - 유효값이 없으면 None)
+    """
+    pairs = [values[i:i + 2] for i in range(0, 6, 2)]
+    raw1 = np.array([[_to_float(p[0]) if len(p) > 0 else np.nan for p in pairs]])
+    raw2 = np.array([[_to_float(p[1]) if len(p) > 1 else np.nan for p in pairs]])
+
+    per_replicate, averages, counts = compute(item_name, raw1, raw2)
+    replicates = [None if np.isnan(v) else float(v) for v in per_replicate[0]]
+    average = float(averages[0]) if counts[0] else None
+    return replicates, average
@@ -0,0 +1,186 @@
+"""
+분말 검사 시스템 - 요청 멱등성 키 (Idempotency-Key)
+저장 요청이 응답 전에 끊겨 클라이언트가 다시 보내더라도 같은 작업이 두 번 처리되지 않도록,
+POST/PUT 요청의 Idempotency-Key 헤더별로 성공 응답을 저장해 두고 재요청에는 저장된 응답을 그대로 돌려줍니다.
+
+저장 위치:
+    - 메모리 LRU (최근 키, 프로세스 내 재요청을 DB 조회 없이 처리)
+    - idempotency_key 테이블 (서버 재시작/다른 프로세스에서도 재요청 판별, KEEP_HOURS 후 삭제)
+
+성공 응답(JSON success가 True이거나 JSON이 아닌 2xx 응답)만 저장합니다.
+실패 응답은 아무것도 기록되지 않았을 수 있으므로 같은 키로 다시 처리합니다.
+같은 키로 동시에 들어온 요청은 먼저 온 요청이 끝날 때까지 기다린 뒤 그 응답을 받습니다.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+METHODS = ('POST', 'PUT')
+MAX_KEY_LENGTH = 200
+LRU_SIZE = 1024      # 메모리에 보관할 최근 키 수
+KEEP_HOURS = 24      # DB 보관 기간
+PURGE_EVERY = 500    # 저장 N건마다 만료 키 삭제
+WAIT_TIMEOUT = 60    # 같은 키의 처리 중 요청 대기 시간(초)
+
+
+class IdempotencyConflict(Exception):
+    """같은 키가 다른 요청(경로/본문)에 사용됨"""
+
+
+class StoredResponse:
+    """저장된 응답 (요청 지문과 함께)"""
+
+    __slots__ = ('fingerprint', 'status', 'body', 'content_type', 'created_at')
+
+    def __init__(self, fingerprint, status, body, content_type, created_at=None):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.created_at = created_at or _utc_str(datetime.now(timezone.utc))   # idempotency_key.created_at 형식 (UTC)
+
+
+def _utc_str(dt):
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _cutoff():
+    """보관 기간 기준 시각 (이보다 먼저 저장된 응답은 만료)"""
+    return _utc_str(datetime.now(timezone.utc) - timedelta(hours=KEEP_HOURS))
+
+
+def fingerprint(method, path, body):
+    """요청 지문 (메서드 + 경로 + 본문 해시)"""
+    digest = hashlib.sha256()
+    digest.update(f'{method} {path}\n'.encode('utf-8'))
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+def is_success(status, body, content_type):
+    """저장할 응답인지 (성공 응답만)"""
+    if not 200 <= status < 300:
+        return False
+    if content_type and content_type.startswith('application/json'):
+        try:
+            return json.loads(body).get('success') is True
+        except (ValueError, AttributeError):
+            return False
+    return True
+
+
+class IdempotencyStore:
+    """Idempotency-Key별 응답 저장소 (메모리 LRU + idempotency_key 테이블)"""
+
+    def __init__(self, db_path, lru_size=LRU_SIZE):
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()      # 키 -> StoredResponse
+        self._in_flight = {}           # 키 -> threading.Event (처리 중)
+        self._saved = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def _remember(self, key, stored):
+        """메모리 LRU에 추가 (호출 측에서 잠금)"""
+        self._lru[key] = stored
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _load(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute('''
+                SELECT fingerprint, status_code, response, content_type, created_at FROM idempotency_key
+                WHERE key = ? AND created_at >= ?
+            ''', (key, _cutoff())).fetchone()
+        return StoredResponse(*row) if row else None
+
+    def lookup(self, key):
+        """저장된 응답 (없으면 None, 메모리 → DB 순, 보관 기간이 지난 응답은 제외)"""
+        with self._lock:
+            stored = self._lru.get(key)
+            if stored is not None:
+                if stored.created_at >= _cutoff():
+                    self._lru.move_to_end(key)
+                    return stored
+                del self._lru[key]
+        stored = self._load(key)
+        if stored is not None:
+            with self._lock:
+                self._remember(key, stored)
+        return stored
+
+    def begin(self, key, request_fingerprint):
+        """요청 처리 시작
+
+        Returns:
+            StoredResponse: 이미 처리된 요청이면 저장된 응답 (쓰기 경로를 건너뜀)
+            None: 새 요청 (처리 후 반드시 finish() 호출)
+
+        Raises:
+            IdempotencyConflict: 같은 키가 다른 요청에 사용된 경우
+        """
+        while True:
+            stored = self.lookup(key)
+            if stored is not None:
+                if stored.fingerprint != request_fingerprint:
+                    raise IdempotencyConflict()
+                return stored
+
+            with self._lock:
+                waiting = self._in_flight.get(key)
+                if waiting is None:
+                    self._in_flight[key] = threading.Event()
+                    return None
+            # 같은 키의 앞선 요청이 끝나면 저장된 응답을 다시 확인
+            if not waiting.wait(WAIT_TIMEOUT):
+                raise TimeoutError('같은 Idempotency-Key의 요청이 아직 처리 중입니다.')
+
+    def finish(self, key, request_fingerprint, status=None, body=None, content_type=None):
+        """요청 처리 종료 (성공 응답이면 저장, 대기 중인 같은 키 요청을 깨움)
+
+        요청은 이미 커밋되었으므로 응답 저장(DB)에 실패해도 예외를 올리지 않습니다
+        (올리면 성공한 요청이 500으로 응답되어 클라이언트가 다시 보냄). 메모리 LRU에는 남깁니다.
+        """
+        try:
+            if status is not None and is_success(status, body, content_type):
+                stored = StoredResponse(request_fingerprint, status, body, content_type)
+                with self._lock:
+                    self._remember(key, stored)
+                    self._saved += 1
+                    purge = self._saved % PURGE_EVERY == 0
+                try:
+                    with closing(self._connect()) as conn:
+                        conn.execute('''
+                            INSERT OR REPLACE INTO idempotency_key
+                            (key, fingerprint, status_code, response, content_type, created_at)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                        ''', (key, request_fingerprint, status, body, content_type, stored.created_at))
+                        conn.commit()
+                    if purge:
+                        self.purge()
+                except sqlite3.Error as e:
+                    print(f"[멱등성] 응답 저장 실패 ({key}): {e}")
+        finally:
+            with self._lock:
+                event = self._in_flight.pop(key, None)
+            if event:
+                event.set()
+
+    def purge(self):
+        """보관 기간이 지난 키 삭제"""
+        with closing(self._connect()) as conn:
+            conn.execute('DELETE FROM idempotency_key WHERE created_at < ?', (_cutoff(),))
+            conn.commit()
@@ -0,0 +1,656 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 측정 장비 CSV 일괄 가져오기
+유동도계, 탄소분석기, 체진동기 등에서 내보낸 CSV 파일을 한 줄씩 읽어 검사 항목에 매핑하고,
+검사 시점의 규격 버전으로 판정한 뒤 일정 행 수씩 한 트랜잭션(executemany)으로 저장합니다.
+진행 상태(inspection_progress)와 최종 판정, 일별 집계도 묶음 단위로 갱신합니다.
+
+CSV 형식 (첫 줄 헤더, UTF-8 또는 CP949, 컬럼 순서 무관, 대소문자 무시):
+    분말명(powder_name), LOT(lot_number)         필수
+    검사타입(inspection_type), 검사자(inspector)  선택 (기본: 일상점검 / 장비)
+    검사일시(inspection_time)                    선택, KST (새 LOT의 검사 시각)
+    측정값 컬럼: inspection_result 컬럼명 (flow_rate_1, c_content_2, particle_size_180_1 ...)
+                 또는 '항목명_반복' (FlowRate_1, ParticleSize45M_2 ...)
+    무게 기반 항목은 원본 무게 컬럼 (apparent_density_empty_cup_1, moisture_dried_weight_2 ...)
+장비마다 헤더가 다르면 {"장비 헤더": "위 컬럼명"} 형식의 매핑을 함께 지정합니다.
+
+한 행 = 한 LOT의 측정값이며, 비어 있는 칸은 기존 값을 유지합니다.
+오류가 있는 행은 건너뛰고 행 번호와 사유를 오류 보고서에 남깁니다.
+
+사용법:
+    python importer.py flow_20250101.csv
+    python importer.py sieve.csv --map sieve_map.json --errors errors.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, nullcontext
+
+import formulas
+import measurements
+import rollup
+import specs
+import statements
+from spc import SPC_ITEMS
+
+DB_PATH = 'database.db'
+CHUNK_SIZE = 500        # 한 트랜잭션에 저장할 행 수
+ERROR_LIMIT = 1000      # 결과에 포함할 오류 행 수 (건수 집계는 전체)
+DEFAULT_INSPECTION_TYPE = '일상점검'
+DEFAULT_INSPECTOR = '장비'
+
+# 기본 필드 -> 허용 헤더 (소문자)
+FIELD_ALIASES = {
+    'powder_name': ('powder_name', 'powder', '분말명', '분말'),
+    'lot_number': ('lot_number', 'lot', 'lot번호', 'lot no', 'lot_no'),
+    'inspection_type': ('inspection_type', '검사타입', '검사 타입'),
+    'inspector': ('inspector', '검사자'),
+    'inspection_time': ('inspection_time', '검사일시', '검사시간', '검사 일시'),
+}
+
+PARTICLE_ITEMS = list(statements.PARTICLE_MESH_ITEMS.values())
+PARTICLE_PROGRESS_ITEM = 'ParticleSize'
+
+
+def _measurement_targets():
+    """허용 헤더(소문자) -> (항목명, 반복 번호, 'value' | 'raw1' | 'raw2')"""
+    targets = {}
+    for item_name in SPC_ITEMS:
+        for n, (raw1, raw2, value) in enumerate(measurements.item_columns(item_name)['replicates'], start=1):
+            if raw1:
+                targets[raw1] = (item_name, n, 'raw1')
+                targets[raw2] = (item_name, n, 'raw2')
+            else:
+                targets[value] = (item_name, n, 'value')
+                targets[f'{item_name}_{n}'.lower()] = (item_name, n, 'value')
+    return targets
+
+
+MEASUREMENT_TARGETS = _measurement_targets()
+
+# 최종 판정 대상 항목 판정 컬럼 (update_final_result와 동일: final_result 외 모든 _result)
+RESULT_COLUMNS = [f'{prefix}_result' for prefix, _ in SPC_ITEMS.values()] + ['particle_size_result']
+
+
+class RowError(Exception):
+    """행 단위 오류 (해당 행만 건너뜀)"""
+
+
+def detect_encoding(path):
+    """UTF-8(BOM 포함)로 읽을 수 없으면 CP949 (국내 장비 기본 인코딩)"""
+    with open(path, 'rb') as f:
+        head = f.read(65536)
+    try:
+        head.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # 잘린 마지막 문자 때문일 수 있으므로 끝부분 오류는 UTF-8로 간주
+        return 'utf-8-sig' if e.start >= len(head) - 3 else 'cp949'
+
+
+def build_column_map(header, mapping=None):
+    """CSV 헤더 -> [(열 번호, 기본 필드명 또는 측정값 대상)]
+
+    Raises:
+        ValueError: 분말명/LOT 컬럼이 없거나 측정값 컬럼이 하나도 없을 때
+    """
+    mapping = {k.strip().lower(): v.strip().lower() for k, v in (mapping or {}).items()}
+    field_by_alias = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+    columns = []
+    for idx, name in enumerate(header):
+        key = name.strip().lower()
+        key = mapping.get(key, key)
+        if key in field_by_alias:
+            columns.append((idx, field_by_alias[key]))
+        elif key in MEASUREMENT_TARGETS:
+            columns.append((idx, MEASUREMENT_TARGETS[key]))
+
+    fields = {target for _, target in columns if isinstance(target, str)}
+    missing = [f for f in ('powder_name', 'lot_number') if f not in fields]
+    if missing:
+        raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing)}")
+    if not any(isinstance(target, tuple) for _, target in columns):
+        raise ValueError('매핑된 측정값 컬럼이 없습니다. 헤더 또는 매핑을 확인하세요.')
+    return columns
+
+
+def parse_row(line_no, row, columns):
+    """CSV 한 행 -> 레코드 (기본 필드 + 항목별 측정값)"""
+    record = {'line': line_no, 'measurements': {}}
+    for idx, target in columns:
+        value = row[idx].strip() if idx < len(row) else ''
+        if isinstance(target, str):
+            record[target] = value
+            continue
+        if value == '':
+            continue
+        item_name, n, kind = target
+        try:
+            number = float(value.replace(',', ''))
+        except ValueError:
+            raise RowError(f'{header_label(item_name, n, kind)} 값이 숫자가 아닙니다: {value}')
+        record['measurements'].setdefault(item_name, {}).setdefault(n, {})[kind] = number
+
+    if not record.get('powder_name') or not record.get('lot_number'):
+        raise RowError('분말명 또는 LOT번호가 비어 있습니다.')
+    if not record['measurements']:
+        raise RowError('측정값이 없습니다.')
+    try:
+        record['inspection_time'] = specs.kst_to_utc(record.get('inspection_time'))
+    except ValueError as e:
+        raise RowError(str(e))
+    return record
+
+
+def header_label(item_name, n, kind):
+    return f'{item_name}_{n}' + ('' if kind == 'value' else f'({kind})')
+
+
+def _judge(average, item):
+    """check_spec과 같은 규칙: 검사 항목에 포함되고 범위를 벗어나면 FAIL"""
+    if item is None:
+        return 'PASS'
+    if item.get('min') is not None and average < item['min']:
+        return 'FAIL'
+    if item.get('max') is not None and average > item['max']:
+        return 'FAIL'
+    return 'PASS'
+
+
+def judge_record(record, inspection_items, particle_specs):
+    """레코드의 항목별 저장 파라미터와 판정
+
+    Returns:
+        dict: item_params(항목명 -> ITEM_UPDATE 파라미터, id 제외), item_results,
+              particle_params(PARTICLE_UPDATE 파라미터, id 제외 / 입도 측정값이 없으면 None),
+              completed(진행 상태에 반영할 항목명 목록)
+    """
+    items_by_name = {item['name']: item for item in inspection_items}
+    item_params = {}
+    item_results = {}
+
+    for item_name, replicates in record['measurements'].items():
+        if item_name in PARTICLE_ITEMS:
+            continue
+        count = SPC_ITEMS[item_name][1]
+
+        if item_name in formulas.WEIGHT_ITEMS:
+            values = []
+            for n in range(1, count + 1):
+                values.extend([replicates.get(n, {}).get('raw1'), replicates.get(n, {}).get('raw2')])
+            calculated, average = formulas.compute_item(item_name, values)
+            if average is None:
+                raise RowError(f'{item_name}: 계산할 수 있는 무게 값이 없습니다.')
+            params = []
+            for n in range(count):
+                params.extend([values[n * 2], values[n * 2 + 1], calculated[n]])
+        else:
+            params = [replicates.get(n, {}).get('value') for n in range(1, count + 1)]
+            valid = [v for v in params if v is not None]
+            average = round(sum(valid) / len(valid), 2)
+
+        result = _judge(average, items_by_name.get(item_name))
+        item_params[item_name] = params + [average, result]
+        item_results[item_name] = result
+
+    completed = list(item_params)
+
+    # 입도분석: save_particle_size와 같이 규격 등록 순서대로 mesh 컬럼에 대응
+    particle_params = None
+    if any(name in record['measurements'] for name in PARTICLE_ITEMS):
+        particle_params = []
+        overall = 'PASS'
+        for position, item_name in enumerate(PARTICLE_ITEMS):
+            spec = particle_specs[position] if position < len(particle_specs) else None
+            replicates = record['measurements'].get(item_name)
+            if not replicates:
+                if spec:
+                    overall = 'FAIL'   # 규격이 있는 mesh의 측정값 누락
+                particle_params.extend([None, None, None, None])
+                continue
+
+            val1 = replicates.get(1, {}).get('value')
+            val2 = replicates.get(2, {}).get('value')
+            valid = [v for v in (val1, val2) if v is not None]
+            average = round(sum(valid) / len(valid), 2)
+            result = 'PASS'
+            if spec and ((spec['min_value'] is not None and average < spec['min_value']) or
+                         (spec['max_value'] is not None and average > spec['max_value'])):
+                result = 'FAIL'
+                overall = 'FAIL'
+            particle_params.extend([val1, val2, average, result])
+            item_results[item_name] = result
+
+        particle_params.append(overall)
+        item_results[PARTICLE_PROGRESS_ITEM] = overall
+        completed.append(PARTICLE_PROGRESS_ITEM)
+
+    return {
+        'item_params': item_params,
+        'item_results': item_results,
+        'particle_params': particle_params,
+        'completed': completed,
+    }
+
+
+def _chunks(values, size):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _lot_keys_clause(keys):
+    """(powder_name, lot_number) 목록 조건절과 파라미터"""
+    placeholders = ', '.join('(?, ?)' for _ in keys)
+    params = [v for key in keys for v in key]
+    return f'(powder_name, lot_number) IN (VALUES {placeholders})', params
+
+
+class InspectionImporter:
+    """CSV 레코드를 묶음 단위로 판정/저장 (연결당 1개, 커밋 포함)"""
+
+    def __init__(self, conn, spec_index=None, chunk_size=CHUNK_SIZE, checkpoint=None, lot_locks=None):
+        """
+        Args:
+            checkpoint: checkpoint(conn, 마지막 행 번호) - 묶음 커밋 직전 같은 트랜잭션에서 호출 (재시작 시 이어서 처리)
+            lot_locks: 서버의 LOT 잠금(locks.StripedLock) - 묶음의 LOT들을 커밋까지 잡아
+                       태블릿 저장과 inspection_progress 읽기-수정-쓰기가 겹치지 않게 함
+        """
+        self.conn = conn
+        self.spec_index = spec_index or specs.SpecIndex()
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.lot_locks = lot_locks
+        self._items_cache = {}
+        self.report = {
+            'rows_read': 0,
+            'rows_imported': 0,
+            'rows_failed': 0,
+            'lots_completed': 0,
+            'final_results': {'PASS': 0, 'FAIL': 0},
+            'item_fail': {},
+            'errors': [],
+        }
+
+    def add_error(self, line_no, record, message):
+        self.report['rows_failed'] += 1
+        if len(self.report['errors']) < ERROR_LIMIT:
+            self.report['errors'].append({
+                'line': line_no,
+                'powder_name': (record or {}).get('powder_name'),
+                'lot_number': (record or {}).get('lot_number'),
+                'message': message,
+            })
+
+    def _version(self, powder_name, at):
+        version = self.spec_index.lookup(self.conn, powder_name, at)
+        return version or specs.snapshot(self.conn, powder_name)
+
+    def _inspection_items(self, version, inspection_type):
+        key = (version.get('id'), version['spec']['powder_name'], inspection_type)
+        if key not in self._items_cache:
+            self._items_cache[key] = specs.build_inspection_items(
+                version['spec'], version['particle_specs'], inspection_type)
+        return self._items_cache[key]
+
+    def import_records(self, records, last_line=None):
+        """레코드 한 묶음 판정 후 한 트랜잭션으로 저장 (실패 시 묶음 전체 롤백 후 오류 기록)
+
+        Args:
+            last_line: 이 묶음까지 읽은 마지막 행 번호 (checkpoint 기록용)
+        """
+        if last_line is None and records:
+            last_line = records[-1]['line']
+        keys = {(r['powder_name'], r['lot_number']) for r in records}
+        with self.lot_locks.hold_many(keys) if self.lot_locks else nullcontext():
+            try:
+                self._import_chunk(records)
+                if self.checkpoint and last_line is not None:
+                    self.checkpoint(self.conn, last_line)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                for record in records:
+                    self.add_error(record['line'], record, f'저장 실패: {e}')
+                if self.checkpoint and last_line is not None:
+                    self.checkpoint(self.conn, last_line)
+                    self.conn.commit()
+
+    def _import_chunk(self, records):
+        if not records:
+            return
+        cursor = self.conn.cursor()
+        keys = list(dict.fromkeys((r['powder_name'], r['lot_number']) for r in records))
+
+        # 묶음의 기존 검사 결과 / 진행중 검사를 한 번에 조회
+        existing = {}
+        progress = {}
+        for part in _chunks(keys, self.chunk_size):
+            clause, params = _lot_keys_clause(part)
+            cursor.execute(f'''
+                SELECT powder_name, lot_number, id, inspection_type, inspection_time
+                FROM inspection_result WHERE {clause}
+            ''', params)
+            for row in cursor.fetchall():
+                existing[(row[0], row[1])] = {'id': row[2], 'type': row[3], 'time': row[4]}
+            cursor.execute(f'''
+                SELECT powder_name, lot_number, inspection_type, start_time, completed_items, total_items, inspector
+                FROM inspection_progress WHERE {clause}
+            ''', params)
+            for row in cursor.fetchall():
+                progress[(row[0], row[1])] = {
+                    'type': row[2], 'time': row[3],
+                    'completed': json.loads(row[4] or '[]'), 'total': json.loads(row[5] or '[]'),
+                    'inspector': row[6],
+                }
+
+        # 판정 (검사 타입/기준 시각은 inspection_context와 같은 우선순위)
+        judged = []
+        new_lots = {}
+        for record in records:
+            key = (record['powder_name'], record['lot_number'])
+            result_row, progress_row = existing.get(key), progress.get(key)
+            inspection_type = ((progress_row or result_row or {}).get('type')
+                               or record.get('inspection_type') or DEFAULT_INSPECTION_TYPE)
+            judged_at = (result_row or progress_row or {}).get('time') or record.get('inspection_time')
+
+            version = self._version(record['powder_name'], judged_at)
+            if not version:
+                self.add_error(record['line'], record, f"등록되지 않은 분말입니다: {record['powder_name']}")
+                continue
+            items = self._inspection_items(version, inspection_type)
+            try:
+                outcome = judge_record(record, items, version['particle_specs'])
+            except RowError as e:
+                self.add_error(record['line'], record, str(e))
+                continue
+
+            judged.append((key, outcome))
+            if key not in existing and key not in new_lots:
+                # 진행중 검사가 있으면 그 검사자로 (_insert_result_row와 동일)
+                inspector = (progress_row or {}).get('inspector') or record.get('inspector') or DEFAULT_INSPECTOR
+                new_lots[key] = (inspection_type, inspector,
+                                 record.get('inspection_time') or specs.utc_now(),
+                                 version['spec'].get('category') or 'incoming',
+                                 [item['name'] for item in items])
+
+        if not judged:
+            return
+
+        # 새 LOT 검사 결과 행 생성 후 id 조회
+        if new_lots:
+            cursor.executemany('''
+                INSERT INTO inspection_result (powder_name, lot_number, inspection_type, inspector, inspection_time, category)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(powder_name, lot_number) DO NOTHING
+            ''', [key + info[:4] for key, info in new_lots.items()])
+            for part in _chunks(list(new_lots), self.chunk_size):
+                clause, params = _lot_keys_clause(part)
+                cursor.execute(f'SELECT powder_name, lot_number, id FROM inspection_result WHERE {clause}', params)
+                for row in cursor.fetchall():
+                    existing[(row[0], row[1])] = {'id': row[2]}
+
+        # 항목별 UPDATE를 executemany로 (파일 순서대로, 같은 LOT은 뒤 행이 덮어씀)
+        item_updates = {}
+        particle_updates = []
+        synced = {}
+        completed = {}
+        for key, outcome in judged:
+            row_id = existing[key]['id']
+            for item_name, params in outcome['item_params'].items():
+                item_updates.setdefault(item_name, []).append(params + [row_id])
+                synced.setdefault(row_id, set()).add(item_name)
+            if outcome['particle_params']:
+                particle_updates.append(outcome['particle_params'] + [row_id])
+                synced.setdefault(row_id, set()).update(
+                    name for name in PARTICLE_ITEMS if outcome['item_results'].get(name))
+            completed.setdefault(key, []).extend(outcome['completed'])
+            for item_name, result in outcome['item_results'].items():
+                if result == 'FAIL':
+                    self.report['item_fail'][item_name] = self.report['item_fail'].get(item_name, 0) + 1
+
+        for item_name, rows in item_updates.items():
+            cursor.executemany(statements.ITEM_UPDATE[item_name], rows)
+        if particle_updates:
+            cursor.executemany(statements.PARTICLE_UPDATE, particle_updates)
+
+        # 세로형 측정값 테이블 동시 기록
+        for row_id, items in synced.items():
+            measurements.sync_result(self.conn, row_id, sorted(items))
+
+        # 진행 상태 갱신: 진행중 검사는 완료 항목 추가, 새 LOT은 남은 항목이 있으면 진행중 검사 생성
+        progress_updates = []
+        progress_done = []
+        progress_new = []
+        finalize = []
+        for key, names in completed.items():
+            if key in progress:
+                row = progress[key]
+                done = row['completed'] + [n for n in dict.fromkeys(names) if n not in row['completed']]
+                progress_updates.append((json.dumps(done), f"{len(done)}/{len(row['total'])}") + key)
+                if len(done) == len(row['total']):
+                    progress_done.append(key)
+                    finalize.append(existing[key]['id'])
+            elif key in new_lots:
+                inspection_type, inspector, start_time, category, total = new_lots[key]
+                done = [n for n in dict.fromkeys(names) if n in total] or list(dict.fromkeys(names))
+                if total and not set(total) <= set(done):
+                    progress_new.append(key + (inspection_type, inspector, start_time, json.dumps(done),
+                                               json.dumps(total), f'{len(done)}/{len(total)}', category))
+                else:
+                    finalize.append(existing[key]['id'])
+            else:
+                # 완료된 검사에 측정값 추가: 최종 판정만 다시 계산
+                finalize.append(existing[key]['id'])
+
+        cursor.executemany('''
+            UPDATE inspection_progress SET completed_items = ?, progress = ?
+            WHERE powder_name = ? AND lot_number = ?
+        ''', progress_updates)
+        cursor.executemany('DELETE FROM inspection_progress WHERE powder_name = ? AND lot_number = ?', progress_done)
+        cursor.executemany('''
+            INSERT INTO inspection_progress
+            (powder_name, lot_number, inspection_type, inspector, start_time,
+             completed_items, total_items, progress, category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', progress_new)
+
+        self._finalize(finalize)
+        self.report['rows_imported'] += len(judged)
+
+    def _finalize(self, row_ids):
+        """최종 판정 일괄 갱신 후 해당 (일자, 분말, 구분) 집계를 한 번씩 재계산"""
+        if not row_ids:
+            return
+        cursor = self.conn.cursor()
+        any_fail = ' OR '.join(f"{c} = 'FAIL'" for c in RESULT_COLUMNS)
+        groups = set()
+        for part in _chunks(list(dict.fromkeys(row_ids)), self.chunk_size):
+            placeholders = ', '.join('?' for _ in part)
+            cursor.execute(f'''
+                UPDATE inspection_result
+                SET final_result = CASE WHEN {any_fail} THEN 'FAIL' ELSE 'PASS' END
+                WHERE id IN ({placeholders})
+            ''', part)
+            cursor.execute(f'''
+                SELECT final_result, {rollup.DAY_EXPR}, powder_name, {rollup.CATEGORY_EXPR}
+                FROM inspection_result WHERE id IN ({placeholders})
+            ''', part)
+            for row in cursor.fetchall():
+                self.report['final_results'][row[0]] = self.report['final_results'].get(row[0], 0) + 1
+                groups.add(tuple(row)[1:])
+            self.report['lots_completed'] += len(part)
+
+        for group in groups:
+            rollup.refresh_group(self.conn, *group)
+
+
+def count_rows(path, encoding):
+    """진행률 표시용 데이터 행 수 (헤더 제외)"""
+    with open(path, newline='', encoding=encoding) as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def import_file(conn, path, mapping=None, spec_index=None, chunk_size=CHUNK_SIZE, progress=None,
+                start_line=0, checkpoint=None, lot_locks=None):
+    """CSV 파일 한 개를 스트리밍으로 가져오기
+
+    Args:
+        mapping: 장비 헤더 -> 표준 컬럼명
+        progress: 진행률 콜백 progress(처리 행 수, 전체 행 수, 메시지) - Job.update와 호환
+        start_line: 이 행 번호까지는 이미 저장된 것으로 보고 건너뜀 (checkpoint 재개)
+        checkpoint: 묶음 커밋마다 호출되는 checkpoint(conn, 마지막 행 번호)
+        lot_locks: 서버의 LOT 잠금 (서버 안에서 실행할 때)
+
+    Returns:
+        dict: 행 수, 저장/실패 건수, 최종 판정 집계, 항목별 FAIL 건수, 오류 목록, 소요 시간
+    """
+    started = time.time()
+    encoding = detect_encoding(path)
+    total = count_rows(path, encoding)
+    importer = InspectionImporter(conn, spec_index, chunk_size, checkpoint, lot_locks)
+    report = importer.report
+    if progress:
+        progress(0, total, f'{os.path.basename(path)} 가져오는 중')
+
+    with open(path, newline='', encoding=encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            raise ValueError('빈 파일입니다.')
+        columns = build_column_map(header, mapping)
+
+        chunk = []
+        line_no = start_line
+        pending = False     # checkpoint 이후 읽은 행이 있는지
+        for line_no, row in enumerate(reader, start=2):
+            if line_no <= start_line or not any(cell.strip() for cell in row):
+                continue
+            report['rows_read'] += 1
+            pending = True
+            try:
+                chunk.append(parse_row(line_no, row, columns))
+            except RowError as e:
+                importer.add_error(line_no, dict(zip(('powder_name', 'lot_number'),
+                                                     _raw_keys(row, columns))), str(e))
+            if len(chunk) >= chunk_size:
+                importer.import_records(chunk, line_no)
+                chunk = []
+                pending = False
+                if progress:
+                    progress(report['rows_read'])
+        if pending:
+            importer.import_records(chunk, line_no)
+
+    if progress:
+        progress(report['rows_read'], report['rows_read'])
+    report['file'] = os.path.basename(path)
+    report['elapsed'] = round(time.time() - started, 2)
+    return report
+
+
+def _raw_keys(row, columns):
+    values = {target: row[idx].strip() for idx, target in columns
+              if isinstance(target, str) and idx < len(row)}
+    return values.get('powder_name'), values.get('lot_number')
+
+
+def run_import_job(job, db_path, path, mapping=None, spec_index=None, filename=None, remove=False,
+                   lot_locks=None):
+    """JobManager용 작업 함수 (작업 스레드 전용 연결 사용)
+
+    Args:
+        filename: 보고서에 표시할 원래 파일명 (업로드 임시 파일인 경우)
+        remove: 완료 후 파일 삭제 (업로드 임시 파일)
+        lot_locks: 서버의 LOT 잠금 (태블릿 저장과 직렬화)
+    """
+    try:
+        with closing(sqlite3.connect(db_path, timeout=30.0)) as conn:
+            conn.execute('PRAGMA busy_timeout = 30000')
+            report = import_file(conn, path, mapping, spec_index, progress=job.update, lot_locks=lot_locks)
+    finally:
+        if remove and os.path.exists(path):
+            os.remove(path)
+    if filename:
+        report['file'] = filename
+    if report['errors']:
+        # 오류 행 보고서는 /api/jobs/<id>/download로 내려받음
+        write_error_report(report['errors'], job.result_path('errors.csv'))
+    job.update(message=f"저장 {report['rows_imported']}행, 오류 {report['rows_failed']}행")
+    return report
+
+
+def write_error_report(errors, path):
+    """오류 행 보고서 CSV (행 번호, 분말명, LOT, 사유)"""
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['행', '분말명', 'LOT번호', '사유'])
+        for error in errors:
+            writer.writerow([error['line'], error['powder_name'], error['lot_number'], error['message']])
+
+
+def load_mapping(path):
+    """헤더 매핑 JSON 파일 읽기"""
+    if not path:
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='측정 장비 CSV 검사 결과 일괄 가져오기')
+    parser.add_argument('files', nargs='+', help='CSV 파일 경로')
+    parser.add_argument('--map', help='헤더 매핑 JSON 파일 ({"장비 헤더": "표준 컬럼명"})')
+    parser.add_argument('--errors', help='오류 행 보고서 CSV 파일 경로')
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help='한 트랜잭션에 저장할 행 수')
+    parser.add_argument('--db', default=DB_PATH, help='데이터베이스 파일 경로')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 데이터베이스 파일이 없습니다: {args.db}")
+        return
+
+    mapping = load_mapping(args.map)
+    all_errors = []
+
+    with closing(sqlite3.connect(args.db, timeout=30.0)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+
+        from migrate_db import apply_migrations
+        apply_migrations(conn)
+
+        spec_index = specs.SpecIndex()
+        for path in args.files:
+            state = {'total': '?'}
+
+            def show(done, total=None, message=None):
+                if total is not None:
+                    state['total'] = total
+                print(f"\r  {path}: {done}/{state['total']}행", end='', flush=True)
+
+            try:
+                report = import_file(conn, path, mapping, spec_index, args.chunk, show)
+            except (OSError, ValueError) as e:
+                print(f"❌ {path}: {e}")
+                continue
+
+            print()
+            print(f"✅ {report['file']}: {report['rows_imported']}/{report['rows_read']}행 저장 "
+                  f"({report['elapsed']}초), 오류 {report['rows_failed']}행")
+            print(f"  - 판정 완료 LOT: {report['lots_completed']}건 "
+                  f"(PASS {report['final_results'].get('PASS', 0)}, FAIL {report['final_results'].get('FAIL', 0)})")
+            for item_name, count in sorted(report['item_fail'].items()):
+                print(f"  - {item_name} FAIL: {count}건")
+            all_errors.extend(dict(e, line=f"{report['file']}:{e['line']}") for e in report['errors'])
+
+    if args.errors and all_errors:
+        write_error_report(all_errors, args.errors)
+        print(f"  - 오류 보고서: {args.errors}")
+
+
+if __name__ == '__main__':
+    main()
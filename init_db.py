@@ -6,6 +6,8 @@ SQLite 데이터베이스를 생성하고 초기 테이블 및 샘플 데이터
 import sqlite3
 import os
 
+from migrate_db import apply_migrations
+
 def init_database():
     """데이터베이스 초기화 및 테이블 생성"""
 
@@ -598,6 +600,10 @@ def init_database():
     conn.commit()
     print("샘플 데이터 입력 완료!")
 
+    # 확장 테이블/인덱스 생성 (집계 등)
+    apply_migrations(conn)
+    print("확장 스키마 적용 완료!")
+
     # 데이터 확인
     print("\n=== 데이터베이스 초기화 완료 ===")
     cursor.execute("SELECT COUNT(*) FROM powder_spec")
@@ -0,0 +1,481 @@
+"""
+분말 검사 시스템 - 백그라운드 작업 관리
+오래 걸리는 작업(규격 변경 후 재판정, 계산값 재계산, CSV 가져오기 등)을 요청 스레드 밖에서 실행하고
+/api/jobs/<id>로 진행률과 결과를 확인할 수 있게 합니다.
+
+실행 풀:
+    - thread: 파일/DB 입출력 위주 작업 (스레드 풀)
+    - process: NumPy 계산 위주 작업 (프로세스 풀, GIL과 관계없이 병렬 실행)
+      작업 함수와 인자는 pickle 가능해야 하며(모듈 최상위 함수), 진행률은 DB를 통해 전달됩니다.
+
+작업 상태는 job 테이블에 저장되어 서버 재시작 후에도 조회할 수 있습니다.
+작업마다 실행하는 서버 프로세스(owner)를 기록하고 그 프로세스가 주기적으로 heartbeat_at을 갱신하므로,
+여러 서버 프로세스가 같은 DB를 쓰더라도 heartbeat가 끊긴(중단된 프로세스의) 작업만 'failed'로 표시합니다.
+
+취소는 협조 방식입니다: 취소 요청(DB에 기록되므로 다른 프로세스의 작업도 가능) 후
+작업이 다음에 update()를 호출할 때 JobCancelled가 발생합니다.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta
+
+MAX_WORKERS = 4     # 동시에 실행할 입출력 작업 수
+CPU_WORKERS = max(1, min(2, (os.cpu_count() or 1) - 1))   # 동시에 실행할 계산 작업 수
+KEEP_JOBS = 100     # 메모리에 보관할 작업 수 (완료된 오래된 작업부터 삭제)
+KEEP_DAYS = 30      # DB/결과 파일 보관 기간
+PERSIST_INTERVAL = 0.5   # 진행률 저장/취소 확인 최소 간격(초)
+HEARTBEAT_INTERVAL = 30  # 실행 중 작업의 heartbeat 갱신 주기(초)
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL   # heartbeat가 이 시간(초) 넘게 끊긴 작업은 중단된 것으로 봄
+RESULT_DIR = 'job_results'
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+# 이 서버 프로세스 식별자 (같은 PID가 재사용되어도 구분되도록 실행마다 임의 값 포함)
+OWNER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def _iso(dt):
+    return dt.isoformat(timespec='seconds') if dt else None
+
+
+def _parse(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class JobCancelled(Exception):
+    """작업 취소 요청 (작업 함수 안에서 발생)"""
+
+
+class JobStore:
+    """job 테이블 읽기/쓰기 (호출마다 짧은 연결 사용)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def save(self, job):
+        data = job.to_dict()
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                INSERT INTO job (id, kind, job_key, pool, params, status, progress, total, message,
+                                 result, result_file, error, created_at, started_at, finished_at,
+                                 owner, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = excluded.status, progress = excluded.progress, total = excluded.total,
+                    message = excluded.message, result = excluded.result, result_file = excluded.result_file,
+                    error = excluded.error, started_at = excluded.started_at, finished_at = excluded.finished_at,
+                    heartbeat_at = excluded.heartbeat_at
+            ''', (
+                job.id, job.kind, json.dumps(job.key, default=str) if job.key is not None else None, job.pool,
+                json.dumps(job.params, ensure_ascii=False, default=str), data['status'],
+                data['progress'], data['total'], data['message'],
+                json.dumps(data['result'], ensure_ascii=False, default=str) if data['result'] is not None else None,
+                job.result_file, data['error'], data['created_at'], data['started_at'], data['finished_at'],
+                OWNER, _iso(datetime.now()),
+            ))
+            conn.commit()
+
+    def save_progress(self, job_id, progress, total, message):
+        with closing(self._connect()) as conn:
+            conn.execute('UPDATE job SET progress = ?, total = ?, message = ?, heartbeat_at = ? WHERE id = ?',
+                         (progress, total, message, _iso(datetime.now()), job_id))
+            conn.commit()
+
+    def heartbeat(self, job_ids):
+        """이 프로세스가 실행 중인 작업의 heartbeat 갱신"""
+        if not job_ids:
+            return
+        with closing(self._connect()) as conn:
+            conn.execute(f'''
+                UPDATE job SET heartbeat_at = ?
+                WHERE id IN ({', '.join('?' * len(job_ids))})
+            ''', [_iso(datetime.now()), *job_ids])
+            conn.commit()
+
+    def load(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM job WHERE id = ?', (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list(self, limit=KEEP_JOBS):
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT * FROM job ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+        return [Job.from_row(r) for r in rows]
+
+    def request_cancel(self, job_id):
+        with closing(self._connect()) as conn:
+            conn.execute('UPDATE job SET cancel_requested = 1 WHERE id = ?', (job_id,))
+            conn.commit()
+
+    def cancel_requested(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT cancel_requested FROM job WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def recover(self):
+        """중단된 서버 프로세스의 끝나지 않은 작업 정리 및 보관 기간이 지난 작업 삭제
+
+        다른 서버 프로세스가 실행 중인 작업은 heartbeat가 계속 갱신되므로 건드리지 않습니다.
+        """
+        now = datetime.now()
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                UPDATE job SET status = 'failed', error = '작업을 실행하던 서버가 중단되었습니다.',
+                               finished_at = COALESCE(finished_at, ?)
+                WHERE status IN ('queued', 'running') AND owner IS NOT ?
+                  AND (heartbeat_at IS NULL OR heartbeat_at < ?)
+            ''', (_iso(now), OWNER, _iso(now - timedelta(seconds=STALE_AFTER))))
+            expired = conn.execute(
+                'SELECT id, result_file FROM job WHERE created_at < ?',
+                (_iso(datetime.now() - timedelta(days=KEEP_DAYS)),)
+            ).fetchall()
+            conn.executemany('DELETE FROM job WHERE id = ?', [(r['id'],) for r in expired])
+            conn.commit()
+        for row in expired:
+            if row['result_file'] and os.path.exists(row['result_file']):
+                os.remove(row['result_file'])
+
+
+class Job:
+    """작업 1건의 상태 (작업 함수는 update()로 진행률을 보고)"""
+
+    def __init__(self, kind, params=None, key=None, pool='thread', job_id=None, store=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.pool = pool
+        self.params = params or {}
+        self.status = 'queued'      # queued, running, done, failed, cancelled
+        self.progress = 0
+        self.total = 0
+        self.message = ''
+        self.result = None
+        self.result_file = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._store = store
+        self._cancel = threading.Event()
+        self._last_persist = 0.0
+
+    @classmethod
+    def from_row(cls, row):
+        job = cls(row['kind'], json.loads(row['params'] or '{}'), pool=row['pool'], job_id=row['id'])
+        job.key = json.loads(row['job_key']) if row['job_key'] else None
+        job.status = row['status']
+        job.progress = row['progress']
+        job.total = row['total']
+        job.message = row['message'] or ''
+        job.result = json.loads(row['result']) if row['result'] else None
+        job.result_file = row['result_file']
+        job.error = row['error']
+        job.created_at = _parse(row['created_at'])
+        job.started_at = _parse(row['started_at'])
+        job.finished_at = _parse(row['finished_at'])
+        if row['cancel_requested']:
+            job._cancel.set()
+        return job
+
+    def update(self, progress=None, total=None, message=None):
+        """진행률 보고 (일정 간격으로 DB 저장). 취소가 요청되었으면 JobCancelled 발생"""
+        with self._lock:
+            if progress is not None:
+                self.progress = progress
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+            now = time.monotonic()
+            due = now - self._last_persist >= PERSIST_INTERVAL
+            if due:
+                self._last_persist = now
+            snapshot = (self.progress, self.total, self.message)
+
+        if due and self._store:
+            try:
+                self._store.save_progress(self.id, *snapshot)
+                # 프로세스 풀 작업이나 다른 서버 프로세스의 취소 요청은 메모리 플래그로 전달되지 않으므로 DB에서 확인
+                if self._store.cancel_requested(self.id):
+                    self._cancel.set()
+            except sqlite3.Error as e:
+                print(f"[작업] 진행률 저장 실패 ({self.id}): {e}")
+
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def flush(self):
+        """마지막 진행률 저장 (저장 간격 때문에 남은 값)"""
+        if self._store:
+            with self._lock:
+                snapshot = (self.progress, self.total, self.message)
+            self._store.save_progress(self.id, *snapshot)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def result_path(self, filename):
+        """다운로드용 결과 파일 경로 (작업 함수가 이 경로에 파일을 작성)"""
+        os.makedirs(RESULT_DIR, exist_ok=True)
+        self.result_file = os.path.join(RESULT_DIR, f'{self.id}_{filename}')
+        return self.result_file
+
+    def to_dict(self, include_result=True):
+        with self._lock:
+            data = {
+                'id': self.id,
+                'kind': self.kind,
+                'pool': self.pool,
+                'params': self.params,
+                'status': self.status,
+                'progress': self.progress,
+                'total': self.total,
+                'percent': round(self.progress / self.total * 100, 1) if self.total else None,
+                'message': self.message,
+                'error': self.error,
+                'cancelRequested': self._cancel.is_set(),
+                'hasFile': bool(self.result_file),
+                'created_at': _iso(self.created_at),
+                'started_at': _iso(self.started_at),
+                'finished_at': _iso(self.finished_at),
+            }
+            if include_result:
+                data['result'] = self.result
+            return data
+
+
+def _run_in_process(db_path, job_id, kind, params, func, args, kwargs):
+    """프로세스 풀에서 실행: DB에 진행률을 기록하는 Job으로 작업 함수 호출
+
+    Returns:
+        tuple: (결과, 결과 파일 경로)
+    """
+    job = Job(kind, params, pool='process', job_id=job_id, store=JobStore(db_path))
+    try:
+        result = func(job, *args, **kwargs)
+    finally:
+        job.flush()
+    return result, job.result_file
+
+
+class JobManager:
+    """작업 등록/실행/조회/취소"""
+
+    def __init__(self, db_path, max_workers=MAX_WORKERS, cpu_workers=CPU_WORKERS, keep=KEEP_JOBS):
+        self.db_path = db_path
+        self.cpu_workers = cpu_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        # 프로세스 작업을 넘겨주고 완료를 기다리는 스레드 (입출력 작업 자리를 차지하지 않도록 분리)
+        self._dispatcher = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix='job-cpu')
+        self._processes = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._heartbeat = None
+        self.keep = keep
+
+    @property
+    def store(self):
+        return JobStore(self.db_path)
+
+    def recover(self):
+        """서버 시작 시 1회: 중단된 프로세스의 작업 표시 후 heartbeat 스레드 시작"""
+        try:
+            self.store.recover()
+        except sqlite3.Error as e:
+            print(f"[작업] 작업 기록 정리 실패: {e}")
+
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+                self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        """실행 중 작업의 heartbeat 갱신, 다른 프로세스의 취소 요청 반영, 중단된 프로세스의 작업 정리"""
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                active = [job for job in self._jobs.values() if job.status not in FINISHED]
+            try:
+                store = self.store
+                store.heartbeat([job.id for job in active])
+                for job in active:
+                    if not job.cancelled and store.cancel_requested(job.id):
+                        job._cancel.set()
+                store.recover()
+            except sqlite3.Error as e:
+                print(f"[작업] heartbeat 갱신 실패: {e}")
+
+    def _process_pool(self):
+        with self._lock:
+            if self._processes is None:
+                # fork는 실행 중인 스레드의 잠금 상태까지 복제하므로 spawn 사용
+                self._processes = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                      mp_context=multiprocessing.get_context('spawn'))
+            return self._processes
+
+    def submit(self, kind, func, *args, params=None, key=None, pool='thread', **kwargs):
+        """작업 등록 후 즉시 반환 (func의 첫 인자로 Job이 전달됨)
+
+        key가 같은 작업은 차례로 실행되며, 아직 시작하지 않은 같은 key·같은 params의 작업이 있으면
+        새로 등록하지 않고 그 작업을 반환합니다 (시작 시점의 최신 데이터로 실행되므로).
+        params가 다르면 요청 내용이 다르므로 합치지 않고 뒤에 차례로 실행합니다.
+        pool='process'는 계산 위주 작업용입니다 (func/인자는 pickle 가능해야 함).
+        """
+        with self._lock:
+            if key is not None:
+                for existing in self._jobs.values():
+                    if (existing.key == key and existing.params == (params or {})
+                            and existing.status == 'queued' and not existing.cancelled):
+                        return existing
+                self._key_locks.setdefault(key, threading.Lock())
+
+            job = Job(kind, params, key, pool, store=self.store)
+            self._jobs[job.id] = job
+            self._trim()
+
+        self._save(job)
+        executor = self._dispatcher if pool == 'process' else self._executor
+        executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _save(self, job):
+        try:
+            self.store.save(job)
+        except sqlite3.Error as e:
+            print(f"[작업] 상태 저장 실패 ({job.id}): {e}")
+
+    def _run(self, job, func, args, kwargs):
+        key_lock = self._key_locks.get(job.key) if job.key is not None else None
+        if key_lock:
+            key_lock.acquire()
+        try:
+            if job.cancelled or self._cancel_requested(job.id):
+                with job._lock:
+                    job.status = 'cancelled'
+                    job.finished_at = datetime.now()
+                return
+
+            with job._lock:
+                job.status = 'running'
+                job.started_at = datetime.now()
+            self._save(job)
+
+            try:
+                if job.pool == 'process':
+                    future = self._process_pool().submit(
+                        _run_in_process, self.db_path, job.id, job.kind, job.params, func, args, kwargs)
+                    result, result_file = future.result()
+                    job.result_file = result_file
+                else:
+                    result = func(job, *args, **kwargs)
+                with job._lock:
+                    job.result = result
+                    job.status = 'done'
+            except JobCancelled:
+                with job._lock:
+                    job.status = 'cancelled'
+            except Exception as e:
+                traceback.print_exc()
+                with job._lock:
+                    job.error = str(e)
+                    job.status = 'failed'
+            finally:
+                with job._lock:
+                    job.finished_at = datetime.now()
+        finally:
+            if key_lock:
+                key_lock.release()
+            self._refresh(job, progress_only=True)
+            self._save(job)
+
+    def _cancel_requested(self, job_id):
+        try:
+            return self.store.cancel_requested(job_id)
+        except sqlite3.Error:
+            return False
+
+    def _refresh(self, job, progress_only=False):
+        """프로세스 풀 작업의 진행률은 DB에 있으므로 다시 읽음"""
+        if job.pool != 'process':
+            return job
+        try:
+            stored = self.store.load(job.id)
+        except sqlite3.Error:
+            return job
+        if stored:
+            with job._lock:
+                job.progress, job.total = stored.progress, stored.total
+                job.message = stored.message or job.message
+        return job
+
+    def _trim(self):
+        finished = [jid for jid, j in self._jobs.items() if j.status in FINISHED]
+        while len(self._jobs) > self.keep and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id):
+        """작업 조회 (메모리에 없으면 DB의 지난 작업)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return self._refresh(job) if job.status == 'running' else job
+        try:
+            return self.store.load(job_id)
+        except sqlite3.Error:
+            return None
+
+    def cancel(self, job_id):
+        """취소 요청 (대기 중이면 바로 취소, 실행 중이면 다음 진행률 보고 시점에 중단)
+
+        Returns:
+            Job: 대상 작업 (없으면 None)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            # 다른 서버 프로세스가 실행 중인 작업: DB에 취소 요청을 기록하면 그 프로세스가 확인
+            try:
+                job = self.store.load(job_id)
+            except sqlite3.Error:
+                return None
+        if not job or job.status in FINISHED:
+            return job
+        job._cancel.set()
+        try:
+            self.store.request_cancel(job_id)
+        except sqlite3.Error as e:
+            print(f"[작업] 취소 요청 저장 실패 ({job_id}): {e}")
+        return job
+
+    def list(self, limit=KEEP_JOBS):
+        """최근 작업 목록 (현재 실행의 작업 + DB의 지난 작업)"""
+        with self._lock:
+            jobs = {j.id: j for j in self._jobs.values()}
+        try:
+            for stored in self.store.list(limit):
+                jobs.setdefault(stored.id, stored)
+        except sqlite3.Error:
+            pass
+        ordered = sorted(jobs.values(), key=lambda j: j.created_at, reverse=True)[:limit]
+        return [self._refresh(j).to_dict(include_result=False) if j.status == 'running'
+                else j.to_dict(include_result=False) for j in ordered]
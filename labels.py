@@ -0,0 +1,158 @@
+"""
+분말 검사 시스템 - 배합 LOT 라벨 일괄 출력
+배합 작업 1건의 Pack 라벨 전체를 한 장의 인쇄용 HTML 문서(라벨 1개 = 1페이지)로 만듭니다.
+바코드는 Code128(B) SVG를 직접 생성하며, 같은 내용의 바코드는 메모리 캐시에서 재사용합니다.
+
+라벨 구성은 app.js의 renderLabelPanel과 같습니다 (1 Pack = 1000kg, 마지막 Pack은 잔여 중량).
+"""
+
+from functools import lru_cache
+from html import escape
+
+PACK_SIZE = 1000              # 1 Pack = 1 ton
+BARCODE_CACHE_SIZE = 512      # 캐시할 바코드 SVG 수
+DEFAULT_COMPANY = 'Johnson Electric Operations'
+# 라벨 항목명 기본값 (화면 언어의 labelDate/labelPack/labelWeight가 전달되지 않은 경우)
+DEFAULT_CAPTIONS = {'date': '작업날짜', 'pack': 'Pack', 'weight': '중량'}
+
+# Code128 심볼별 막대/공백 폭 (값 0~105, 106 = Stop)
+CODE128_PATTERNS = [
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '2331112',
+]
+START_B = 104
+STOP = 106
+QUIET_ZONE = 10   # 좌우 여백 (모듈 수)
+
+
+def code128_widths(value):
+    """Code128(B) 막대/공백 폭 목록 (검사 문자 포함, 인쇄 불가 문자는 '?'로 대체)"""
+    codes = [ord(ch) - 32 if 32 <= ord(ch) <= 126 else ord('?') - 32 for ch in value]
+    checksum = (START_B + sum(i * c for i, c in enumerate(codes, start=1))) % 103
+
+    widths = []
+    for code in [START_B] + codes + [checksum, STOP]:
+        widths.extend(int(w) for w in CODE128_PATTERNS[code])
+    return widths
+
+
+@lru_cache(maxsize=BARCODE_CACHE_SIZE)
+def barcode_svg(value, height=72):
+    """Code128 바코드 SVG (라벨 폭에 맞게 늘어나도록 viewBox 사용)"""
+    x = QUIET_ZONE
+    bars = []
+    for i, width in enumerate(code128_widths(value)):
+        if i % 2 == 0:   # 짝수 번째가 막대, 홀수 번째가 공백
+            bars.append(f'<rect x="{x}" y="0" width="{width}" height="{height}"/>')
+        x += width
+    total = x + QUIET_ZONE
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {total} {height}" '
+            f'preserveAspectRatio="none" class="barcode">{"".join(bars)}</svg>')
+
+
+def pack_weights(target_total_weight, pack_size=PACK_SIZE):
+    """Pack별 중량 목록 (최소 1 Pack, 마지막 Pack은 잔여 중량)"""
+    target = float(target_total_weight or 0)
+    full, remainder = divmod(target, pack_size)
+    weights = [pack_size] * int(full)
+    if remainder > 0 or not weights:
+        weights.append(remainder if remainder > 0 else pack_size)
+    return weights
+
+
+def build_labels(work, date_str, company=None, packs=None):
+    """배합 작업의 라벨 목록
+
+    Args:
+        work: blending_work 행 (product_name, batch_lot, target_total_weight)
+        date_str: 라벨에 표시할 작업 날짜
+        packs: 출력할 Pack 번호 목록 (없으면 전체)
+    """
+    company = company or DEFAULT_COMPANY
+    weights = pack_weights(work['target_total_weight'])
+    total = len(weights)
+
+    labels = []
+    for pack, weight in enumerate(weights, start=1):
+        if packs and pack not in packs:
+            continue
+        weight_text = f'{weight:,.2f}'.rstrip('0').rstrip('.')
+        labels.append({
+            'company': company,
+            'date': date_str,
+            'product': work['product_name'] or '',
+            'lot': work['batch_lot'] or '',
+            'pack': pack,
+            'packs': total,
+            'weight': weight_text,
+            # 바코드 내용: 파이프 구분 문자열 (회사명은 길이를 줄이기 위해 제외)
+            'barcode': f"PN:{work['product_name']}|LOT:{work['batch_lot']}|DATE:{date_str}"
+                       f"|PACK:{pack}/{total}|WT:{weight_text}kg",
+        })
+    return labels
+
+
+LABEL_STYLE = '''
+    @page { size: 100mm 100mm; margin: 0; }
+    body { margin: 0; padding: 0; font-family: sans-serif; }
+    .label { width: 100mm; height: 100mm; box-sizing: border-box; padding: 6px; border: 2px solid #000;
+             display: flex; flex-direction: column; justify-content: space-between;
+             page-break-after: always; break-after: page; }
+    .label:last-of-type { page-break-after: auto; break-after: auto; }
+    .top { display: flex; justify-content: space-between; align-items: flex-start; }
+    .company { font-weight: 700; font-size: 12px; }
+    .date { font-size: 11px; color: #222; }
+    .product { flex: 1; display: flex; align-items: center; justify-content: center;
+               font-weight: 800; font-size: 36px; text-align: center; line-height: 1; }
+    .bottom { display: flex; flex-direction: column; align-items: center; gap: 6px; }
+    .barcode { width: 100%; height: 72px; display: block; }
+    .lot { font-size: 24px; font-weight: 700; color: #222; }
+    .pack { font-size: 12px; font-weight: 600; color: #222; }
+'''
+
+
+def render_document(labels, captions=None, auto_print=True):
+    """라벨 목록을 인쇄용 HTML 문서 1개로 (라벨마다 페이지 나눔)
+
+    Args:
+        captions: 항목명 {'date', 'pack', 'weight'} (빠진 항목은 DEFAULT_CAPTIONS)
+    """
+    captions = {key: escape(value) for key, value in
+                {**DEFAULT_CAPTIONS, **{k: v for k, v in (captions or {}).items() if v}}.items()}
+    pages = []
+    for label in labels:
+        pages.append(f'''
+        <div class="label">
+            <div class="top">
+                <div class="company">{escape(label['company'])}</div>
+                <div class="date">{captions['date']}: {escape(label['date'])}</div>
+            </div>
+            <div class="product">{escape(label['product'])}</div>
+            <div class="bottom">
+                {barcode_svg(label['barcode'])}
+                <div class="lot">LOT: {escape(label['lot'])}</div>
+                <div class="pack">{captions['pack']}: {label['pack']}/{label['packs']} • {captions['weight']}: {label['weight']} kg</div>
+            </div>
+        </div>''')
+
+    script = '<script>window.onload = function() { window.print(); };</script>' if auto_print else ''
+    return f'''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>라벨 인쇄</title>
+    <style>{LABEL_STYLE}</style>
+</head>
+<body>{''.join(pages)}
+{script}
+</body>
+</html>'''
@@ -0,0 +1,113 @@
+"""
+분말 검사 시스템 - LOT 단위 저장 직렬화 (프로세스 내 분할 잠금)
+같은 LOT의 검사 항목을 여러 태블릿에서 동시에 저장하면 inspection_progress.completed_items의
+읽기-수정-쓰기가 겹쳐 항목이 빠질 수 있으므로, (분말명, LOT) 키로 저장 구간을 직렬화합니다.
+
+키를 고정 개수의 잠금(stripe)에 해시로 나눠 배정하므로 잠금 객체가 LOT 수만큼 늘어나지 않으며,
+서로 다른 LOT은 (같은 stripe에 배정되는 드문 경우를 제외하고) 서로 기다리지 않습니다.
+같은 LOT끼리는 SQLite busy 재시도 대신 메모리에서 차례로 처리됩니다.
+
+stripe별 획득 횟수/대기 횟수/대기 시간을 기록하여 /api/admin/lot-locks로 확인할 수 있습니다.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+STRIPES = 256        # 잠금 개수 (동시에 저장하는 LOT 수보다 충분히 크게)
+SLOW_WAIT = 0.5      # 이 시간(초) 이상 기다리면 로그 출력
+
+
+class StripedLock:
+    """키별 분할 잠금 (대기 시간 계측 포함)"""
+
+    def __init__(self, stripes=STRIPES, name='LOT'):
+        self.name = name
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # stripe별 [획득 횟수, 대기한 횟수, 누적 대기(초), 최대 대기(초)] - 해당 stripe 잠금을 잡은 상태에서만 갱신
+        self._stats = [[0, 0, 0.0, 0.0] for _ in range(stripes)]
+
+    def stripe(self, *key):
+        """키가 배정되는 stripe 번호"""
+        return hash(key) % len(self._locks)
+
+    @contextmanager
+    def hold(self, *key):
+        """키의 잠금을 잡고 실행 (as 값: 대기 시간(초))"""
+        index = self.stripe(*key)
+        lock = self._locks[index]
+
+        start = time.perf_counter()
+        contended = not lock.acquire(blocking=False)
+        if contended:
+            lock.acquire()
+        waited = time.perf_counter() - start
+
+        try:
+            stats = self._stats[index]
+            stats[0] += 1
+            if contended:
+                stats[1] += 1
+                stats[2] += waited
+                stats[3] = max(stats[3], waited)
+            if waited >= SLOW_WAIT:
+                print(f"[{self.name} 잠금] {key} 대기 {waited * 1000:.0f}ms")
+            yield waited
+        finally:
+            lock.release()
+
+    @contextmanager
+    def hold_many(self, keys):
+        """여러 키의 잠금을 모두 잡고 실행 (as 값: 대기 시간(초))
+
+        stripe 번호 순서로 잡으므로 hold()와 함께 써도 교착 상태가 생기지 않습니다.
+        가져오기처럼 여러 LOT을 한 트랜잭션에서 저장하는 경우용입니다.
+        """
+        indexes = sorted({self.stripe(*key) for key in keys})
+
+        start = time.perf_counter()
+        acquired = []
+        try:
+            for index in indexes:
+                lock = self._locks[index]
+                stripe_start = time.perf_counter()
+                contended = not lock.acquire(blocking=False)
+                if contended:
+                    lock.acquire()
+                acquired.append(index)
+                stats = self._stats[index]
+                stats[0] += 1
+                if contended:
+                    stripe_wait = time.perf_counter() - stripe_start
+                    stats[1] += 1
+                    stats[2] += stripe_wait
+                    stats[3] = max(stats[3], stripe_wait)
+            waited = time.perf_counter() - start
+            if waited >= SLOW_WAIT:
+                print(f"[{self.name} 잠금] {len(keys)}개 키 ({len(indexes)}개 stripe) 대기 {waited * 1000:.0f}ms")
+            yield waited
+        finally:
+            for index in reversed(acquired):
+                self._locks[index].release()
+
+    def status(self):
+        """전체 및 대기가 많았던 stripe 통계 (관리자 API용)"""
+        stats = [list(s) for s in self._stats]
+        acquisitions = sum(s[0] for s in stats)
+        contended = sum(s[1] for s in stats)
+        total_wait = sum(s[2] for s in stats)
+        busiest = sorted((i for i, s in enumerate(stats) if s[1]), key=lambda i: stats[i][2], reverse=True)[:5]
+
+        return {
+            'stripes': len(stats),
+            'acquisitions': acquisitions,
+            'contended': contended,
+            'total_wait_ms': round(total_wait * 1000, 3),
+            'avg_wait_ms': round(total_wait / contended * 1000, 3) if contended else 0.0,
+            'max_wait_ms': round(max((s[3] for s in stats), default=0.0) * 1000, 3),
+            'busiest_stripes': [
+                {'stripe': i, 'acquisitions': stats[i][0], 'contended': stats[i][1],
+                 'total_wait_ms': round(stats[i][2] * 1000, 3), 'max_wait_ms': round(stats[i][3] * 1000, 3)}
+                for i in busiest
+            ],
+        }
@@ -0,0 +1,219 @@
+"""
+분말 검사 시스템 - 데이터베이스 유지보수 스케줄러
+서버 실행 중 WAL 파일 크기를 감시하여 checkpoint를 실행하고,
+주기적으로 PRAGMA optimize / ANALYZE를 실행하여 조회 성능을 유지합니다.
+
+convert_to_wal.py의 1회성 wal_checkpoint(FULL)과 달리,
+긴 교대 근무 중에도 계속 읽기가 이어져 WAL이 무한히 커지는 것을 막습니다.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+DB_PATH = 'database.db'
+CHECK_INTERVAL = 60                       # WAL 크기 확인 주기(초)
+WAL_PASSIVE_THRESHOLD = 16 * 1024 * 1024  # 이 크기를 넘으면 PASSIVE checkpoint
+WAL_TRUNCATE_THRESHOLD = 64 * 1024 * 1024 # 이 크기를 넘으면 TRUNCATE checkpoint (WAL 파일 축소)
+TRUNCATE_BUSY_TIMEOUT = 2000              # TRUNCATE 시 읽기 종료 대기 한도(ms)
+JOURNAL_SIZE_LIMIT = 4 * 1024 * 1024      # checkpoint 후 WAL을 처음부터 다시 쓸 때 이 크기로 축소 (연결별 설정)
+OPTIMIZE_INTERVAL = 6 * 3600              # PRAGMA optimize 주기(초)
+ANALYZE_INTERVAL = 24 * 3600              # ANALYZE 주기(초)
+ANALYSIS_LIMIT = 1000                     # ANALYZE 시 인덱스당 검사 행 수 한도 (대형 DB에서도 빠르게)
+
+
+def _iso(dt):
+    return dt.isoformat(timespec='seconds') if dt else None
+
+
+def wal_size(db_path=DB_PATH):
+    """WAL 파일 크기(byte), 파일이 없으면 0"""
+    try:
+        return os.path.getsize(db_path + '-wal')
+    except OSError:
+        return 0
+
+
+def wal_mtime(db_path=DB_PATH):
+    """WAL 파일 수정 시각(ns), 파일이 없으면 None"""
+    try:
+        return os.stat(db_path + '-wal').st_mtime_ns
+    except OSError:
+        return None
+
+
+def checkpoint(conn, mode='PASSIVE'):
+    """WAL checkpoint 실행
+
+    Returns:
+        dict: busy(1이면 완료 못 함), WAL 프레임 수, checkpoint된 프레임 수
+    """
+    if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f'알 수 없는 checkpoint 모드: {mode}')
+    busy, log_frames, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    return {'mode': mode, 'busy': busy, 'log_frames': log_frames, 'checkpointed_frames': checkpointed}
+
+
+def page_stats(conn):
+    """데이터베이스 페이지 통계"""
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return {
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'db_size': page_size * page_count,
+    }
+
+
+class MaintenanceScheduler:
+    """WAL checkpoint / optimize / ANALYZE 백그라운드 스레드"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.last_check = None
+        self.last_checkpoint = None
+        self.last_checkpoint_time = None
+        self.last_optimize = None
+        self.last_analyze = None
+        self.last_error = None
+        self.checkpoint_count = 0
+        # 마지막 checkpoint가 WAL의 모든 프레임을 반영했을 때의 WAL 수정 시각
+        # (PASSIVE checkpoint는 WAL 파일을 줄이지 않으므로, 그 뒤 쓰기가 없으면 크기가 커도 건너뜀)
+        self._clean_wal_mtime = None
+
+    def _connect(self, busy_timeout=30000):
+        conn = sqlite3.connect(self.db_path, timeout=busy_timeout / 1000)
+        conn.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+        conn.execute(f'PRAGMA journal_size_limit = {JOURNAL_SIZE_LIMIT}')
+        return conn
+
+    def start(self):
+        """유지보수 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_checkpoint(self, mode=None):
+        """WAL checkpoint 실행 (mode 미지정 시 WAL 크기에 따라 선택)
+
+        자동 선택 시, 직전 checkpoint가 모든 프레임을 반영했고(log == checkpointed)
+        그 뒤로 WAL이 바뀌지 않았으면 반영할 프레임이 없으므로 실행하지 않습니다.
+        """
+        size = wal_size(self.db_path)
+        if mode is None:
+            if size < WAL_PASSIVE_THRESHOLD:
+                return None
+            with self._lock:
+                clean_mtime = self._clean_wal_mtime
+            if clean_mtime is not None and clean_mtime == wal_mtime(self.db_path):
+                return None
+            mode = 'TRUNCATE' if size >= WAL_TRUNCATE_THRESHOLD else 'PASSIVE'
+
+        # TRUNCATE는 읽기가 끝나기를 기다리므로 대기 한도를 짧게 두어 요청 처리를 막지 않음
+        busy_timeout = TRUNCATE_BUSY_TIMEOUT if mode in ('TRUNCATE', 'RESTART', 'FULL') else 30000
+        with self._run_lock, closing(self._connect(busy_timeout)) as conn:
+            result = checkpoint(conn, mode)
+
+        result['wal_size_before'] = size
+        result['wal_size_after'] = wal_size(self.db_path)
+        complete = not result['busy'] and result['log_frames'] == result['checkpointed_frames']
+        with self._lock:
+            self._clean_wal_mtime = wal_mtime(self.db_path) if complete else None
+            self.last_checkpoint = result
+            self.last_checkpoint_time = datetime.now()
+            self.checkpoint_count += 1
+        return result
+
+    def run_optimize(self):
+        """PRAGMA optimize 실행"""
+        with self._run_lock, closing(self._connect()) as conn:
+            conn.execute('PRAGMA optimize')
+        with self._lock:
+            self.last_optimize = datetime.now()
+
+    def run_analyze(self):
+        """ANALYZE 실행 (통계 전체 갱신)"""
+        with self._run_lock, closing(self._connect()) as conn:
+            conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+            conn.execute('ANALYZE')
+            conn.commit()
+        with self._lock:
+            self.last_analyze = datetime.now()
+
+    def run_cycle(self):
+        """한 주기 작업: WAL 확인 후 필요 시 checkpoint, 주기 도래 시 optimize/ANALYZE"""
+        now = datetime.now()
+        with self._lock:
+            self.last_check = now
+
+        try:
+            self.run_checkpoint()
+
+            if not self.last_analyze or (now - self.last_analyze).total_seconds() >= ANALYZE_INTERVAL:
+                self.run_analyze()
+            elif not self.last_optimize or (now - self.last_optimize).total_seconds() >= OPTIMIZE_INTERVAL:
+                self.run_optimize()
+
+            with self._lock:
+                self.last_error = None
+        except Exception as e:
+            with self._lock:
+                self.last_error = f'{_iso(datetime.now())} {e}'
+            print(f"[유지보수] 오류: {e}")
+
+    def _loop(self):
+        # 서버 시작 직후의 요청 처리와 겹치지 않도록 한 주기 뒤에 시작
+        while not self._stop.wait(CHECK_INTERVAL):
+            self.run_cycle()
+
+    def status(self):
+        """현재 상태 및 WAL/페이지 통계 (관리자 API용)"""
+        try:
+            with closing(self._connect(TRUNCATE_BUSY_TIMEOUT)) as conn:
+                stats = page_stats(conn)
+        except sqlite3.Error as e:
+            stats = {'error': str(e)}
+
+        size = wal_size(self.db_path)
+
+        with self._lock:
+            # 프레임 수는 파일 크기가 아닌 마지막 checkpoint 결과 기준
+            # (PASSIVE checkpoint 후에도 WAL 파일은 줄지 않고 다음 쓰기부터 처음부터 재사용됨)
+            wal_frames = lag = None
+            if self.last_checkpoint and self.last_checkpoint['log_frames'] >= 0:
+                wal_frames = self.last_checkpoint['log_frames']
+                lag = self.last_checkpoint['log_frames'] - self.last_checkpoint['checkpointed_frames']
+
+            return {
+                'scheduler_running': bool(self._thread and self._thread.is_alive()),
+                'wal_size': size,
+                'wal_frames': wal_frames,
+                'checkpoint_lag_frames': lag,
+                'pages': stats,
+                'thresholds': {
+                    'passive': WAL_PASSIVE_THRESHOLD,
+                    'truncate': WAL_TRUNCATE_THRESHOLD,
+                },
+                'last_check': _iso(self.last_check),
+                'last_checkpoint': self.last_checkpoint,
+                'last_checkpoint_time': _iso(self.last_checkpoint_time),
+                'checkpoint_count': self.checkpoint_count,
+                'last_optimize': _iso(self.last_optimize),
+                'last_analyze': _iso(self.last_analyze),
+                'last_error': self.last_error,
+            }
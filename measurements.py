@@ -0,0 +1,174 @@
+"""
+분말 검사 시스템 - 측정값 세로형(long format) 저장
+inspection_result의 항목별 고정 컬럼(_1/_2/_3/_avg/_result) 대신
+실제로 측정한 값만 measurement / measurement_summary 테이블에 한 행씩 저장합니다.
+
+전환 기간에는 기존 가로형 컬럼에도 계속 저장하고(dual-write),
+sync_result()로 같은 트랜잭션에서 세로형 테이블을 갱신합니다.
+기존 컬럼 구성이 필요한 조회는 inspection_result_wide 호환 뷰를 사용할 수 있습니다.
+"""
+
+from spc import SPC_ITEMS
+
+# 원본 측정값(raw1, raw2)이 따로 있는 항목: 항목명 -> (raw1 컬럼 이름, raw2 컬럼 이름)
+# 가로형 컬럼명은 '{접두어}_{raw}_{반복}' 규칙을 따릅니다.
+RAW_COLUMNS = {
+    'ApparentDensity': ('empty_cup', 'powder_weight'),
+    'Moisture': ('initial_weight', 'dried_weight'),
+    'Ash': ('initial_weight', 'ash_weight'),
+}
+
+
+def item_columns(item_name):
+    """항목의 가로형 컬럼 구성
+
+    Returns:
+        dict: replicates -> [(raw1 컬럼, raw2 컬럼, 값 컬럼)], avg, result
+    """
+    prefix, count = SPC_ITEMS[item_name]
+    raw = RAW_COLUMNS.get(item_name)
+    replicates = []
+    for i in range(1, count + 1):
+        if raw:
+            replicates.append((f'{prefix}_{raw[0]}_{i}', f'{prefix}_{raw[1]}_{i}', f'{prefix}_{i}'))
+        else:
+            replicates.append((None, None, f'{prefix}_{i}'))
+    return {'replicates': replicates, 'avg': f'{prefix}_avg', 'result': f'{prefix}_result'}
+
+
+def _wide_select_list(item_name):
+    columns = item_columns(item_name)
+    names = []
+    for raw1, raw2, value in columns['replicates']:
+        names.extend(c for c in (raw1, raw2, value) if c)
+    names.extend([columns['avg'], columns['result']])
+    return names
+
+
+def sync_result(conn, result_id, items=None):
+    """가로형 행의 측정값을 세로형 테이블로 반영 (커밋은 호출자가 담당)
+
+    Args:
+        result_id: inspection_result.id
+        items: 갱신할 항목명 목록 (None이면 전체 항목)
+    """
+    items = list(items) if items else list(SPC_ITEMS)
+    select_list = []
+    for item_name in items:
+        select_list.extend(_wide_select_list(item_name))
+
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(select_list)} FROM inspection_result WHERE id = ?", (result_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return
+    values = dict(zip(select_list, tuple(row)))
+
+    measurement_rows = []
+    empty_replicates = []
+    summary_rows = []
+    empty_summaries = []
+
+    for item_name in items:
+        columns = item_columns(item_name)
+        for replicate, (raw1, raw2, value) in enumerate(columns['replicates'], start=1):
+            data = (values.get(raw1) if raw1 else None, values.get(raw2) if raw2 else None, values[value])
+            if any(v is not None for v in data):
+                measurement_rows.append((result_id, item_name, replicate) + data)
+            else:
+                empty_replicates.append((result_id, item_name, replicate))
+
+        avg, result = values[columns['avg']], values[columns['result']]
+        if avg is not None or result is not None:
+            summary_rows.append((result_id, item_name, avg, result))
+        else:
+            empty_summaries.append((result_id, item_name))
+
+    cursor.executemany('''
+        INSERT OR REPLACE INTO measurement (result_id, item, replicate, raw1, raw2, value)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', measurement_rows)
+    cursor.executemany('DELETE FROM measurement WHERE result_id = ? AND item = ? AND replicate = ?', empty_replicates)
+    cursor.executemany('''
+        INSERT OR REPLACE INTO measurement_summary (result_id, item, avg_value, result)
+        VALUES (?, ?, ?, ?)
+    ''', summary_rows)
+    cursor.executemany('DELETE FROM measurement_summary WHERE result_id = ? AND item = ?', empty_summaries)
+
+
+def backfill(conn):
+    """기존 가로형 데이터 전체를 세로형 테이블로 복사 (항목/반복별 INSERT ... SELECT)"""
+    cursor = conn.cursor()
+    for item_name in SPC_ITEMS:
+        columns = item_columns(item_name)
+        for replicate, (raw1, raw2, value) in enumerate(columns['replicates'], start=1):
+            raw1_sql = raw1 or 'NULL'
+            raw2_sql = raw2 or 'NULL'
+            cursor.execute(f'''
+                INSERT OR REPLACE INTO measurement (result_id, item, replicate, raw1, raw2, value)
+                SELECT id, ?, ?, {raw1_sql}, {raw2_sql}, {value} FROM inspection_result
+                WHERE COALESCE({raw1_sql}, {raw2_sql}, {value}) IS NOT NULL
+            ''', (item_name, replicate))
+
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO measurement_summary (result_id, item, avg_value, result)
+            SELECT id, ?, {columns['avg']}, {columns['result']} FROM inspection_result
+            WHERE {columns['avg']} IS NOT NULL OR {columns['result']} IS NOT NULL
+        ''', (item_name,))
+
+
+def wide_view_sql():
+    """세로형 테이블로 기존 가로형 컬럼 구성을 재현하는 호환 뷰 SQL"""
+    parts = []
+    for item_name in SPC_ITEMS:
+        columns = item_columns(item_name)
+        for replicate, (raw1, raw2, value) in enumerate(columns['replicates'], start=1):
+            for source, name in (('raw1', raw1), ('raw2', raw2), ('value', value)):
+                if name:
+                    parts.append(
+                        f"MAX(CASE WHEN m.item = '{item_name}' AND m.replicate = {replicate} THEN m.{source} END) AS {name}"
+                    )
+        parts.append(f"(SELECT avg_value FROM measurement_summary s WHERE s.result_id = r.id AND s.item = '{item_name}') AS {columns['avg']}")
+        parts.append(f"(SELECT result FROM measurement_summary s WHERE s.result_id = r.id AND s.item = '{item_name}') AS {columns['result']}")
+
+    select_list = ',\n        '.join(parts)
+    return f'''
+    CREATE VIEW inspection_result_wide AS
+    SELECT
+        r.id, r.powder_name, r.lot_number, r.inspector, r.inspection_time, r.inspection_type,
+        {select_list},
+        r.particle_size_result, r.final_result, r.category
+    FROM inspection_result r
+    LEFT JOIN measurement m ON m.result_id = r.id
+    GROUP BY r.id
+    '''
+
+
+def load_measurements(conn, result_id, measurement_table='measurement', summary_table='measurement_summary'):
+    """측정된 항목만 항목별로 묶어서 반환
+
+    Args:
+        measurement_table, summary_table: 조회할 테이블/뷰 (보관 데이터 포함 시 archive.history_table 결과)
+
+    Returns:
+        dict: 항목명 -> {'replicates': [{replicate, raw1, raw2, value}], 'avg': 평균, 'result': 판정}
+    """
+    cursor = conn.cursor()
+    items = {}
+
+    cursor.execute(f'''
+        SELECT item, replicate, raw1, raw2, value FROM {measurement_table}
+        WHERE result_id = ?
+        ORDER BY item, replicate
+    ''', (result_id,))
+    for item, replicate, raw1, raw2, value in cursor.fetchall():
+        entry = items.setdefault(item, {'replicates': [], 'avg': None, 'result': None})
+        entry['replicates'].append({'replicate': replicate, 'raw1': raw1, 'raw2': raw2, 'value': value})
+
+    cursor.execute(f'SELECT item, avg_value, result FROM {summary_table} WHERE result_id = ?', (result_id,))
+    for item, avg_value, result in cursor.fetchall():
+        entry = items.setdefault(item, {'replicates': [], 'avg': None, 'result': None})
+        entry['avg'] = avg_value
+        entry['result'] = result
+
+    return items
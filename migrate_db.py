@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 데이터베이스 스키마 확장 스크립트
+기존 데이터베이스에 추가 테이블/인덱스를 생성합니다.
+모든 단계는 IF NOT EXISTS 기반이므로 여러 번 실행해도 안전합니다.
+서버 시작 시(app.py)와 init_db.py에서도 자동으로 호출됩니다.
+"""
+import sqlite3
+import os
+
+DB_PATH = 'database.db'
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _create_rollup_tables(cursor):
+    """일별 품질 집계 테이블 (rollup.py)"""
+    is_new = not _table_exists(cursor, 'daily_quality_rollup')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_quality_rollup (
+        day TEXT NOT NULL,              -- KST 기준 일자 (YYYY-MM-DD)
+        powder_name TEXT NOT NULL,
+        category VARCHAR(20) NOT NULL,
+        lot_count INTEGER NOT NULL,
+        pass_count INTEGER NOT NULL,
+        fail_count INTEGER NOT NULL,
+        PRIMARY KEY (day, powder_name, category)
+    ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_item_rollup (
+        day TEXT NOT NULL,
+        powder_name TEXT NOT NULL,
+        category VARCHAR(20) NOT NULL,
+        item TEXT NOT NULL,
+        sample_count INTEGER NOT NULL,
+        value_sum REAL,
+        value_min REAL,
+        value_max REAL,
+        PRIMARY KEY (day, powder_name, category, item)
+    ) WITHOUT ROWID
+    ''')
+
+    # 그룹 단위 재계산 시 해당 분말/일자의 행만 읽기 위한 표현식 인덱스
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inspection_result_powder_day
+        ON inspection_result(powder_name, date(inspection_time, '+9 hours'))
+    ''')
+
+    if is_new:
+        import rollup
+        rollup.rebuild_all(cursor.connection)
+
+
+# LOT 검색 인덱스 소스: 종류 -> (rowid 구분 코드, 테이블, LOT 컬럼, 이름 컬럼)
+# FTS rowid = 원본 id * 4 + 코드 로 두어 트리거에서 rowid로 바로 삭제/갱신
+LOT_SEARCH_SOURCES = {
+    'batch': (1, 'blending_work', 'batch_lot', 'product_name'),
+    'material': (2, 'material_input', 'material_lot', 'powder_name'),
+    'inspection': (3, 'inspection_result', 'lot_number', 'powder_name'),
+}
+
+
+def _create_lot_search_index(cursor):
+    """LOT/제품명 부분 검색용 FTS5 trigram 인덱스 (app.py /api/lot-search)
+
+    SQLite가 FTS5 trigram을 지원하지 않으면(3.34 미만) 건너뛰고,
+    검색 API는 LIKE 검색으로 동작합니다.
+    """
+    is_new = not _table_exists(cursor, 'lot_search')
+
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS lot_search USING fts5(
+                kind UNINDEXED,
+                ref_id UNINDEXED,
+                lot,
+                name,
+                tokenize = 'trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  LOT 검색 인덱스를 생성할 수 없습니다 (FTS5 trigram 미지원): {e}")
+        return
+
+    for kind, (code, table, lot_col, name_col) in LOT_SEARCH_SOURCES.items():
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_lot_search_{table}_ai AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO lot_search (rowid, kind, ref_id, lot, name)
+                VALUES (NEW.id * 4 + {code}, '{kind}', NEW.id, NEW.{lot_col}, NEW.{name_col});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_lot_search_{table}_au AFTER UPDATE OF {lot_col}, {name_col} ON {table}
+            BEGIN
+                DELETE FROM lot_search WHERE rowid = OLD.id * 4 + {code};
+                INSERT INTO lot_search (rowid, kind, ref_id, lot, name)
+                VALUES (NEW.id * 4 + {code}, '{kind}', NEW.id, NEW.{lot_col}, NEW.{name_col});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_lot_search_{table}_ad AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM lot_search WHERE rowid = OLD.id * 4 + {code};
+            END
+        ''')
+
+        if is_new:
+            cursor.execute(f'''
+                INSERT INTO lot_search (rowid, kind, ref_id, lot, name)
+                SELECT id * 4 + {code}, '{kind}', id, {lot_col}, {name_col} FROM {table}
+            ''')
+
+
+def _create_archive_state(cursor):
+    """보관(archive.py) 기준 시각 기록 테이블"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS archive_state (
+        table_name TEXT PRIMARY KEY,
+        archived_before TIMESTAMP NOT NULL,   -- 이 시각 이전 데이터는 archive.db에 있을 수 있음 (UTC)
+        row_count INTEGER NOT NULL DEFAULT 0,
+        last_run TIMESTAMP
+    )
+    ''')
+
+
+def _create_measurement_tables(cursor):
+    """측정값 세로형 저장 테이블 및 가로형 호환 뷰 (measurements.py)"""
+    import measurements
+
+    is_new = not _table_exists(cursor, 'measurement')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS measurement (
+        result_id INTEGER NOT NULL REFERENCES inspection_result(id),
+        item TEXT NOT NULL,             -- 검사 항목명 (FlowRate, ParticleSize180 등)
+        replicate INTEGER NOT NULL,     -- 반복 측정 번호 (1부터)
+        raw1 REAL,                      -- 원본 측정값 1 (빈 컵 무게, 초기 무게 등)
+        raw2 REAL,                      -- 원본 측정값 2 (분말 무게, 건조/회분 무게 등)
+        value REAL,                     -- 측정값 또는 계산값
+        PRIMARY KEY (result_id, item, replicate)
+    ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS measurement_summary (
+        result_id INTEGER NOT NULL REFERENCES inspection_result(id),
+        item TEXT NOT NULL,
+        avg_value REAL,
+        result TEXT,
+        PRIMARY KEY (result_id, item)
+    ) WITHOUT ROWID
+    ''')
+
+    # 항목별 전체 이력 조회(SPC 등)용
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_measurement_item ON measurement(item, result_id)')
+
+    # 보관(archive.py)은 검사 결과를 삭제하기 전에 측정값을 archive.db로 복사
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_measurement_inspection_result_ad AFTER DELETE ON inspection_result
+        BEGIN
+            DELETE FROM measurement WHERE result_id = OLD.id;
+            DELETE FROM measurement_summary WHERE result_id = OLD.id;
+        END
+    ''')
+
+    # 항목 정의가 바뀌어도 반영되도록 호환 뷰는 매번 다시 생성
+    cursor.execute('DROP VIEW IF EXISTS inspection_result_wide')
+    cursor.execute(measurements.wide_view_sql())
+
+    if is_new:
+        measurements.backfill(cursor.connection)
+
+
+def _create_spec_versions(cursor):
+    """분말 규격 버전 이력 (specs.py)"""
+    import specs
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS powder_spec_version (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        powder_name TEXT NOT NULL,
+        effective_from TIMESTAMP NOT NULL,   -- 적용 시작 (UTC, 포함)
+        effective_to TIMESTAMP,              -- 적용 종료 (UTC, 미포함) / NULL이면 현재 규격
+        spec_json TEXT NOT NULL,             -- powder_spec 행 + 입도분석 규격 스냅샷
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_powder_spec_version
+        ON powder_spec_version(powder_name, effective_from)
+    ''')
+
+    # 이력이 없는 분말은 현재 규격을 최초 버전으로 (모든 과거 검사에 적용)
+    specs.backfill(cursor.connection)
+
+
+def _create_import_file_log(cursor):
+    """장비 파일 투입 폴더 처리 기록 (watcher.py) - 재시작 시 중복 가져오기 방지"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS import_file_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_name TEXT NOT NULL,
+        file_hash TEXT NOT NULL UNIQUE,      -- 내용 SHA-256 (같은 파일을 다시 넣어도 한 번만 가져옴)
+        file_size INTEGER,
+        status TEXT NOT NULL,                -- processing, done, failed
+        last_line INTEGER NOT NULL DEFAULT 0, -- 커밋된 마지막 CSV 행 번호 (이어서 처리할 위치)
+        rows_read INTEGER NOT NULL DEFAULT 0,
+        rows_imported INTEGER NOT NULL DEFAULT 0,
+        rows_failed INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        archived_path TEXT,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_import_file_log_started ON import_file_log(started_at)')
+
+    # 처리 중 기록을 차지한 작업자와 생존 확인 시각 (중단된 작업자의 기록만 이어서 처리)
+    cursor.execute('PRAGMA table_info(import_file_log)')
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'claimed_by' not in columns:
+        cursor.execute('ALTER TABLE import_file_log ADD COLUMN claimed_by TEXT')
+    if 'heartbeat_at' not in columns:
+        cursor.execute('ALTER TABLE import_file_log ADD COLUMN heartbeat_at TIMESTAMP')
+
+
+def _create_job_table(cursor):
+    """백그라운드 작업 상태 (jobs.py) - 서버 재시작 후에도 작업 기록/결과 조회"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS job (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,                  -- rejudge, recompute, import 등
+        job_key TEXT,                        -- 같은 key의 작업은 차례로 실행 (JSON)
+        pool TEXT NOT NULL,                  -- thread, process
+        params TEXT,                         -- 작업 인자 요약 (JSON)
+        status TEXT NOT NULL,                -- queued, running, done, failed, cancelled
+        progress INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        result TEXT,                         -- 작업 결과 (JSON)
+        result_file TEXT,                    -- 다운로드용 결과 파일 경로
+        error TEXT,
+        cancel_requested INTEGER NOT NULL DEFAULT 0,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_created ON job(created_at)')
+
+    # 실행 중인 서버 프로세스와 생존 확인 시각 (여러 프로세스 중 중단된 프로세스의 작업만 정리)
+    cursor.execute('PRAGMA table_info(job)')
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'owner' not in columns:
+        cursor.execute('ALTER TABLE job ADD COLUMN owner TEXT')
+    if 'heartbeat_at' not in columns:
+        cursor.execute('ALTER TABLE job ADD COLUMN heartbeat_at TEXT')
+
+
+# 클라이언트가 캐시하는 기준 정보 테이블 (/api/ref-data/version)
+REF_DATA_TABLES = ('powder_spec', 'inspector', 'operator', 'recipe')
+# 서버 메모리 캐시만 사용하는 테이블 (coherence.py에서 다른 프로세스의 변경 확인)
+CACHE_TABLES = ('powder_spec_version',)
+
+
+def _create_ref_data_versions(cursor):
+    """기준 정보/캐시 대상 테이블별 버전 (변경될 때마다 트리거로 증가, 관리 화면 외 CLI 변경도 반영)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ref_data_version (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 1,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.executemany('INSERT OR IGNORE INTO ref_data_version (table_name) VALUES (?)',
+                       [(t,) for t in REF_DATA_TABLES + CACHE_TABLES])
+
+    for table in REF_DATA_TABLES + CACHE_TABLES:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_ref_version_{event.lower()}
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE ref_data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                WHERE table_name = '{table}';
+            END
+            ''')
+
+
+def _create_blending_counters(cursor):
+    """배합 작업의 투입 집계 컬럼과 유지 트리거
+
+    actual_total_weight / input_count는 원재료 투입 추가·삭제·수정 시,
+    expected_input_count는 작업 생성 시와 진행 중 작업의 Recipe 변경 시 갱신됩니다.
+    """
+    cursor.execute('PRAGMA table_info(blending_work)')
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'input_count' not in columns:
+        cursor.execute('ALTER TABLE blending_work ADD COLUMN input_count INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('ALTER TABLE blending_work ADD COLUMN expected_input_count INTEGER NOT NULL DEFAULT 0')
+        # 기존 작업 집계
+        cursor.execute('''
+            UPDATE blending_work SET
+                input_count = (SELECT COUNT(*) FROM material_input WHERE blending_work_id = blending_work.id),
+                actual_total_weight = COALESCE(
+                    (SELECT SUM(actual_weight) FROM material_input WHERE blending_work_id = blending_work.id),
+                    actual_total_weight),
+                expected_input_count = (SELECT COUNT(*) FROM recipe
+                                        WHERE product_name = blending_work.product_name AND is_active = 1)
+        ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_counts_ai AFTER INSERT ON material_input
+        BEGIN
+            UPDATE blending_work
+            SET actual_total_weight = COALESCE(actual_total_weight, 0) + NEW.actual_weight,
+                input_count = input_count + 1
+            WHERE id = NEW.blending_work_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_counts_ad AFTER DELETE ON material_input
+        BEGIN
+            UPDATE blending_work
+            SET actual_total_weight = COALESCE(actual_total_weight, 0) - OLD.actual_weight,
+                input_count = input_count - 1
+            WHERE id = OLD.blending_work_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_counts_au
+        AFTER UPDATE OF actual_weight, blending_work_id ON material_input
+        BEGIN
+            UPDATE blending_work
+            SET actual_total_weight = COALESCE(actual_total_weight, 0) - OLD.actual_weight,
+                input_count = input_count - 1
+            WHERE id = OLD.blending_work_id;
+            UPDATE blending_work
+            SET actual_total_weight = COALESCE(actual_total_weight, 0) + NEW.actual_weight,
+                input_count = input_count + 1
+            WHERE id = NEW.blending_work_id;
+        END
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_blending_work_expected_ai AFTER INSERT ON blending_work
+        BEGIN
+            UPDATE blending_work
+            SET expected_input_count = (SELECT COUNT(*) FROM recipe
+                                        WHERE product_name = NEW.product_name AND is_active = 1)
+            WHERE id = NEW.id;
+        END
+    ''')
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD'), ('UPDATE', 'NEW')):
+        extra = ''
+        if event == 'UPDATE':
+            # 제품명이 바뀐 경우 이전 제품의 진행 중 작업도 갱신
+            extra = '''
+            UPDATE blending_work
+            SET expected_input_count = (SELECT COUNT(*) FROM recipe
+                                        WHERE product_name = OLD.product_name AND is_active = 1)
+            WHERE product_name = OLD.product_name AND status = 'in_progress';'''
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_recipe_expected_{event.lower()} AFTER {event} ON recipe
+            BEGIN
+                UPDATE blending_work
+                SET expected_input_count = (SELECT COUNT(*) FROM recipe
+                                            WHERE product_name = {row}.product_name AND is_active = 1)
+                WHERE product_name = {row}.product_name AND status = 'in_progress';{extra}
+            END
+        ''')
+
+
+def _create_lot_inventory(cursor):
+    """원재료 LOT 재고 원장 (입고 수량 - 사용 수량)
+
+    lot_inventory는 (분말명, LOT) 기본 키로 잔량을 바로 조회하는 집계 테이블이며,
+    material_input_lot(투입 1건의 LOT별 사용 중량) 추가/삭제 트리거로 used_qty가 갱신됩니다.
+    진행 중 작업의 투입이 삭제되면(작업 삭제 포함) 사용 기록도 삭제되어 재고가 복원되고,
+    완료된 작업의 투입은 보관(archive.py)으로 옮겨져도 사용 기록이 남습니다.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS lot_inventory (
+        powder_name TEXT NOT NULL,
+        lot_number TEXT NOT NULL,
+        received_qty REAL,                   -- 입고 수량 (kg, 미입력 시 NULL)
+        used_qty REAL NOT NULL DEFAULT 0,    -- 배합 투입 누계 (kg)
+        received_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (powder_name, lot_number)
+    ) WITHOUT ROWID
+    ''')
+
+    is_new = not _table_exists(cursor, 'material_input_lot')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS material_input_lot (
+        material_input_id INTEGER NOT NULL,
+        powder_name TEXT NOT NULL,
+        lot_number TEXT NOT NULL,
+        weight REAL NOT NULL,
+        PRIMARY KEY (material_input_id, lot_number)
+    ) WITHOUT ROWID
+    ''')
+    # LOT별 사용 이력 조회 (보관 대상에서 사용 중인 LOT 제외 등)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_material_input_lot_lot ON material_input_lot(lot_number, powder_name)')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_lot_ai AFTER INSERT ON material_input_lot
+        BEGIN
+            INSERT OR IGNORE INTO lot_inventory (powder_name, lot_number) VALUES (NEW.powder_name, NEW.lot_number);
+            UPDATE lot_inventory
+            SET used_qty = used_qty + NEW.weight, updated_at = CURRENT_TIMESTAMP
+            WHERE powder_name = NEW.powder_name AND lot_number = NEW.lot_number;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_lot_ad AFTER DELETE ON material_input_lot
+        BEGIN
+            UPDATE lot_inventory
+            SET used_qty = used_qty - OLD.weight, updated_at = CURRENT_TIMESTAMP
+            WHERE powder_name = OLD.powder_name AND lot_number = OLD.lot_number;
+        END
+    ''')
+    # 수입검사 LOT은 입고 수량 입력 전에도 재고 현황에 표시
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_lot_inventory_inspection_ai AFTER INSERT ON inspection_result
+        WHEN NEW.category = 'incoming'
+        BEGIN
+            INSERT OR IGNORE INTO lot_inventory (powder_name, lot_number) VALUES (NEW.powder_name, NEW.lot_number);
+        END
+    ''')
+    # 완료된 작업의 투입 삭제(보관 이동)는 재고를 되돌리지 않음
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_material_input_lot_release AFTER DELETE ON material_input
+        WHEN NOT EXISTS (SELECT 1 FROM blending_work WHERE id = OLD.blending_work_id AND status = 'completed')
+        BEGIN
+            DELETE FROM material_input_lot WHERE material_input_id = OLD.id;
+        END
+    ''')
+
+    if is_new:
+        cursor.execute('''
+            INSERT OR IGNORE INTO lot_inventory (powder_name, lot_number)
+            SELECT powder_name, lot_number FROM inspection_result WHERE category = 'incoming'
+        ''')
+        # 기존 투입 기록: 복수 LOT 투입은 LOT별 중량이 없으므로 균등 분할
+        cursor.execute('SELECT id, powder_name, material_lot, actual_weight FROM material_input')
+        entries = []
+        for input_id, powder_name, material_lot, actual_weight in cursor.fetchall():
+            lots = list(dict.fromkeys(lot.strip() for lot in str(material_lot).split(',') if lot.strip()))
+            for lot in lots:
+                entries.append((input_id, powder_name, lot, float(actual_weight or 0) / len(lots)))
+        cursor.executemany('''
+            INSERT OR IGNORE INTO material_input_lot (material_input_id, powder_name, lot_number, weight)
+            VALUES (?, ?, ?, ?)
+        ''', entries)
+
+
+def _create_lot_fifo_index(cursor):
+    """선입선출(FIFO) LOT 추천용 합격 시각 컬럼과 부분 인덱스
+
+    lot_inventory.passed_at은 수입검사 PASS 판정 LOT의 검사 시각(그 외 NULL)이며,
+    검사 결과 추가/판정 변경 트리거로 유지됩니다. 부분 인덱스에는 합격했고 소진되지 않은
+    LOT만 들어가므로, 소진된 LOT이 쌓여도 추천 조회는 분말별 인덱스 앞부분만 읽습니다.
+    """
+    cursor.execute('PRAGMA table_info(lot_inventory)')
+    if 'passed_at' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE lot_inventory ADD COLUMN passed_at TIMESTAMP')
+        cursor.execute('''
+            INSERT INTO lot_inventory (powder_name, lot_number, passed_at)
+            SELECT powder_name, lot_number, inspection_time FROM inspection_result
+            WHERE category = 'incoming' AND final_result = 'PASS'
+            ON CONFLICT(powder_name, lot_number) DO UPDATE SET passed_at = excluded.passed_at
+        ''')
+
+    for event, condition in (('ai', "NEW.category = 'incoming'"),
+                             ('au', "NEW.category = 'incoming' OR OLD.category = 'incoming'")):
+        timing = 'AFTER INSERT' if event == 'ai' else 'AFTER UPDATE OF final_result, inspection_time, category'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_lot_inventory_passed_{event} {timing} ON inspection_result
+            WHEN {condition}
+            BEGIN
+                INSERT INTO lot_inventory (powder_name, lot_number, passed_at)
+                VALUES (NEW.powder_name, NEW.lot_number,
+                        CASE WHEN NEW.category = 'incoming' AND NEW.final_result = 'PASS' THEN NEW.inspection_time END)
+                ON CONFLICT(powder_name, lot_number) DO UPDATE SET passed_at = excluded.passed_at;
+            END
+        ''')
+
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lot_inventory_fifo
+        ON lot_inventory(powder_name, passed_at)
+        WHERE passed_at IS NOT NULL AND (received_qty IS NULL OR used_qty < received_qty)
+    ''')
+
+    # 분말별 합격 LOT 목록 (/api/completed-lots)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inspection_result_pass
+        ON inspection_result(powder_name, category, inspection_time)
+        WHERE final_result = 'PASS'
+    ''')
+
+
+def _create_idempotency_table(cursor):
+    """요청 멱등성 키별 성공 응답 (idempotency.py, 보관 기간이 지나면 삭제)"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS idempotency_key (
+        key TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,           -- 메서드 + 경로 + 본문 해시
+        status_code INTEGER NOT NULL,
+        response BLOB,
+        content_type TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_idempotency_key_created ON idempotency_key(created_at)')
+
+
+def apply_migrations(conn):
+    """확장 스키마 적용 후 커밋"""
+    cursor = conn.cursor()
+    _create_rollup_tables(cursor)
+    _create_lot_search_index(cursor)
+    _create_archive_state(cursor)
+    _create_measurement_tables(cursor)
+    _create_spec_versions(cursor)
+    _create_import_file_log(cursor)
+    _create_job_table(cursor)
+    _create_ref_data_versions(cursor)
+    _create_blending_counters(cursor)
+    _create_lot_inventory(cursor)
+    _create_lot_fifo_index(cursor)
+    _create_idempotency_table(cursor)
+    conn.commit()
+
+
+def migrate():
+    """데이터베이스 스키마 확장"""
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ 데이터베이스 파일이 없습니다: {DB_PATH}")
+        return False
+
+    try:
+        print("=" * 60)
+        print("데이터베이스 스키마 확장")
+        print("=" * 60)
+
+        conn = sqlite3.connect(DB_PATH, timeout=30.0)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        apply_migrations(conn)
+        conn.close()
+
+        print("\n✅ 스키마 확장 완료!")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ 오류 발생: {e}")
+        return False
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,129 @@
+"""
+분말 검사 시스템 - 배합 Recipe 캐시
+제품별 활성 Recipe를 한 번 읽어 비율/Main 여부/허용 오차 배열로 컴파일해 두고,
+배합 작업 상세 조회(저울 입력마다 새로고침)에서 Recipe 테이블 조회 없이 목표 중량을 계산합니다.
+
+관리자 Recipe 변경 시 해당 제품(또는 전체)을 무효화합니다.
+제품별 세대 번호로, 무효화 전에 시작된 조회 결과가 무효화 후에 캐시에 들어가지 않게 합니다.
+"""
+
+import threading
+
+import numpy as np
+
+
+class CompiledRecipe:
+    """제품 1개의 활성 Recipe (등록 순서)"""
+
+    def __init__(self, product_name, rows):
+        self.product_name = product_name
+        self.rows = rows
+        self.product_code = rows[0]['product_code'] if rows else None
+        self.powder_names = [r['powder_name'] for r in rows]
+        self.ratios = np.array([float(r['ratio'] or 0) for r in rows], dtype=float)
+        self.tolerances = np.array([float(r['tolerance_percent'] or 0) for r in rows], dtype=float)
+        self.is_main = np.array([bool(r['is_main']) for r in rows], dtype=bool)
+        self.main_ratio_total = float(self.ratios[self.is_main].sum())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def target_weights(self, target_total_weight, main_powder_weights=None):
+        """Recipe 행별 목표 중량
+
+        Main 분말이 있으면 Main은 작업 시작 시 지정한 중량, 나머지는
+        전체 Main 중량 × (비율 / 전체 Main 비율). 없으면 목표 총중량 × 비율 / 100.
+        """
+        if not self.is_main.any():
+            if not target_total_weight:
+                return np.zeros(len(self.rows))
+            return float(target_total_weight) * self.ratios / 100
+
+        main_powder_weights = main_powder_weights or {}
+        main_weights = np.array([float(main_powder_weights.get(name, 0) or 0) for name in self.powder_names])
+        total_main_weight = float(main_weights[self.is_main].sum())
+
+        if total_main_weight > 0 and self.main_ratio_total > 0:
+            others = total_main_weight * self.ratios / self.main_ratio_total
+        else:
+            others = np.zeros(len(self.rows))
+        return np.where(self.is_main, main_weights, others)
+
+    def to_rows(self, weights=None):
+        """API 응답용 Recipe 행 목록 (weights 지정 시 calculated_weight 포함)"""
+        rows = [dict(r) for r in self.rows]
+        if weights is not None:
+            for row, weight in zip(rows, weights):
+                row['calculated_weight'] = float(weight)
+        return rows
+
+
+class RecipeCache:
+    """제품별 컴파일된 Recipe 캐시"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._products = {}      # 제품명 -> CompiledRecipe
+        self._generation = {}    # 제품명 -> 무효화 횟수
+        self._all_generation = 0
+        self._all_loaded = False
+
+    def invalidate(self, product_name=None):
+        """제품(또는 전체)의 캐시 폐기"""
+        with self._lock:
+            self._all_generation += 1
+            self._all_loaded = False
+            if product_name is None:
+                self._products.clear()
+                self._generation = {name: gen + 1 for name, gen in self._generation.items()}
+            else:
+                self._products.pop(product_name, None)
+                self._generation[product_name] = self._generation.get(product_name, 0) + 1
+
+    def get(self, conn, product_name):
+        """제품의 컴파일된 Recipe (활성 Recipe가 없으면 빈 Recipe)"""
+        with self._lock:
+            cached = self._products.get(product_name)
+            generation = (self._generation.get(product_name, 0), self._all_generation)
+        if cached is not None:
+            return cached
+
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM recipe
+            WHERE product_name = ? AND is_active = 1
+            ORDER BY id
+        ''', (product_name,))
+        columns = [d[0] for d in cursor.description]
+        compiled = CompiledRecipe(product_name, [dict(zip(columns, tuple(r))) for r in cursor.fetchall()])
+
+        with self._lock:
+            if generation == (self._generation.get(product_name, 0), self._all_generation):
+                self._products[product_name] = compiled
+        return compiled
+
+    def all(self, conn):
+        """활성 Recipe가 있는 전체 제품 (제품명 순)"""
+        with self._lock:
+            if self._all_loaded:
+                return [self._products[name] for name in sorted(self._products) if len(self._products[name])]
+            generation = self._all_generation
+
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT * FROM recipe
+            WHERE is_active = 1
+            ORDER BY product_name, id
+        ''')
+        columns = [d[0] for d in cursor.description]
+        grouped = {}
+        for r in cursor.fetchall():
+            row = dict(zip(columns, tuple(r)))
+            grouped.setdefault(row['product_name'], []).append(row)
+        compiled = {name: CompiledRecipe(name, rows) for name, rows in grouped.items()}
+
+        with self._lock:
+            if generation == self._all_generation:
+                self._products = compiled
+                self._all_loaded = True
+        return [compiled[name] for name in sorted(compiled)]
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 무게 기반 항목 계산값 일괄 재계산
+저장된 원본 무게로 반복별 계산값(_1/_2/_3)과 평균(_avg)을 formulas.py 계산식으로 다시 계산하여
+저장값과 다른 행을 보고하고, --apply 시 갱신합니다.
+수천 행 단위로 읽어 NumPy 배열로 한 번에 계산하므로 대량 이력에도 빠르게 동작합니다.
+
+판정(_result)은 바꾸지 않습니다. 평균이 바뀐 경우 규격 재판정이 필요할 수 있습니다.
+평균이 바뀐 LOT의 일별 집계(rollup.py)는 같은 트랜잭션에서 다시 계산합니다.
+
+사용법:
+    python recompute.py                      # 차이 보고만 (dry-run)
+    python recompute.py --apply              # 차이가 있는 값 갱신
+    python recompute.py --report diff.csv    # 전체 차이 목록을 CSV로 저장
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+import formulas
+import measurements
+import rollup
+
+DB_PATH = 'database.db'
+BATCH_SIZE = 5000
+SAMPLE_LIMIT = 20
+TOLERANCE = 1e-9
+
+
+def _item_layout(item_name):
+    """항목의 (raw1 컬럼들, raw2 컬럼들, 값 컬럼들, 평균 컬럼)"""
+    columns = measurements.item_columns(item_name)
+    raw1 = [r[0] for r in columns['replicates']]
+    raw2 = [r[1] for r in columns['replicates']]
+    values = [r[2] for r in columns['replicates']]
+    return raw1, raw2, values, columns['avg']
+
+
+def _changed(new, old):
+    """새 값이 있고 저장값과 다른 칸 (원본이 없어 계산할 수 없는 칸은 유지)"""
+    with np.errstate(invalid='ignore'):
+        return ~np.isnan(new) & (np.isnan(old) | (np.abs(new - old) > TOLERANCE))
+
+
+def _none(value):
+    return None if np.isnan(value) else float(value)
+
+
+def recompute(conn, items=formulas.WEIGHT_ITEMS, apply=False, batch_size=BATCH_SIZE, diff_writer=None,
+              progress=None):
+    """전체 검사 결과의 무게 기반 계산값 재계산
+
+    Args:
+        apply: True면 차이가 있는 값을 갱신 (배치마다 커밋)
+        diff_writer: csv.writer (지정 시 모든 차이를 기록)
+        progress: 배치마다 호출할 함수 (검사한 행 수)
+
+    Returns:
+        dict: 검사 행 수, 항목/컬럼별 변경 건수와 최대 차이, 샘플 차이 목록
+    """
+    layouts = {item: _item_layout(item) for item in items}
+    select_columns = []
+    for raw1, raw2, values, avg in layouts.values():
+        select_columns.extend(raw1 + raw2 + values + [avg])
+
+    report = {
+        'applied': apply,
+        'rows_scanned': 0,
+        'rows_changed': 0,
+        'items': {
+            item: {col: {'changed': 0, 'max_abs_diff': 0.0} for col in layout[2] + [layout[3]]}
+            for item, layout in layouts.items()
+        },
+        'samples': [],
+    }
+
+    cursor = conn.cursor()
+    last_id = 0
+
+    while True:
+        # id 기준 keyset 페이지 조회
+        cursor.execute(f'''
+            SELECT id, powder_name, lot_number, {', '.join(select_columns)}
+            FROM inspection_result
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        last_id = rows[-1][0]
+        report['rows_scanned'] += len(rows)
+
+        ids = [r[0] for r in rows]
+        data = np.array([tuple(r)[3:] for r in rows], dtype=float)
+        changed_rows = np.zeros(len(rows), dtype=bool)
+
+        updates = []
+        offset = 0
+        for item_name, (raw1_cols, raw2_cols, value_cols, avg_col) in layouts.items():
+            n = len(value_cols)
+            raw1 = data[:, offset:offset + n]
+            raw2 = data[:, offset + n:offset + 2 * n]
+            old_values = data[:, offset + 2 * n:offset + 3 * n]
+            old_avg = data[:, offset + 3 * n]
+            offset += 3 * n + 1
+
+            new_values, new_avg, _ = formulas.compute(item_name, raw1, raw2)
+            value_changed = _changed(new_values, old_values)
+            # 평균은 저장된 값이 있는 행만 (측정하지 않은 항목에 평균을 새로 만들지 않음)
+            avg_changed = _changed(new_avg, old_avg) & ~np.isnan(old_avg)
+            row_changed = value_changed.any(axis=1) | avg_changed
+            changed_rows |= row_changed
+
+            # 컬럼별 통계
+            stats = report['items'][item_name]
+            for j, col in enumerate(value_cols + [avg_col]):
+                mask = value_changed[:, j] if j < n else avg_changed
+                new_col = new_values[:, j] if j < n else new_avg
+                old_col = old_values[:, j] if j < n else old_avg
+                count = int(mask.sum())
+                if not count:
+                    continue
+                stats[col]['changed'] += count
+                diffs = np.abs(np.nan_to_num(new_col[mask] - old_col[mask], nan=0.0))
+                stats[col]['max_abs_diff'] = max(stats[col]['max_abs_diff'], float(diffs.max()))
+
+                for idx in np.flatnonzero(mask):
+                    entry = (ids[idx], rows[idx][1], rows[idx][2], col, _none(old_col[idx]), _none(new_col[idx]))
+                    if diff_writer:
+                        diff_writer.writerow(entry)
+                    if len(report['samples']) < SAMPLE_LIMIT:
+                        report['samples'].append(dict(zip(
+                            ('id', 'powder_name', 'lot_number', 'column', 'old', 'new'), entry)))
+
+            if apply:
+                for idx in np.flatnonzero(row_changed):
+                    params = [_none(v) if c else None for v, c in zip(new_values[idx], value_changed[idx])]
+                    params.append(_none(new_avg[idx]) if avg_changed[idx] else None)
+                    updates.append((item_name, ids[idx], params, new_values[idx], raw1[idx], raw2[idx],
+                                    (rows[idx][1], rows[idx][2])))
+
+        report['rows_changed'] += int(changed_rows.sum())
+
+        if apply and updates:
+            _apply_updates(conn, layouts, updates)
+            conn.commit()
+
+        if progress:
+            progress(report['rows_scanned'])
+
+    return report
+
+
+def _apply_updates(conn, layouts, updates):
+    """변경된 계산값을 가로형 컬럼과 세로형 측정값 테이블에 반영하고, 평균이 바뀐 LOT의 일별 집계 갱신"""
+    cursor = conn.cursor()
+
+    by_item = {}
+    avg_changed_lots = set()
+    for item_name, row_id, params, new_values, raw1, raw2, lot in updates:
+        by_item.setdefault(item_name, []).append((row_id, params, new_values, raw1, raw2))
+        if params[-1] is not None:
+            avg_changed_lots.add(lot)
+
+    for item_name, entries in by_item.items():
+        _, _, value_cols, avg_col = layouts[item_name]
+        set_clause = ', '.join(f'{c} = COALESCE(?, {c})' for c in value_cols + [avg_col])
+        cursor.executemany(
+            f'UPDATE inspection_result SET {set_clause} WHERE id = ?',
+            [params + [row_id] for row_id, params, _, _, _ in entries]
+        )
+
+        measurement_rows = []
+        summary_rows = []
+        for row_id, params, new_values, raw1, raw2 in entries:
+            for replicate, value in enumerate(params[:-1], start=1):
+                if value is not None:
+                    measurement_rows.append((row_id, item_name, replicate,
+                                             _none(raw1[replicate - 1]), _none(raw2[replicate - 1]), value))
+            if params[-1] is not None:
+                summary_rows.append((row_id, item_name, params[-1]))
+
+        cursor.executemany('''
+            INSERT INTO measurement (result_id, item, replicate, raw1, raw2, value)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(result_id, item, replicate) DO UPDATE SET value = excluded.value
+        ''', measurement_rows)
+        cursor.executemany('''
+            INSERT INTO measurement_summary (result_id, item, avg_value)
+            VALUES (?, ?, ?)
+            ON CONFLICT(result_id, item) DO UPDATE SET avg_value = excluded.avg_value
+        ''', summary_rows)
+
+    # 항목별 평균/최소/최대 집계(daily_item_rollup)가 바뀐 평균을 반영하도록 그룹별로 한 번씩 재계산
+    groups = {rollup.lot_group(conn, powder_name, lot_number) for powder_name, lot_number in avg_changed_lots}
+    for group in groups - {None}:
+        rollup.refresh_group(conn, *group)
+
+
+def run_recompute_job(job, db_path, items=formulas.WEIGHT_ITEMS, apply=False):
+    """JobManager용 작업 함수 (전체 차이 목록 CSV를 결과 파일로 저장)"""
+    with closing(sqlite3.connect(db_path, timeout=30.0)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+        total = conn.execute('SELECT COUNT(*) FROM inspection_result').fetchone()[0]
+        job.update(0, total, '계산값 재계산 중' if apply else '계산값 차이 확인 중')
+
+        with open(job.result_path('recompute_diff.csv'), 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'powder_name', 'lot_number', 'column', 'old', 'new'])
+            report = recompute(conn, tuple(items), apply, diff_writer=writer, progress=job.update)
+
+    job.update(message=f"차이 있는 행 {report['rows_changed']}건")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='무게 기반 항목 계산값 일괄 재계산')
+    parser.add_argument('--apply', action='store_true', help='차이가 있는 값을 실제로 갱신')
+    parser.add_argument('--item', choices=formulas.WEIGHT_ITEMS, action='append', help='대상 항목 (기본: 전체)')
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='한 번에 계산할 행 수')
+    parser.add_argument('--report', help='전체 차이 목록 CSV 파일 경로')
+    parser.add_argument('--db', default=DB_PATH, help='데이터베이스 파일 경로')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 데이터베이스 파일이 없습니다: {args.db}")
+        return
+
+    with closing(sqlite3.connect(args.db, timeout=30.0)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+
+        from migrate_db import apply_migrations
+        apply_migrations(conn)
+
+        items = tuple(args.item) if args.item else formulas.WEIGHT_ITEMS
+        if args.report:
+            with open(args.report, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(['id', 'powder_name', 'lot_number', 'column', 'old', 'new'])
+                report = recompute(conn, items, args.apply, args.batch, writer)
+        else:
+            report = recompute(conn, items, args.apply, args.batch)
+
+    print(f"{'✅ 갱신 완료' if args.apply else '🔍 차이 보고 (갱신하려면 --apply)'}")
+    print(f"  - 검사 행: {report['rows_scanned']}건, 차이 있는 행: {report['rows_changed']}건")
+    for item_name, columns in report['items'].items():
+        for col, stat in columns.items():
+            if stat['changed']:
+                print(f"  - {col}: {stat['changed']}건 (최대 차이 {stat['max_abs_diff']:.4f})")
+    if args.report:
+        print(f"  - 전체 차이 목록: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+"""
+분말 검사 시스템 - 규격 변경 후 재판정
+분말 사양(powder_spec) 또는 입도분석 규격(particle_size)이 바뀌면
+해당 분말의 기존 검사 결과를 검사 시각에 적용되던 규격 버전(specs.py)으로 다시 판정하고,
+판정이 바뀐 LOT을 보고합니다.
+검사 결과를 일정 행 수씩 읽어 규격 버전별로 나눈 뒤 NumPy 배열로 항목별 판정을 한 번에 계산합니다.
+
+판정 규칙은 app.py의 check_spec / save_particle_size / update_final_result와 같습니다.
+"""
+
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+
+import rollup
+import specs
+from spc import SPC_ITEMS, PARTICLE_MESH_LABELS
+
+CHUNK_SIZE = 2000
+CHANGE_LIMIT = 1000   # 보고서에 포함할 변경 LOT 수 (건수 집계는 전체)
+
+# 검사 타입별로 판정에 포함되는 항목 타입 (get_inspection_items와 동일)
+TYPE_RULES = {
+    '일상점검': ('일상',),
+    '정기점검': ('일상', '정기'),
+}
+
+MAIN_ITEMS = [name for name in SPC_ITEMS if name not in PARTICLE_MESH_LABELS]
+PARTICLE_ITEMS = list(PARTICLE_MESH_LABELS)
+
+
+def load_limits(version):
+    """규격 버전(specs.SpecIndex.lookup 결과)의 판정 기준
+
+    Returns:
+        tuple: (항목명 -> (min, max, type), 입도 항목명 -> (min, max), 입도분석 타입)
+    """
+    spec = version['spec']
+
+    item_limits = {}
+    for item_name in MAIN_ITEMS:
+        prefix = SPC_ITEMS[item_name][0]
+        item_limits[item_name] = (spec.get(f'{prefix}_min'), spec.get(f'{prefix}_max'), spec.get(f'{prefix}_type'))
+
+    # 입도 측정값은 규격 등록 순서(id)대로 180/150/106/75/45/45M 컬럼에 저장됨 (save_particle_size와 동일)
+    particle_limits = {
+        item_name: (p['min_value'], p['max_value'])
+        for item_name, p in zip(PARTICLE_ITEMS, version['particle_specs'])
+    }
+
+    return item_limits, particle_limits, spec.get('particle_size_type')
+
+
+def _bounds(min_val, max_val):
+    lo = -np.inf if min_val in (None, '') else float(min_val)
+    hi = np.inf if max_val in (None, '') else float(max_val)
+    return lo, hi
+
+
+def judge_chunk(inspection_types, averages, old_results, item_limits, particle_limits, particle_tested):
+    """한 묶음의 항목별 판정
+
+    Args:
+        inspection_types: (n,) 검사 타입
+        averages: 항목명 -> (n,) 평균 (없으면 NaN)
+        old_results: 결과 컬럼명 -> (n,) 기존 판정 (object 배열)
+        particle_tested: (n,) 입도분석 판정이 있는 행
+
+    Returns:
+        dict: 결과 컬럼명 -> (n,) 새 판정
+    """
+    new_results = {}
+
+    for item_name in MAIN_ITEMS:
+        column = f'{SPC_ITEMS[item_name][0]}_result'
+        min_val, max_val, item_type = item_limits[item_name]
+        has_limits = min_val not in (None, '') or max_val not in (None, '')
+
+        # 검사 타입에 포함되지 않거나 규격이 없는 항목은 PASS (check_spec과 동일)
+        applies = np.array([item_type in TYPE_RULES.get(t, ()) for t in inspection_types], dtype=bool) & has_limits
+
+        avg = averages[item_name]
+        lo, hi = _bounds(min_val, max_val)
+        with np.errstate(invalid='ignore'):
+            fail = applies & ((avg < lo) | (avg > hi))
+        judged = np.where(fail, 'FAIL', 'PASS').astype(object)
+        new_results[column] = np.where(np.isnan(avg), old_results[column], judged)
+
+    # 입도분석: 규격이 있는 mesh는 측정값이 없거나 범위를 벗어나면 FAIL
+    particle_fail = np.zeros(len(inspection_types), dtype=bool)
+    for item_name in PARTICLE_ITEMS:
+        column = f'{SPC_ITEMS[item_name][0]}_result'
+        if item_name not in particle_limits:
+            new_results[column] = old_results[column]
+            continue
+
+        avg = averages[item_name]
+        lo, hi = _bounds(*particle_limits[item_name])
+        with np.errstate(invalid='ignore'):
+            fail = np.isnan(avg) | (avg < lo) | (avg > hi)
+        particle_fail |= fail
+        judged = np.where(fail, 'FAIL', 'PASS').astype(object)
+        new_results[column] = np.where(particle_tested, judged, old_results[column])
+
+    if particle_limits:
+        judged = np.where(particle_fail, 'FAIL', 'PASS').astype(object)
+        new_results['particle_size_result'] = np.where(particle_tested, judged, old_results['particle_size_result'])
+    else:
+        new_results['particle_size_result'] = old_results['particle_size_result']
+
+    # 최종 판정: 항목 판정 중 하나라도 FAIL이면 FAIL (판정 완료된 행만)
+    any_fail = np.zeros(len(inspection_types), dtype=bool)
+    for column, values in new_results.items():
+        any_fail |= values == 'FAIL'
+    finalized = old_results['final_result'] != None  # noqa: E711 (object 배열 원소별 비교)
+    new_results['final_result'] = np.where(finalized, np.where(any_fail, 'FAIL', 'PASS').astype(object),
+                                           old_results['final_result'])
+
+    return new_results
+
+
+def rejudge_powder(conn, powder_name, job=None, chunk_size=CHUNK_SIZE, spec_index=None):
+    """분말의 전체 검사 결과 재판정 후 변경 내역 반환 (묶음마다 커밋)
+
+    각 행은 검사 시각에 적용되던 규격 버전으로 판정하며,
+    적용되던 버전이 없는 행(사양이 삭제되어 있던 기간)은 그대로 둡니다.
+    묶음마다 읽기 전에 BEGIN IMMEDIATE로 쓰기 잠금을 잡으므로, 읽은 뒤 쓰기 전에
+    다른 연결이 저장한 항목 값을 덮어쓰지 않습니다.
+    """
+    spec_index = spec_index or specs.SpecIndex()
+    versions = spec_index.versions(conn, powder_name)
+    if not versions:
+        raise ValueError(f'분말 사양이 없습니다: {powder_name}')
+    version_limits = [load_limits(v) for v in versions]
+
+    avg_columns = [f'{SPC_ITEMS[name][0]}_avg' for name in MAIN_ITEMS + PARTICLE_ITEMS]
+    result_columns = [f'{SPC_ITEMS[name][0]}_result' for name in MAIN_ITEMS + PARTICLE_ITEMS]
+    result_columns += ['particle_size_result', 'final_result']
+    # 결과 컬럼 -> 세로형 요약 테이블 항목명
+    summary_items = {f'{SPC_ITEMS[name][0]}_result': name for name in MAIN_ITEMS + PARTICLE_ITEMS}
+
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM inspection_result WHERE powder_name = ?', (powder_name,))
+    total = cursor.fetchone()[0]
+    if job:
+        job.update(0, total, f'{powder_name} 재판정 중')
+
+    report = {
+        'powder_name': powder_name,
+        'rows_scanned': 0,
+        'rows_changed': 0,
+        'final_flips': {'PASS->FAIL': 0, 'FAIL->PASS': 0},
+        'item_flips': {},
+        'changes': [],
+    }
+
+    last_id = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = _rejudge_chunk(conn, powder_name, last_id, chunk_size, spec_index, version_limits,
+                                  avg_columns, result_columns, summary_items, report)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        report['rows_scanned'] += len(rows)
+        if job:
+            job.update(report['rows_scanned'])
+
+    return report
+
+
+def _rejudge_chunk(conn, powder_name, last_id, chunk_size, spec_index, version_limits,
+                   avg_columns, result_columns, summary_items, report):
+    """id > last_id인 한 묶음 재판정 후 변경 행 갱신 (트랜잭션은 호출자가 담당)
+
+    Returns:
+        list: 읽은 행 (없으면 끝)
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT id, lot_number, inspection_time, inspection_type,
+               {', '.join(avg_columns)}, {', '.join(result_columns)}
+        FROM inspection_result
+        WHERE powder_name = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+    ''', (powder_name, last_id, chunk_size))
+    rows = [tuple(r) for r in cursor.fetchall()]
+    if not rows:
+        return rows
+
+    n_avg = len(avg_columns)
+    averages_matrix = np.array([r[4:4 + n_avg] for r in rows], dtype=float)
+    averages = {name: averages_matrix[:, i] for i, name in enumerate(MAIN_ITEMS + PARTICLE_ITEMS)}
+    old_results = {
+        column: np.array([r[4 + n_avg + i] for r in rows], dtype=object)
+        for i, column in enumerate(result_columns)
+    }
+    inspection_types = np.array([r[3] for r in rows], dtype=object)
+    particle_tested = old_results['particle_size_result'] != None  # noqa: E711
+
+    # 규격 버전별로 나누어 판정 (버전이 없는 행은 기존 판정 유지)
+    _, version_idx = spec_index.lookup_many(conn, powder_name, [r[2] for r in rows])
+    new_results = {column: values.copy() for column, values in old_results.items()}
+    for v in np.unique(version_idx[version_idx >= 0]):
+        mask = version_idx == v
+        item_limits, particle_limits, _ = version_limits[v]
+        judged = judge_chunk(
+            list(inspection_types[mask]),
+            {name: values[mask] for name, values in averages.items()},
+            {column: values[mask] for column, values in old_results.items()},
+            item_limits, particle_limits, particle_tested[mask]
+        )
+        for column, values in judged.items():
+            new_results[column][mask] = values
+
+    changed = np.zeros(len(rows), dtype=bool)
+    for column in result_columns:
+        flips = new_results[column] != old_results[column]
+        changed |= flips
+        if flips.any():
+            report['item_flips'][column] = report['item_flips'].get(column, 0) + int(flips.sum())
+
+    updates = []
+    summary_updates = []
+    flipped_lots = []
+    for idx in np.flatnonzero(changed):
+        row = rows[idx]
+        new_values = [new_results[c][idx] for c in result_columns]
+        updates.append(new_values + [row[0]])
+
+        item_changes = {}
+        for column in result_columns:
+            old, new = old_results[column][idx], new_results[column][idx]
+            if old != new:
+                item_changes[column] = [old, new]
+                if column in summary_items:
+                    item_name = summary_items[column]
+                    avg = averages[item_name][idx]
+                    summary_updates.append((row[0], item_name, None if np.isnan(avg) else float(avg), new))
+
+        old_final, new_final = old_results['final_result'][idx], new_results['final_result'][idx]
+        if old_final != new_final:
+            flipped_lots.append(row[1])
+            key = f'{old_final}->{new_final}'
+            report['final_flips'][key] = report['final_flips'].get(key, 0) + 1
+
+        if len(report['changes']) < CHANGE_LIMIT:
+            report['changes'].append({
+                'id': row[0],
+                'lot_number': row[1],
+                'inspection_time': row[2],
+                'final_result': [old_final, new_final],
+                'items': item_changes,
+            })
+
+    if updates:
+        set_clause = ', '.join(f'{c} = ?' for c in result_columns)
+        cursor.executemany(f'UPDATE inspection_result SET {set_clause} WHERE id = ?', updates)
+        # 평균/판정이 모두 없던 항목은 요약 행이 없으므로 새로 만듦
+        cursor.executemany('''
+            INSERT INTO measurement_summary (result_id, item, avg_value, result)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(result_id, item) DO UPDATE SET result = excluded.result
+        ''', summary_updates)
+        for lot_number in flipped_lots:
+            rollup.refresh_for_lot(conn, powder_name, lot_number)
+
+    report['rows_changed'] += len(updates)
+    return rows
+
+
+def run_rejudge_job(job, db_path, powder_name):
+    """JobManager용 작업 함수 (프로세스 풀에서 실행, 전용 연결 사용)"""
+    with closing(sqlite3.connect(db_path, timeout=30.0)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+        report = rejudge_powder(conn, powder_name, job)
+    job.update(message=f"변경 {report['rows_changed']}건")
+    return report
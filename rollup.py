@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 일별 품질 집계(rollup) 테이블 관리
+검사 결과가 확정/삭제될 때 같은 트랜잭션에서 해당 (일자, 분말, 구분) 집계만 다시 계산하고,
+과거 이력 전체를 다시 만드는 재구축 명령을 제공합니다.
+
+사용법:
+    python rollup.py --rebuild
+"""
+
+import argparse
+import sqlite3
+from contextlib import closing
+
+from spc import SPC_ITEMS
+
+DB_PATH = 'database.db'
+
+# 검사 시간은 UTC로 저장되므로 KST 기준 일자로 집계
+DAY_EXPR = "date(inspection_time, '+9 hours')"
+CATEGORY_EXPR = "COALESCE(category, 'incoming')"
+
+# 집계 대상 항목: 항목명 -> 평균값 컬럼
+ROLLUP_ITEMS = {name: f'{prefix}_avg' for name, (prefix, _) in SPC_ITEMS.items()}
+
+
+def _item_aggregates_sql():
+    """항목별 COUNT/SUM/MIN/MAX 집계 SELECT 절"""
+    parts = []
+    for column in ROLLUP_ITEMS.values():
+        parts.append(f'COUNT({column}), SUM({column}), MIN({column}), MAX({column})')
+    return ', '.join(parts)
+
+
+def _item_rows(day, powder_name, category, aggregates):
+    """집계 결과(항목별 4개 값의 나열)를 daily_item_rollup 행으로 변환"""
+    rows = []
+    for idx, item in enumerate(ROLLUP_ITEMS):
+        count, total, min_v, max_v = aggregates[idx * 4:idx * 4 + 4]
+        if count:
+            rows.append((day, powder_name, category, item, count, total, min_v, max_v))
+    return rows
+
+
+def lot_group(conn, powder_name, lot_number):
+    """LOT이 속한 집계 그룹 (일자, 분말명, 구분) 반환 (없으면 None)"""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {DAY_EXPR}, powder_name, {CATEGORY_EXPR} FROM inspection_result
+        WHERE powder_name = ? AND lot_number = ?
+    ''', (powder_name, lot_number))
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def refresh_group(conn, day, powder_name, category):
+    """한 (일자, 분말, 구분) 그룹의 집계를 다시 계산 (커밋은 호출자가 담당)
+
+    보관(archive.py)은 그룹의 모든 행을 함께 옮기므로 운영 DB의 행만 다시 읽습니다.
+    """
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM daily_quality_rollup
+        WHERE day = ? AND powder_name = ? AND category = ?
+    ''', (day, powder_name, category))
+    cursor.execute('''
+        DELETE FROM daily_item_rollup
+        WHERE day = ? AND powder_name = ? AND category = ?
+    ''', (day, powder_name, category))
+
+    # (powder_name, 일자) 표현식 인덱스로 해당 그룹의 행만 읽음
+    cursor.execute(f'''
+        SELECT COUNT(*),
+               COALESCE(SUM(final_result = 'PASS'), 0),
+               COALESCE(SUM(final_result = 'FAIL'), 0),
+               {_item_aggregates_sql()}
+        FROM inspection_result
+        WHERE powder_name = ? AND {DAY_EXPR} = ? AND {CATEGORY_EXPR} = ?
+          AND final_result IN ('PASS', 'FAIL')
+    ''', (powder_name, day, category))
+    row = cursor.fetchone()
+
+    if not row or not row[0]:
+        return
+
+    cursor.execute('''
+        INSERT INTO daily_quality_rollup (day, powder_name, category, lot_count, pass_count, fail_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (day, powder_name, category, row[0], row[1], row[2]))
+
+    cursor.executemany('''
+        INSERT INTO daily_item_rollup
+        (day, powder_name, category, item, sample_count, value_sum, value_min, value_max)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', _item_rows(day, powder_name, category, tuple(row)[3:]))
+
+
+def refresh_for_lot(conn, powder_name, lot_number):
+    """LOT이 속한 그룹의 집계를 다시 계산"""
+    group = lot_group(conn, powder_name, lot_number)
+    if group:
+        refresh_group(conn, *group)
+
+
+def rebuild_all(conn, source='inspection_result'):
+    """전체 이력으로 집계 테이블 재구축 (커밋은 호출자가 담당)
+
+    Args:
+        source: 검사 결과 테이블/뷰 (보관 데이터 포함 시 archive.history_table 결과)
+
+    Returns:
+        int: 생성된 일별 그룹 수
+    """
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM daily_quality_rollup')
+    cursor.execute('DELETE FROM daily_item_rollup')
+
+    cursor.execute(f'''
+        SELECT {DAY_EXPR} AS day, powder_name, {CATEGORY_EXPR} AS cat,
+               COUNT(*),
+               SUM(final_result = 'PASS'),
+               SUM(final_result = 'FAIL'),
+               {_item_aggregates_sql()}
+        FROM {source}
+        WHERE final_result IN ('PASS', 'FAIL')
+        GROUP BY day, powder_name, cat
+    ''')
+
+    quality_rows = []
+    item_rows = []
+    for row in cursor.fetchall():
+        row = tuple(row)
+        day, powder_name, category = row[0], row[1], row[2]
+        quality_rows.append((day, powder_name, category, row[3], row[4], row[5]))
+        item_rows.extend(_item_rows(day, powder_name, category, row[6:]))
+
+    cursor.executemany('''
+        INSERT INTO daily_quality_rollup (day, powder_name, category, lot_count, pass_count, fail_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', quality_rows)
+    cursor.executemany('''
+        INSERT INTO daily_item_rollup
+        (day, powder_name, category, item, sample_count, value_sum, value_min, value_max)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', item_rows)
+
+    return len(quality_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='일별 품질 집계 테이블 관리')
+    parser.add_argument('--rebuild', action='store_true', help='전체 검사 이력으로 집계 재구축')
+    parser.add_argument('--db', default=DB_PATH, help='데이터베이스 파일 경로')
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    with closing(sqlite3.connect(args.db, timeout=30.0)) as conn:
+        conn.execute('PRAGMA busy_timeout = 30000')
+
+        # 집계 테이블이 없는 기존 DB도 바로 재구축할 수 있도록 스키마 먼저 적용
+        from migrate_db import apply_migrations
+        apply_migrations(conn)
+
+        # archive.db로 옮겨진 검사 결과도 집계에 포함
+        import archive
+        group_count = rebuild_all(conn, archive.history_table(conn, 'inspection_result'))
+        conn.commit()
+
+    print(f"✅ 일별 품질 집계 재구축 완료: {group_count}개 그룹")
+
+
+if __name__ == '__main__':
+    main()
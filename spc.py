@@ -0,0 +1,200 @@
+"""
+분말 검사 시스템 - 통계적 공정관리(SPC) 계산 모듈
+검사 결과의 반복 측정값(_1, _2, _3)을 부분군으로 보고
+X̄-R 관리도, 관리한계, 공정능력지수(Cp/Cpk)를 NumPy 벡터 연산으로 계산합니다.
+"""
+
+import numpy as np
+
+# SPC 대상 항목 정의: 항목명 -> (컬럼 접두어, 반복 측정 횟수)
+# 반복 측정 컬럼은 '{접두어}_1' ~ '{접두어}_{횟수}' 규칙을 따릅니다.
+SPC_ITEMS = {
+    'FlowRate': ('flow_rate', 3),
+    'ApparentDensity': ('apparent_density', 3),
+    'CContent': ('c_content', 3),
+    'CuContent': ('cu_content', 3),
+    'Moisture': ('moisture', 3),
+    'Ash': ('ash', 3),
+    'SinterChangeRate': ('sinter_change_rate', 3),
+    'SinterStrength': ('sinter_strength', 3),
+    'FormingStrength': ('forming_strength', 3),
+    'FormingLoad': ('forming_load', 3),
+    'ParticleSize180': ('particle_size_180', 2),
+    'ParticleSize150': ('particle_size_150', 2),
+    'ParticleSize106': ('particle_size_106', 2),
+    'ParticleSize75': ('particle_size_75', 2),
+    'ParticleSize45': ('particle_size_45', 2),
+    'ParticleSize45M': ('particle_size_45m', 2),
+}
+
+# 입도분석 항목 -> particle_size 테이블의 mesh_size 값
+PARTICLE_MESH_LABELS = {
+    'ParticleSize180': '+180 um',
+    'ParticleSize150': '+150 um',
+    'ParticleSize106': '+106 um',
+    'ParticleSize75': '+75 um',
+    'ParticleSize45': '+45 um',
+    'ParticleSize45M': '-45 um',
+}
+
+# 관리도 계수 (부분군 크기 n -> d2, D3, D4), 인덱스 = n
+# n < 2 인 부분군은 범위(R)를 정의할 수 없으므로 NaN
+_D2 = np.array([np.nan, np.nan, 1.128, 1.693, 2.059, 2.326])
+_D3 = np.array([np.nan, np.nan, 0.0, 0.0, 0.0, 0.0])
+_D4 = np.array([np.nan, np.nan, 3.267, 2.574, 2.282, 2.114])
+
+# 연속으로 중심선 한쪽에 위치하면 이상으로 보는 점의 개수
+RUN_LENGTH = 7
+
+
+def replicate_columns(item_name):
+    """항목의 반복 측정 컬럼명 목록 반환 (알 수 없는 항목이면 None)"""
+    item = SPC_ITEMS.get(item_name)
+    if not item:
+        return None
+    prefix, count = item
+    return [f'{prefix}_{i}' for i in range(1, count + 1)]
+
+
+def spec_limits(version, item_name):
+    """규격 버전(specs.SpecIndex 항목 또는 specs.snapshot)에서 항목의 규격 한계 (LSL, USL)"""
+    if version is None:
+        return None, None
+    if item_name in PARTICLE_MESH_LABELS:
+        mesh_size = PARTICLE_MESH_LABELS[item_name]
+        for particle in version['particle_specs']:
+            if particle['mesh_size'] == mesh_size:
+                return particle['min_value'], particle['max_value']
+        return None, None
+    prefix = SPC_ITEMS[item_name][0]
+    return version['spec'].get(f'{prefix}_min'), version['spec'].get(f'{prefix}_max')
+
+
+def _run_flags(side, length):
+    """같은 부호(side)가 length개 이상 연속된 구간의 마지막 점부터 True 표시"""
+    flags = np.zeros(side.shape[0], dtype=bool)
+    if side.shape[0] < length:
+        return flags
+    for sign in (1, -1):
+        hit = (side == sign).astype(np.int64)
+        window = np.convolve(hit, np.ones(length, dtype=np.int64), mode='valid')
+        flags[length - 1:] |= window == length
+    return flags
+
+
+def compute_xbar_r(values):
+    """X̄-R 관리도 계산
+
+    Args:
+        values: (부분군 수, 반복 수) 형태의 2차원 배열, 미측정값은 NaN
+
+    Returns:
+        dict: 부분군별 평균/범위/크기, 관리한계 배열, 이상점 플래그
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2:
+        raise ValueError('values는 2차원 배열이어야 합니다.')
+
+    n = np.sum(~np.isnan(values), axis=1)
+    valid = n > 0
+    values = values[valid]
+    n = n[valid]
+
+    if values.shape[0] == 0:
+        return None
+
+    xbar = np.nanmean(values, axis=1)
+    ranges = np.nanmax(values, axis=1) - np.nanmin(values, axis=1)
+
+    n_idx = np.clip(n, 0, len(_D2) - 1)
+    d2 = _D2[n_idx]
+    has_range = n >= 2
+    ranges = np.where(has_range, ranges, np.nan)
+
+    # 군내 표준편차 추정: 평균(R / d2)
+    if np.any(has_range):
+        sigma_within = float(np.mean(ranges[has_range] / d2[has_range]))
+    else:
+        sigma_within = float('nan')
+
+    center = float(np.mean(xbar))
+
+    # 부분군 크기가 다를 수 있으므로 관리한계는 점별로 계산
+    x_half = 3 * sigma_within / np.sqrt(n)
+    x_ucl = center + x_half
+    x_lcl = center - x_half
+
+    r_center = d2 * sigma_within
+    r_ucl = _D4[n_idx] * r_center
+    r_lcl = _D3[n_idx] * r_center
+
+    with np.errstate(invalid='ignore'):
+        x_out = (xbar > x_ucl) | (xbar < x_lcl)
+        r_out = has_range & ((ranges > r_ucl) | (ranges < r_lcl))
+
+    run = _run_flags(np.sign(xbar - center), RUN_LENGTH)
+
+    return {
+        'valid_mask': valid,
+        'n': n,
+        'xbar': xbar,
+        'range': ranges,
+        'center': center,
+        'sigma_within': sigma_within,
+        'x_ucl': x_ucl,
+        'x_lcl': x_lcl,
+        'r_center': r_center,
+        'r_ucl': r_ucl,
+        'r_lcl': r_lcl,
+        'x_out': x_out,
+        'r_out': r_out,
+        'run': run,
+    }
+
+
+def compute_capability(values, lsl, usl, sigma_within):
+    """공정능력지수 계산 (Cp, Cpk, Pp, Ppk)
+
+    한쪽 규격만 있는 경우 Cp/Pp는 None, Cpk/Ppk는 존재하는 쪽으로만 계산합니다.
+    """
+    values = np.asarray(values, dtype=float)
+    data = values[~np.isnan(values)]
+    if data.size == 0:
+        return {'mean': None, 'sigma_overall': None, 'cp': None, 'cpk': None, 'pp': None, 'ppk': None}
+
+    mean = float(np.mean(data))
+    sigma_overall = float(np.std(data, ddof=1)) if data.size > 1 else float('nan')
+
+    def indices(sigma):
+        if not np.isfinite(sigma) or sigma <= 0:
+            return None, None
+        cp = (usl - lsl) / (6 * sigma) if lsl is not None and usl is not None else None
+        sides = []
+        if usl is not None:
+            sides.append((usl - mean) / (3 * sigma))
+        if lsl is not None:
+            sides.append((mean - lsl) / (3 * sigma))
+        cpk = min(sides) if sides else None
+        return cp, cpk
+
+    cp, cpk = indices(sigma_within)
+    pp, ppk = indices(sigma_overall)
+
+    return {
+        'mean': mean,
+        'sigma_overall': sigma_overall if np.isfinite(sigma_overall) else None,
+        'cp': cp,
+        'cpk': cpk,
+        'pp': pp,
+        'ppk': ppk,
+    }
+
+
+def to_json_list(array, digits=4):
+    """NumPy 배열을 JSON 직렬화 가능한 리스트로 변환 (NaN -> None)"""
+    array = np.asarray(array)
+    if array.dtype.kind == 'f':
+        rounded = np.round(array, digits).astype(object)
+        rounded[np.isnan(array)] = None
+        return rounded.tolist()
+    return array.tolist()
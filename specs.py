@@ -0,0 +1,260 @@
+"""
+분말 검사 시스템 - 규격 버전 이력
+powder_spec / particle_size가 바뀔 때마다 그 시점의 규격 전체를 powder_spec_version에
+적용 기간(effective_from ~ effective_to)과 함께 저장합니다.
+
+SpecIndex는 분말별 버전 시작 시각 목록을 메모리에 두고 이진 탐색(O(log n))으로
+검사 시각에 적용되던 규격을 찾습니다. 규격 변경 시 해당 분말만 무효화합니다.
+
+시각은 inspection_time과 같은 UTC 'YYYY-MM-DD HH:MM:SS' 문자열입니다.
+"""
+
+import bisect
+import json
+import threading
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# 버전 이력이 생기기 전 검사는 최초 버전(현재 규격)을 적용
+EPOCH = '1970-01-01 00:00:00'
+
+
+KST = ZoneInfo('Asia/Seoul')
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def kst_to_utc(value):
+    """KST 시각 문자열('YYYY-MM-DD', 'YYYY-MM-DD HH:MM[:SS]')을 UTC 저장 형식으로 (빈 값은 None)"""
+    if not value:
+        return None
+    value = value.strip().replace('T', ' ').replace('/', '-')
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            dt = datetime.strptime(value, fmt)
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f'시각 형식이 올바르지 않습니다: {value}')
+    return dt.replace(tzinfo=KST).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def snapshot(conn, powder_name):
+    """현재 분말 사양 + 입도분석 규격(등록 순서) 스냅샷 (사양이 없으면 None)"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM powder_spec WHERE powder_name = ?', (powder_name,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    spec = dict(zip([d[0] for d in cursor.description], tuple(row)))
+
+    cursor.execute('''
+        SELECT mesh_size, min_value, max_value FROM particle_size
+        WHERE powder_name = ?
+        ORDER BY id
+    ''', (powder_name,))
+    particle_specs = [
+        {'mesh_size': r[0], 'min_value': r[1], 'max_value': r[2]}
+        for r in cursor.fetchall()
+    ]
+    return {'spec': spec, 'particle_specs': particle_specs}
+
+
+def record_version(conn, powder_name, effective_from=None):
+    """현재 규격을 새 버전으로 기록 (커밋은 호출자가 담당)
+
+    effective_from 이후에 시작하는 기존 버전은 새 버전으로 대체되고,
+    그 직전 버전은 effective_from에 종료됩니다. 사양이 삭제되었으면 열린 버전만 종료합니다.
+
+    Returns:
+        int: 새 버전 id (사양 삭제 시 None)
+    """
+    effective_from = effective_from or utc_now()
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        DELETE FROM powder_spec_version
+        WHERE powder_name = ? AND effective_from >= ?
+    ''', (powder_name, effective_from))
+    cursor.execute('''
+        UPDATE powder_spec_version SET effective_to = ?
+        WHERE powder_name = ? AND (effective_to IS NULL OR effective_to > ?)
+    ''', (effective_from, powder_name, effective_from))
+
+    current = snapshot(conn, powder_name)
+    if current is None:
+        return None
+
+    cursor.execute('''
+        INSERT INTO powder_spec_version (powder_name, effective_from, effective_to, spec_json)
+        VALUES (?, ?, NULL, ?)
+    ''', (powder_name, effective_from, json.dumps(current, ensure_ascii=False)))
+    return cursor.lastrowid
+
+
+def backfill(conn):
+    """버전 이력이 없는 분말의 현재 규격을 최초 버전으로 기록"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT powder_name FROM powder_spec
+        WHERE powder_name NOT IN (SELECT powder_name FROM powder_spec_version)
+    ''')
+    for (powder_name,) in cursor.fetchall():
+        record_version(conn, powder_name, EPOCH)
+
+
+def build_inspection_items(spec, particle_specs, inspection_type):
+    """분말 사양 행과 입도분석 규격으로 검사 타입별 검사 항목 목록 생성"""
+    # 모든 검사 항목 정의
+    all_items = [
+        {'name': 'FlowRate', 'displayName': '유동도', 'unit': 's/50g',
+         'min': spec['flow_rate_min'], 'max': spec['flow_rate_max'], 'type': spec['flow_rate_type']},
+
+        {'name': 'ApparentDensity', 'displayName': '겉보기밀도', 'unit': 'g/cm³',
+         'min': spec['apparent_density_min'], 'max': spec['apparent_density_max'], 'type': spec['apparent_density_type'],
+         'isWeightBased': True},
+
+        {'name': 'CContent', 'displayName': 'C함량', 'unit': '%',
+         'min': spec['c_content_min'], 'max': spec['c_content_max'], 'type': spec['c_content_type']},
+
+        {'name': 'CuContent', 'displayName': 'Cu함량', 'unit': '%',
+         'min': spec['cu_content_min'], 'max': spec['cu_content_max'], 'type': spec['cu_content_type']},
+
+        {'name': 'Moisture', 'displayName': '수분도', 'unit': '%',
+         'min': spec['moisture_min'], 'max': spec['moisture_max'], 'type': spec['moisture_type'],
+         'isWeightBased': True},
+
+        {'name': 'Ash', 'displayName': '회분도', 'unit': '%',
+         'min': spec['ash_min'], 'max': spec['ash_max'], 'type': spec['ash_type'],
+         'isWeightBased': True},
+
+        {'name': 'SinterChangeRate', 'displayName': '소결변화율', 'unit': '%',
+         'min': spec['sinter_change_rate_min'], 'max': spec['sinter_change_rate_max'], 'type': spec['sinter_change_rate_type']},
+
+        {'name': 'SinterStrength', 'displayName': '소결강도', 'unit': 'MPa',
+         'min': spec['sinter_strength_min'], 'max': spec['sinter_strength_max'], 'type': spec['sinter_strength_type']},
+
+        {'name': 'FormingStrength', 'displayName': '성형강도', 'unit': 'N',
+         'min': spec['forming_strength_min'], 'max': spec['forming_strength_max'], 'type': spec['forming_strength_type']},
+
+        {'name': 'FormingLoad', 'displayName': '성형하중', 'unit': 'MPa',
+         'min': spec['forming_load_min'], 'max': spec['forming_load_max'], 'type': spec['forming_load_type']},
+    ]
+
+    # 검사 타입에 따라 필터링
+    filtered_items = []
+    for item in all_items:
+        item_type = item['type']
+
+        # 검사 타입 필터링
+        if inspection_type == '일상점검' and item_type == '일상':
+            if item['min'] is not None or item['max'] is not None:
+                filtered_items.append(item)
+        elif inspection_type == '정기점검' and (item_type == '일상' or item_type == '정기'):
+            if item['min'] is not None or item['max'] is not None:
+                filtered_items.append(item)
+
+    # 입도분석 항목 추가
+    particle_item_type = spec['particle_size_type']
+    if particle_item_type and particle_specs:
+        if (inspection_type == '일상점검' and particle_item_type == '일상') or \
+                (inspection_type == '정기점검' and particle_item_type in ('일상', '정기')):
+            filtered_items.append({
+                'name': 'ParticleSize',
+                'displayName': '입도분석',
+                'unit': '%',
+                'isParticleSize': True,
+                'particleSpecs': [dict(p) for p in particle_specs]
+            })
+
+    return filtered_items
+
+
+class SpecIndex:
+    """분말별 규격 버전 구간 인덱스"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._powders = {}   # 분말명 -> (시작 시각 목록, 버전 목록)
+        # 읽는 도중 무효화되면 읽은 값을 저장하지 않도록 무효화 횟수를 기록
+        self._generation = {}    # 분말명 -> 무효화 횟수
+        self._all_generation = 0
+
+    def invalidate(self, powder_name=None):
+        """분말(또는 전체)의 인덱스 폐기 (다음 조회 시 다시 읽음)"""
+        with self._lock:
+            if powder_name is None:
+                self._powders.clear()
+                self._all_generation += 1
+            else:
+                self._powders.pop(powder_name, None)
+                self._generation[powder_name] = self._generation.get(powder_name, 0) + 1
+
+    def _load(self, conn, powder_name):
+        with self._lock:
+            cached = self._powders.get(powder_name)
+            generation = (self._generation.get(powder_name, 0), self._all_generation)
+        if cached is not None:
+            return cached
+
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, effective_from, effective_to, spec_json
+            FROM powder_spec_version
+            WHERE powder_name = ?
+            ORDER BY effective_from
+        ''', (powder_name,))
+        versions = []
+        for version_id, effective_from, effective_to, spec_json in cursor.fetchall():
+            data = json.loads(spec_json)
+            data.update({'id': version_id, 'effective_from': effective_from, 'effective_to': effective_to})
+            versions.append(data)
+        entry = ([v['effective_from'] for v in versions], versions)
+
+        with self._lock:
+            if generation == (self._generation.get(powder_name, 0), self._all_generation):
+                self._powders[powder_name] = entry
+        return entry
+
+    def versions(self, conn, powder_name):
+        """분말의 전체 규격 버전 (적용 시작 순)"""
+        return self._load(conn, powder_name)[1]
+
+    def lookup(self, conn, powder_name, at=None):
+        """시각 at에 적용되던 규격 버전 (없으면 None)
+
+        Returns:
+            dict: spec(분말 사양 행), particle_specs, id, effective_from, effective_to
+        """
+        starts, versions = self._load(conn, powder_name)
+        at = at or utc_now()
+        i = bisect.bisect_right(starts, at) - 1
+        if i < 0:
+            return None
+        version = versions[i]
+        if version['effective_to'] is not None and at >= version['effective_to']:
+            return None
+        return version
+
+    def lookup_many(self, conn, powder_name, times):
+        """여러 시각의 버전 위치를 한 번에 계산
+
+        Returns:
+            tuple: (버전 목록, 시각별 버전 인덱스 배열 - 해당 버전이 없으면 -1)
+        """
+        starts, versions = self._load(conn, powder_name)
+        if not versions:
+            return versions, np.full(len(times), -1)
+
+        times = np.array([t or utc_now() for t in times], dtype=str)
+        idx = np.searchsorted(np.array(starts, dtype=str), times, side='right') - 1
+
+        ends = np.array([v['effective_to'] or '9999-12-31 23:59:59' for v in versions], dtype=str)
+        valid = idx >= 0
+        valid[valid] &= times[valid] < ends[idx[valid]]
+        return versions, np.where(valid, idx, -1)
@@ -0,0 +1,71 @@
+"""
+분말 검사 시스템 - 검사 결과 UPDATE 문 카탈로그
+항목별로 미리 만들어 둔 고정 SQL을 사용하여, 입력된 값 조합과 관계없이
+항상 같은 문장이 실행되도록 합니다 (sqlite3 문장 캐시 재사용).
+
+비어 있는 반복 측정값은 None으로 전달하면 COALESCE(?, 컬럼)로 기존 값이 유지됩니다.
+"""
+
+from measurements import item_columns
+from spc import SPC_ITEMS
+
+# 입도분석 mesh ID (프론트엔드 키) -> 항목명
+PARTICLE_MESH_ITEMS = {
+    '180': 'ParticleSize180',
+    '150': 'ParticleSize150',
+    '106': 'ParticleSize106',
+    '75': 'ParticleSize75',
+    '45': 'ParticleSize45',
+    '45M': 'ParticleSize45M',
+}
+
+# 일반/무게 기반 항목 (입도분석 제외)
+RESULT_ITEMS = [name for name in SPC_ITEMS if name not in PARTICLE_MESH_ITEMS.values()]
+
+
+def _keep(column):
+    return f'{column} = COALESCE(?, {column})'
+
+
+def _build_item_update(item_name):
+    columns = item_columns(item_name)
+    parts = []
+    for raw1, raw2, value in columns['replicates']:
+        parts.extend(_keep(c) for c in (raw1, raw2, value) if c)
+    parts.append(f"{columns['avg']} = ?")
+    parts.append(f"{columns['result']} = ?")
+    return f"UPDATE inspection_result SET {', '.join(parts)} WHERE id = ?"
+
+
+def _build_particle_update():
+    parts = []
+    for item_name in PARTICLE_MESH_ITEMS.values():
+        columns = item_columns(item_name)
+        for _, _, value in columns['replicates']:
+            parts.append(_keep(value))
+        parts.append(_keep(columns['avg']))
+        parts.append(_keep(columns['result']))
+    parts.append('particle_size_result = ?')
+    return f"UPDATE inspection_result SET {', '.join(parts)} WHERE id = ?"
+
+
+# 항목명 -> UPDATE 문
+# 파라미터 순서: 반복별 (raw1, raw2, 값) 또는 (값), 평균, 판정, id
+ITEM_UPDATE = {name: _build_item_update(name) for name in RESULT_ITEMS}
+
+# 입도분석 6개 mesh를 한 번에 갱신하는 UPDATE 문
+# 파라미터 순서: mesh별 (_1, _2, _avg, _result), 전체 판정, id
+PARTICLE_UPDATE = _build_particle_update()
+
+FIND_RESULT_ID = 'SELECT id FROM inspection_result WHERE powder_name = ? AND lot_number = ?'
+
+# 연결당 문장 캐시 크기: 카탈로그 전체 + API별 고정 SQL(약 130개)을 모두 담을 수 있도록
+# 기본값(128)보다 크게 설정 (캐시가 넘치면 가장 오래된 문장부터 다시 컴파일됨)
+STATEMENT_CACHE_SIZE = 256
+
+
+def to_number(value):
+    """입력값을 float로 변환 (빈 값은 None → 기존 값 유지)"""
+    if value is None or value == '':
+        return None
+    return float(value)
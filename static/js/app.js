@@ -67,6 +67,172 @@ function updateLanguage() {
             alert(message);
         }
 
+        // ============================================
+        // 기준 정보 캐시 (IndexedDB)
+        // 분말/검사자/작업자/제품/Recipe 목록은 브라우저에 저장해 두고
+        // /api/ref-data/version의 테이블 버전이 바뀐 경우에만 다시 받음
+        // ============================================
+        const REF_CACHE_DB = 'powder-inspection-ref';
+        const REF_CACHE_STORE = 'datasets';
+        const REF_VERSION_TTL = 3000;  // 화면 전환 시 여러 목록 조회가 버전 확인 1회를 공유 (ms)
+
+        let refCacheDbPromise = null;
+        let refVersionPromise = null;
+        let refVersionFetchedAt = 0;
+
+        function openRefCacheDb() {
+            if (!refCacheDbPromise) {
+                refCacheDbPromise = new Promise((resolve) => {
+                    if (!window.indexedDB) return resolve(null);
+                    const req = indexedDB.open(REF_CACHE_DB, 1);
+                    req.onupgradeneeded = () => req.result.createObjectStore(REF_CACHE_STORE);
+                    req.onsuccess = () => resolve(req.result);
+                    req.onerror = () => resolve(null);  // 사용할 수 없으면 캐시 없이 동작
+                });
+            }
+            return refCacheDbPromise;
+        }
+
+        async function refCacheGet(key) {
+            const db = await openRefCacheDb();
+            if (!db) return null;
+            return new Promise((resolve) => {
+                const req = db.transaction(REF_CACHE_STORE, 'readonly').objectStore(REF_CACHE_STORE).get(key);
+                req.onsuccess = () => resolve(req.result || null);
+                req.onerror = () => resolve(null);
+            });
+        }
+
+        async function refCachePut(key, value) {
+            const db = await openRefCacheDb();
+            if (!db) return;
+            db.transaction(REF_CACHE_STORE, 'readwrite').objectStore(REF_CACHE_STORE).put(value, key);
+        }
+
+        function loadRefVersions(force = false) {
+            const now = Date.now();
+            if (force || !refVersionPromise || now - refVersionFetchedAt > REF_VERSION_TTL) {
+                refVersionFetchedAt = now;
+                refVersionPromise = fetch(`${API_BASE}/api/ref-data/version`)
+                    .then(r => r.json())
+                    .then(d => (d.success ? d.data : {}))
+                    .catch(() => ({}));
+            }
+            return refVersionPromise;
+        }
+
+        // 기준 정보 목록 조회: 캐시된 버전이 현재 테이블 버전과 같으면 서버 조회 없이 반환
+        // (응답 형식은 원래 API와 같은 {success, data})
+        async function fetchRefData(url, table) {
+            const prefetched = takePrefetched(url);
+            if (prefetched) return prefetched;
+
+            const versions = await loadRefVersions();
+            const version = versions[table];
+            const cached = await refCacheGet(url);
+            if (version && cached && cached.version === version) {
+                return cached.response;
+            }
+
+            const response = await fetch(url);
+            const data = await response.json();
+            if (data.success && version) {
+                refCachePut(url, { version: version, response: data });
+            }
+            return data;
+        }
+
+        // 관리 화면에서 기준 정보를 바꾼 직후에는 버전을 다시 확인
+        function invalidateRefVersions() {
+            refVersionPromise = null;
+        }
+
+        // ============================================
+        // 초기 데이터 일괄 조회 (/api/bootstrap)
+        // 화면에 필요한 목록을 한 번의 요청으로 받아 두고, 각 목록 함수는 받아 둔 응답을 먼저 사용
+        // ============================================
+        const prefetchedResponses = {};
+
+        // 받아 둔 응답은 한 번만, 받은 직후(REF_VERSION_TTL 이내)에만 사용 (오래된 목록 표시 방지)
+        function takePrefetched(url) {
+            const entry = prefetchedResponses[url];
+            delete prefetchedResponses[url];
+            if (!entry || Date.now() - entry.at > REF_VERSION_TTL) return null;
+            return entry.data;
+        }
+
+        function putPrefetched(url, data) {
+            prefetchedResponses[url] = { data: data, at: Date.now() };
+        }
+
+        async function prefetchBootstrap(include = null) {
+            try {
+                const query = include ? `?include=${include.join(',')}` : '';
+                const response = await fetch(`${API_BASE}/api/bootstrap${query}`);
+                const result = await response.json();
+                if (!result.success) return;
+
+                const d = result.data;
+                const versions = d.versions || {};
+                refVersionPromise = Promise.resolve(versions);
+                refVersionFetchedAt = Date.now();
+
+                // 기준 정보는 IndexedDB 캐시에도 저장 (URL별 응답 형식 그대로)
+                const store = (url, table, data) => {
+                    const wrapped = { success: true, data: data };
+                    putPrefetched(url, wrapped);
+                    if (versions[table]) refCachePut(url, { version: versions[table], response: wrapped });
+                };
+
+                if (d.powders) {
+                    store(`${API_BASE}/api/powder-list`, 'powder_spec', d.powders.map(p => p.powder_name));
+                    ['incoming', 'mixing'].forEach(category => {
+                        store(`${API_BASE}/api/powder-list?category=${category}`, 'powder_spec',
+                            d.powders.filter(p => p.category === category).map(p => p.powder_name));
+                    });
+                }
+                if (d.inspectors) store(`${API_BASE}/api/inspector-list`, 'inspector', d.inspectors);
+                if (d.operators) store(`${API_BASE}/api/operator-list`, 'operator', d.operators);
+                if (d.products) store(`${API_BASE}/api/blending/products`, 'recipe', d.products);
+
+                if (d.incompleteInspections) {
+                    putPrefetched(`${API_BASE}/api/incomplete-inspections`, { success: true, data: d.incompleteInspections });
+                }
+                if (d.inProgressOrders) {
+                    putPrefetched(`${API_BASE}/api/blending-orders?status=in_progress`, { success: true, orders: d.inProgressOrders });
+                }
+            } catch (error) {
+                // 실패해도 각 목록 함수가 개별 API로 조회
+                console.warn('초기 데이터 조회 실패:', error);
+            }
+        }
+
+        // ============================================
+        // 저장 요청 멱등성 키 (Idempotency-Key)
+        // ============================================
+        // 응답을 받기 전에 끊긴 저장을 다시 보내면 서버가 이전 처리 결과를 그대로 돌려줌
+        // 키는 저장 작업별로 유지하다가 성공하면 폐기 (실패 응답은 서버에 저장되지 않으므로 같은 키로 재처리)
+        const pendingIdempotencyKeys = {};
+
+        function newIdempotencyKey() {
+            if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+            return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+        }
+
+        async function sendIdempotent(operation, url, options = {}) {
+            if (!pendingIdempotencyKeys[operation]) pendingIdempotencyKeys[operation] = newIdempotencyKey();
+
+            const response = await fetch(url, {
+                ...options,
+                headers: { ...(options.headers || {}), 'Idempotency-Key': pendingIdempotencyKeys[operation] }
+            });
+            const data = await response.json();
+
+            // 성공했거나 내용이 바뀐 요청(422)이면 다음 저장은 새 키로
+            if (data.success || response.status === 422) delete pendingIdempotencyKeys[operation];
+            return data;
+        }
+
         // ============================================
         // 페이지 전환
         // ============================================
@@ -88,10 +254,12 @@ function updateLanguage() {
 
             // 페이지별 초기화
             if (pageName === 'dashboard') {
-                loadIncompleteInspections();
+                prefetchBootstrap(['incompleteInspections']).then(loadIncompleteInspections);
             } else if (pageName === 'incoming') {
-                loadPowderList('incoming');
-                loadInspectorList('incoming');
+                prefetchBootstrap(['powders', 'inspectors']).then(() => {
+                    loadPowderList('incoming');
+                    loadInspectorList('incoming');
+                });
             } else if (pageName === 'mixing') {
                 // mixing 페이지는 완료된 배합작업 목록만 보여줌
                 loadMixingPage();
@@ -153,8 +321,8 @@ function updateLanguage() {
         // ============================================
         async function loadIncompleteInspections() {
             try {
-                const response = await fetch(`${API_BASE}/api/incomplete-inspections`);
-                const data = await response.json();
+                const url = `${API_BASE}/api/incomplete-inspections`;
+                const data = takePrefetched(url) || await (await fetch(url)).json();
 
                 const listDiv = document.getElementById('incompleteList');
 
@@ -223,8 +391,7 @@ function updateLanguage() {
                 const url = category
                     ? `${API_BASE}/api/powder-list?category=${category}`
                     : `${API_BASE}/api/powder-list`;
-                const response = await fetch(url);
-                const data = await response.json();
+                const data = await fetchRefData(url, 'powder_spec');
 
                 const selectId = category ? `${category}PowderName` : 'powderName';
                 const select = document.getElementById(selectId);
@@ -247,8 +414,7 @@ function updateLanguage() {
 
         async function loadInspectorList(category = null) {
             try {
-                const response = await fetch(`${API_BASE}/api/inspector-list`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/inspector-list`, 'inspector');
 
                 const selectId = category ? `${category}Inspector` : 'inspector';
                 const select = document.getElementById(selectId);
@@ -281,9 +447,10 @@ function updateLanguage() {
             const lotNumber = document.getElementById('incomingLotNumber').value;
             const inspectionType = document.getElementById('incomingInspectionType').value;
             const inspector = document.getElementById('incomingInspector').value;
+            const receivedQty = document.getElementById('incomingReceivedQty')?.value || null;
             const category = 'incoming';
 
-            await startInspection(powderName, lotNumber, inspectionType, inspector, category);
+            await startInspection(powderName, lotNumber, inspectionType, inspector, category, receivedQty);
         });
         }
 
@@ -337,12 +504,12 @@ function updateLanguage() {
         }
 
         // 검사 시작 공통 함수
-        async function startInspection(powderName, lotNumber, inspectionType, inspector, category) {
+        async function startInspection(powderName, lotNumber, inspectionType, inspector, category, receivedQty = null) {
             try {
                 const response = await fetch(`${API_BASE}/api/start-inspection`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ powderName, lotNumber, inspectionType, inspector, category })
+                    body: JSON.stringify({ powderName, lotNumber, inspectionType, inspector, category, receivedQty })
                 });
 
                 const data = await response.json();
@@ -613,7 +780,7 @@ function updateLanguage() {
             if (!pending) return alert('먼저 판정(검증)을 수행하세요.');
 
             try {
-                const response = await fetch(`${API_BASE}/api/save-item`, {
+                const data = await sendIdempotent(`save-item:${currentInspection.powderName}:${currentInspection.lotNumber}:${itemName}`, `${API_BASE}/api/save-item`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({
@@ -624,8 +791,6 @@ function updateLanguage() {
                     })
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     const resultDiv = document.getElementById('result-' + itemName);
                     resultDiv.style.display = 'block';
@@ -704,7 +869,7 @@ function updateLanguage() {
             });
 
             try {
-                const response = await fetch(`${API_BASE}/api/save-particle-size`, {
+                const data = await sendIdempotent(`save-particle-size:${currentInspection.powderName}:${currentInspection.lotNumber}`, `${API_BASE}/api/save-particle-size`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({
@@ -714,8 +879,6 @@ function updateLanguage() {
                     })
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     const resultDiv = document.getElementById('result-' + itemName);
                     resultDiv.style.display = 'block';
@@ -813,7 +976,7 @@ function updateLanguage() {
             if (pending.result !== 'PASS') return alert('모든 항목이 합격일 때만 최종저장할 수 있습니다.');
 
             try {
-                const response = await fetch(`${API_BASE}/api/save-particle-size`, {
+                const data = await sendIdempotent(`save-particle-size:${currentInspection.powderName}:${currentInspection.lotNumber}`, `${API_BASE}/api/save-particle-size`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({
@@ -823,8 +986,6 @@ function updateLanguage() {
                     })
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     const resultDiv = document.getElementById('result-' + itemName);
                     resultDiv.style.display = 'block';
@@ -855,8 +1016,7 @@ function updateLanguage() {
         // ============================================
         async function loadPowderListForSearch() {
             try {
-                const response = await fetch(`${API_BASE}/api/powder-list`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/powder-list`, 'powder_spec');
 
                 const select = document.getElementById('searchPowderName');
                 select.innerHTML = '<option value="">전체</option>';
@@ -1099,8 +1259,7 @@ function updateLanguage() {
                     // 배합 분말 모드인 경우, 레시피에 등록된 제품명과 교차검증하여 표시
                     if (filterCategory === 'mixing') {
                         try {
-                            const r = await fetch(`${API_BASE}/api/admin/recipes`);
-                            const rdata = await r.json();
+                            const rdata = await fetchRefData(`${API_BASE}/api/admin/recipes`, 'recipe');
                             if (rdata.success && rdata.data.length > 0) {
                                 const productNames = new Set(rdata.data.map(p => p.product_name));
                                 specs = specs.filter(s => productNames.has(s.powder_name));
@@ -1280,8 +1439,7 @@ function updateLanguage() {
 
                 // 배합규격서 제품명 목록 로드
                 try {
-                    const response = await fetch(`${API_BASE}/api/admin/recipes`);
-                    const data = await response.json();
+                    const data = await fetchRefData(`${API_BASE}/api/admin/recipes`, 'recipe');
 
                     let options = '<option value="">' + t('selectPlaceholder') + '</option>';
                     if (data.success && data.data.length > 0) {
@@ -1475,8 +1633,13 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
+                    // 규격 수정 시 서버에서 기존 검사 결과 재판정 작업이 시작됨
+                    let rejudgeJobId = data.jobId || null;
+                    let rejudgeError = data.rejudge_error || null;
+
                     // 입도분석 데이터 저장
                     const particleType = document.getElementById('particleSizeType').value;
                     if (particleType !== '비활성') {
@@ -1505,7 +1668,7 @@ function updateLanguage() {
 
                         // 입도분석 규격 저장
                         if (particleSpecs.length > 0) {
-                            await fetch(`${API_BASE}/api/admin/particle-size/bulk`, {
+                            const particleResponse = await fetch(`${API_BASE}/api/admin/particle-size/bulk`, {
                                 method: 'POST',
                                 headers: { 'Content-Type': 'application/json' },
                                 body: JSON.stringify({
@@ -1513,10 +1676,14 @@ function updateLanguage() {
                                     specs: particleSpecs
                                 })
                             });
+                            const particleData = await particleResponse.json();
+                            if (particleData.jobId) rejudgeJobId = particleData.jobId;
+                            if (particleData.rejudge_error) rejudgeError = particleData.rejudge_error;
                         }
                     }
 
-                    alert('저장되었습니다.');
+                    alert(rejudgeError ? `저장되었습니다. (기존 검사 결과 재판정 시작 실패: ${rejudgeError})` : '저장되었습니다.');
+                    if (rejudgeJobId) watchRejudgeJob(rejudgeJobId, powderName);
                     hidePowderForm();
                     loadPowderSpecs();
                     loadParticlePowderList();
@@ -1532,6 +1699,38 @@ function updateLanguage() {
         });
         }
 
+        // 규격 변경 후 재판정 작업 완료 시 판정이 바뀐 LOT 수 안내
+        function watchRejudgeJob(jobId, powderName) {
+            const poll = async () => {
+                try {
+                    const response = await fetch(`${API_BASE}/api/jobs/${jobId}`);
+                    const data = await response.json();
+                    if (!data.success) return;
+
+                    const job = data.data;
+                    if (job.status === 'queued' || job.status === 'running') {
+                        setTimeout(poll, 1000);
+                        return;
+                    }
+                    if (job.status === 'failed') {
+                        alert(`${powderName} 재판정 실패: ${job.error}`);
+                        return;
+                    }
+                    if (job.status === 'cancelled') return;
+
+                    const flips = job.result.final_flips || {};
+                    const flipCount = Object.values(flips).reduce((s, v) => s + v, 0);
+                    if (flipCount > 0) {
+                        const detail = Object.entries(flips).filter(([, v]) => v > 0).map(([k, v]) => `${k}: ${v}건`).join(', ');
+                        alert(`${powderName} 규격 변경으로 최종 판정이 바뀐 LOT이 ${flipCount}건 있습니다.\n(${detail})`);
+                    }
+                } catch (error) {
+                    console.error('재판정 작업 확인 오류:', error);
+                }
+            };
+            poll();
+        }
+
         async function deletePowderSpec(specId, powderName) {
             if (!confirm(`'${powderName}' 분말을 삭제하시겠습니까?`)) return;
 
@@ -1541,6 +1740,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('삭제되었습니다.');
@@ -1560,8 +1760,7 @@ function updateLanguage() {
 
         async function loadParticlePowderList() {
             try {
-                const response = await fetch(`${API_BASE}/api/powder-list`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/powder-list`, 'powder_spec');
 
                 const select = document.getElementById('particlePowderSelect');
                 if (!select) {
@@ -1780,6 +1979,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('추가되었습니다.');
@@ -1802,6 +2002,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('삭제되었습니다.');
@@ -1849,6 +2050,73 @@ function updateLanguage() {
             }
         }
 
+        // ============================================
+        // 관리자 페이지: 원재료 LOT 재고
+        // ============================================
+        async function loadLotInventory() {
+            const listDiv = document.getElementById('lotStockList');
+            const params = new URLSearchParams();
+            const powderName = document.getElementById('lotStockPowder').value.trim();
+            if (powderName) params.append('powder_name', powderName);
+            if (document.getElementById('lotStockAvailable').checked) params.append('available', '1');
+
+            try {
+                const response = await fetch(`${API_BASE}/api/lot-inventory?${params}`);
+                const data = await response.json();
+
+                if (data.success && data.data.length > 0) {
+                    let html = `<table><tr><th>${t('powderName')}</th><th>${t('lotNumber')}</th><th>판정</th><th>입고 수량 (kg)</th><th>사용 (kg)</th><th>잔량 (kg)</th><th>${t('action')}</th></tr>`;
+
+                    data.data.forEach(lot => {
+                        const remaining = lot.remaining_qty != null ? formatNumber(lot.remaining_qty.toFixed(2)) : '-';
+                        const received = lot.received_qty != null ? formatNumber(lot.received_qty) : '-';
+                        html += `
+                            <tr>
+                                <td>${lot.powder_name}</td>
+                                <td>${lot.lot_number}</td>
+                                <td>${lot.final_result || '-'}</td>
+                                <td>${received}</td>
+                                <td>${formatNumber(lot.used_qty.toFixed(2))}</td>
+                                <td>${remaining}</td>
+                                <td>
+                                    <button class="btn secondary" onclick="editReceivedQty('${lot.powder_name}', '${lot.lot_number}', ${lot.received_qty})" style="padding: 8px 12px;">${t('edit')}</button>
+                                </td>
+                            </tr>
+                        `;
+                    });
+
+                    html += '</table>';
+                    listDiv.innerHTML = html;
+                } else {
+                    listDiv.innerHTML = '<div class="empty-message">재고 LOT이 없습니다.</div>';
+                }
+            } catch (error) {
+                console.error('LOT 재고 로딩 실패:', error);
+            }
+        }
+
+        async function editReceivedQty(powderName, lotNumber, current) {
+            const value = prompt(`${powderName} / ${lotNumber}\n입고 수량 (kg)`, current != null ? current : '');
+            if (value === null || value.trim() === '') return;
+
+            try {
+                const response = await fetch(`${API_BASE}/api/lot-inventory`, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ powder_name: powderName, lot_number: lotNumber, received_qty: value.trim() })
+                });
+                const data = await response.json();
+
+                if (data.success) {
+                    loadLotInventory();
+                } else {
+                    alert('저장 실패: ' + data.message);
+                }
+            } catch (error) {
+                alert('오류: ' + error.message);
+            }
+        }
+
         async function addOperator() {
             const name = document.getElementById('newOperatorName').value.trim();
 
@@ -1865,6 +2133,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('추가되었습니다.');
@@ -1887,6 +2156,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('삭제되었습니다.');
@@ -1907,8 +2177,7 @@ function updateLanguage() {
 
         async function loadProductRecipes() {
             try {
-                const response = await fetch(`${API_BASE}/api/admin/recipes`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/admin/recipes`, 'recipe');
 
                 const listDiv = document.getElementById('productList');
 
@@ -1992,8 +2261,7 @@ function updateLanguage() {
         async function editProduct(productName) {
             try {
                 // 제품의 Recipe 데이터 가져오기
-                const response = await fetch(`${API_BASE}/api/admin/recipes?product_name=${encodeURIComponent(productName)}`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/admin/recipes?product_name=${encodeURIComponent(productName)}`, 'recipe');
 
                 if (!data.success || !data.data || data.data.length === 0) {
                     alert('제품 정보를 찾을 수 없습니다.');
@@ -2200,6 +2468,7 @@ function updateLanguage() {
                     });
 
                     const data = await response.json();
+                    invalidateRefVersions();
                     if (!data.success) {
                         throw new Error(data.message);
                     }
@@ -2223,6 +2492,7 @@ function updateLanguage() {
                 });
 
                 const data = await response.json();
+                invalidateRefVersions();
 
                 if (data.success) {
                     alert('삭제되었습니다.');
@@ -2246,6 +2516,7 @@ function updateLanguage() {
             // 목록 먼저 보이도록 폼 숨김
             hideBlendingForm();
 
+            await prefetchBootstrap(['products', 'operators', 'inProgressOrders']);
             await loadProductsForBlending();
             await loadOperatorList();
             await generateAndSetBatchLot();
@@ -2372,8 +2643,7 @@ function updateLanguage() {
 
         async function loadProductsForBlending() {
             try {
-                const response = await fetch(`${API_BASE}/api/blending/products`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/blending/products`, 'recipe');
 
                 const select = document.getElementById('blendingProductName');
                 // 제품 목록 로드 시 잠금 해제(직접 선택 가능하게)
@@ -2399,8 +2669,7 @@ function updateLanguage() {
 
         async function loadOperatorList() {
             try {
-                const response = await fetch(`${API_BASE}/api/operator-list`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/operator-list`, 'operator');
 
                 const select = document.getElementById('blendingOperator');
                 select.innerHTML = '<option value="">선택하세요</option>';
@@ -2446,8 +2715,7 @@ function updateLanguage() {
             currentProductCode = selectedOption.dataset.productCode || '';
 
             try {
-                const response = await fetch(`${API_BASE}/api/blending/recipe/${encodeURIComponent(productName)}`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/blending/recipe/${encodeURIComponent(productName)}`, 'recipe');
 
                 if (data.success && data.data.length > 0) {
                     currentRecipe = data.data;
@@ -2686,14 +2954,12 @@ function updateLanguage() {
                     requestBody.work_order = workOrder;
                 }
 
-                const response = await fetch(`${API_BASE}/api/blending/start`, {
+                const data = await sendIdempotent('blending-start', `${API_BASE}/api/blending/start`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(requestBody)
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     alert(`배합 작업이 시작되었습니다.\n배합 LOT: ${data.batch_lot}`);
                     // 원재료 투입 페이지로 이동
@@ -3035,14 +3301,21 @@ function updateLanguage() {
                         const lotSelect2 = document.getElementById(`lot-${recipeId}-2`);
                         if (!lotSelect1) return;
 
-                        const response = await fetch(`${API_BASE}/api/completed-lots/${encodeURIComponent(powderName)}?category=${category}`);
+                        // 수입분말은 선입선출 추천 순(오래된 합격 LOT부터, 소진 LOT 제외)
+                        const fifo = category === 'incoming';
+                        const url = fifo
+                            ? `${API_BASE}/api/lot-recommendation/${encodeURIComponent(powderName)}`
+                            : `${API_BASE}/api/completed-lots/${encodeURIComponent(powderName)}?category=${category}`;
+                        const response = await fetch(url);
                         const data = await response.json();
 
                         if (data.success && data.lots && data.lots.length > 0) {
                             const optionsHtml = ['<option value="">LOT 선택</option>'];
-                            data.lots.forEach(lot => {
+                            data.lots.forEach((lot, i) => {
                                 const inspectionDate = new Date(lot.inspection_time).toLocaleDateString('ko-KR');
-                                optionsHtml.push(`<option value="${lot.lot_number}">${lot.lot_number} (검사일: ${inspectionDate})</option>`);
+                                const stock = lot.remaining_qty != null ? `, 잔량: ${formatNumber(lot.remaining_qty.toFixed(2))} kg` : '';
+                                const mark = fifo && i === 0 ? '★ ' : '';
+                                optionsHtml.push(`<option value="${lot.lot_number}">${mark}${lot.lot_number} (검사일: ${inspectionDate}${stock})</option>`);
                             });
 
                             lotSelect1.innerHTML = optionsHtml.join('');
@@ -3166,7 +3439,8 @@ function updateLanguage() {
 
                     if (data.success && data.valid) {
                         if (data.powder_name === expectedPowder) {
-                            if (validationDiv) validationDiv.innerHTML = `<p style="color: #4CAF50; font-weight: 600;">✓ LOT${idx} 검증 통과: ${data.powder_name} (검사일: ${data.inspection_time})</p>`;
+                            const stock = data.remaining_qty != null ? `, 잔량: ${formatNumber(data.remaining_qty.toFixed(2))} kg` : '';
+                            if (validationDiv) validationDiv.innerHTML = `<p style="color: #4CAF50; font-weight: 600;">✓ LOT${idx} 검증 통과: ${data.powder_name} (검사일: ${data.inspection_time}${stock})</p>`;
                             if (validationRow) validationRow.style.display = 'table-row';
                             if (judgementDiv && judgementDiv.getAttribute('data-judgement') === 'pass') {
                                 if (saveBtn) saveBtn.disabled = false;
@@ -3225,11 +3499,13 @@ function updateLanguage() {
                 return;
             }
 
-            // material_lot 합치기 (두개이면 쉼표로 구분)
-            const materialLot = lot2 ? `${lot1},${lot2}` : lot1;
+            // material_lot 합치기 (두개이면 쉼표로 구분), LOT별 중량은 재고 차감용
+            const lotEntries = [[lot1, w1], [lot2, w2]].filter(([lot]) => lot);
+            const materialLot = lotEntries.map(([lot]) => lot).join(',');
+            const lotWeights = lotEntries.map(([, weight]) => isNaN(weight) ? 0 : weight);
 
             try {
-                const response = await fetch(`${API_BASE}/api/blending/material-input`, {
+                const data = await sendIdempotent(`material-input:${currentBlendingWork.id}:${recipeId}`, `${API_BASE}/api/blending/material-input`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify({
@@ -3239,13 +3515,12 @@ function updateLanguage() {
                         material_lot: materialLot,
                         target_weight: targetWeight,
                         actual_weight: actualWeightNum,
+                        lot_weights: lotWeights,
                         tolerance_percent: tolerancePercent,
                         operator: currentBlendingWork.operator
                     })
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     if (data.is_valid) {
                         alert('✓ 원재료 투입이 기록되었습니다.');
@@ -3273,12 +3548,10 @@ function updateLanguage() {
             }
 
             try {
-                const response = await fetch(`${API_BASE}/api/blending/complete/${currentBlendingWork.id}`, {
+                const data = await sendIdempotent(`blending-complete:${currentBlendingWork.id}`, `${API_BASE}/api/blending/complete/${currentBlendingWork.id}`, {
                     method: 'PUT'
                 });
 
-                const data = await response.json();
-
                 if (data.success) {
                     // 서버측 처리가 완료됨 — 라벨을 생성하여 우측 패널에 표시합니다.
                     alert('배합 작업이 완료되었습니다! 우측 라벨을 확인해 주세요.');
@@ -3419,49 +3692,31 @@ function updateLanguage() {
             }
         }
 
-        function printLabel(index) {
-            // 개별 라벨 인쇄: 해당 라벨 DOM을 복사하여 새 창에서 인쇄
-            const list = document.getElementById('labelList');
-            const labelEl = list && list.children && list.children[index - 1];
-            if (!labelEl) return alert('라벨을 찾을 수 없습니다.');
-
-            const content = labelEl.innerHTML;
-            const w = window.open('', '_blank');
-            if (!w) return alert('팝업 차단을 확인하세요.');
-
-            const html = `
-                <html>
-                <head>
-                    <meta charset="utf-8">
-                    <title>라벨 인쇄</title>
-                    <style>
-                        body { margin:0; padding:0; }
-                        .label { width:100mm; height:100mm; display:flex; align-items:center; justify-content:center; }
-                    </style>
-                </head>
-                <body>
-                    <div class="label">${content}</div>
-                    <script>
-                        window.onload = function() { setTimeout(function(){ window.print(); window.close(); }, 300); };
-                    <\/script>
-                </body>
-                </html>
-            `;
+        // 라벨 인쇄 문서는 서버(/api/labels)에서 Pack 전체를 한 문서로 생성 (팝업 1개, 인쇄 작업 1건)
+        function openLabelDocument(packs) {
+            if (!currentBlendingWork || !currentBlendingWork.id) return alert('라벨 정보를 불러올 수 없습니다.');
+
+            const params = new URLSearchParams({ workId: currentBlendingWork.id });
+            const t = translations[currentLang];
+            if (t.companyName) params.set('company', t.companyName);
+            if (t.labelDate) params.set('labelDate', t.labelDate);
+            if (t.labelPack) params.set('labelPack', t.labelPack);
+            if (t.labelWeight) params.set('labelWeight', t.labelWeight);
+            if (packs) params.set('packs', packs.join(','));
+
+            const w = window.open(`${API_BASE}/api/labels?${params.toString()}`, '_blank');
+            if (!w) alert('팝업 차단을 확인하세요.');
+        }
 
-            w.document.open();
-            w.document.write(html);
-            w.document.close();
+        function printLabel(index) {
+            openLabelDocument([index]);
         }
 
         function printAllLabels() {
             const list = document.getElementById('labelList');
             if (!list || !list.children || list.children.length === 0) return alert('출력할 라벨이 없습니다.');
 
-            // 간단한 방식: 개별 라벨을 순차적으로 인쇄 (브라우저가 팝업 차단을 할 수 있음)
-            for (let i = 0; i < list.children.length; i++) {
-                // 약간의 지연을 주어 연속 팝업/인쇄가 처리되도록 함
-                setTimeout(() => { printLabel(i + 1); }, i * 700);
-            }
+            openLabelDocument(null);
         }
 
         // ============================================
@@ -3646,6 +3901,28 @@ function updateLanguage() {
         });
         }
 
+        // LOT 번호 일부 입력 시 후보 목록 표시 (/api/lot-search)
+        let lotSuggestionTimer = null;
+        safeAddEventListener('traceabilityLotNumber', 'input', (e) => {
+            const query = e.target.value.trim();
+            clearTimeout(lotSuggestionTimer);
+            if (query.length < 2) return;
+
+            lotSuggestionTimer = setTimeout(async () => {
+                try {
+                    const response = await fetch(`${API_BASE}/api/lot-search?q=${encodeURIComponent(query)}&limit=10`);
+                    const data = await response.json();
+                    if (!data.success) return;
+
+                    const datalist = document.getElementById('traceabilityLotSuggestions');
+                    const lots = [...new Set(data.data.map(r => r.lot))];
+                    datalist.innerHTML = lots.map(lot => `<option value="${lot}"></option>`).join('');
+                } catch (error) {
+                    console.error('LOT 검색 오류:', error);
+                }
+            }, 250);
+        });
+
         async function traceByBatchLot(batchLot) {
             try {
                 const response = await fetch(`${API_BASE}/api/traceability/batch/${encodeURIComponent(batchLot)}`);
@@ -3886,8 +4163,7 @@ function updateLanguage() {
 
         async function loadOrderProductList() {
             try {
-                const response = await fetch(`${API_BASE}/api/blending/products`);
-                const data = await response.json();
+                const data = await fetchRefData(`${API_BASE}/api/blending/products`, 'recipe');
 
                 const select = document.getElementById('orderProductName');
                 if (!select) return;
@@ -3924,7 +4200,7 @@ function updateLanguage() {
                 }
 
                 try {
-                    const response = await fetch(`${API_BASE}/api/blending-orders`, {
+                    const data = await sendIdempotent('blending-order', `${API_BASE}/api/blending-orders`, {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({
@@ -3936,8 +4212,6 @@ function updateLanguage() {
                         })
                     });
 
-                    const data = await response.json();
-
                     if (data.success) {
                         alert(`✓ ${data.message}`);
                         // 폼 초기화
@@ -4033,8 +4307,8 @@ function updateLanguage() {
         // 배합 페이지에서 작업 시작을 위해 간단히 작업지시서 목록을 렌더링
         async function loadBlendingOrdersForBlending() {
             try {
-                const response = await fetch(`${API_BASE}/api/blending-orders?status=in_progress`);
-                const data = await response.json();
+                const url = `${API_BASE}/api/blending-orders?status=in_progress`;
+                const data = takePrefetched(url) || await (await fetch(url)).json();
 
                 const container = document.getElementById('blendingOrdersForBlending');
                 if (!container) return;
@@ -4239,7 +4513,9 @@ function updateLanguage() {
         }
 
         // 초기 로드
-        window.onload = () => {
+        window.onload = async () => {
             updateLanguage();
+            // 시작 시 모든 기준 정보/진행 현황을 한 번에 받아 캐시해 두면 이후 메뉴 전환은 버전 확인만 함
+            await prefetchBootstrap();
             loadIncompleteInspections();
         };
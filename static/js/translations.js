@@ -83,6 +83,11 @@ const translations = {
         adminTabPowderSpec: '분말사양관리',
         adminTabUserMgmt: '검사자&작업자관리',
         adminTabRecipeMgmt: '배합규격서관리',
+        adminTabLotStock: 'LOT 재고',
+        lotStockTitle: '원재료 LOT 재고',
+        lotStockPowderPlaceholder: '분말명',
+        lotStockAvailableOnly: '잔량 있는 LOT만',
+        receivedQtyLabel: '입고 수량 (kg)',
         powderSpecManagement: '분말 사양 관리',
         addNewPowder: '+ 새 분말 추가',
         addPowder: '새 분말 추가',
@@ -312,6 +317,11 @@ const translations = {
         adminTabPowderSpec: 'Powder Spec Management',
         adminTabUserMgmt: 'Inspector & Operator Management',
         adminTabRecipeMgmt: 'Recipe Management',
+        adminTabLotStock: 'LOT Stock',
+        lotStockTitle: 'Material LOT Stock',
+        lotStockPowderPlaceholder: 'Powder name',
+        lotStockAvailableOnly: 'Only LOTs with stock',
+        receivedQtyLabel: 'Received Qty (kg)',
         powderSpecManagement: 'Powder Specification Management',
         addNewPowder: '+ Add New Powder',
         addPowder: 'Add New Powder',
@@ -0,0 +1,128 @@
+"""
+원재료 LOT 재고 원장(lot_inventory) 트리거 테스트
+투입 기록 → LOT별 사용량 차감, 진행 중 작업 삭제 → 재고 복원, 완료 작업 보관(archive) → 사용량 유지,
+잘못된 LOT별 중량 거부를 확인합니다.
+
+실행:
+    python -m pytest tests
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from contextlib import closing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+POWDER = 'HSPP-1'
+
+
+class LotInventoryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # 서버 모듈은 상대 경로(database.db, archive.db)를 사용하므로 임시 폴더의 DB 복사본에서 실행
+        cls.cwd = os.getcwd()
+        cls.tmpdir = tempfile.mkdtemp()
+        shutil.copy(os.path.join(ROOT, 'database.db'), os.path.join(cls.tmpdir, 'database.db'))
+        os.chdir(cls.tmpdir)
+
+        import app
+        cls.app = app
+        app.ensure_schema()
+        cls.client = app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        self.lots = [f'{self.id().rsplit(".", 1)[-1]}-{n}' for n in ('A', 'B')]
+        with closing(self.app.get_db()) as conn:
+            for lot in self.lots:
+                conn.execute('''
+                    INSERT INTO inspection_result
+                    (powder_name, lot_number, inspector, inspection_time, inspection_type, final_result, category)
+                    VALUES (?, ?, 'test', '2020-01-01 00:00:00', '일상점검', 'PASS', 'incoming')
+                ''', (POWDER, lot))
+            conn.commit()
+        for lot in self.lots:
+            response = self.client.put('/api/lot-inventory', json={
+                'powder_name': POWDER, 'lot_number': lot, 'received_qty': 100})
+            self.assertTrue(response.json['success'], response.json)
+
+    def create_work(self, batch_lot):
+        with closing(self.app.get_db()) as conn:
+            cursor = conn.execute('''
+                INSERT INTO blending_work (product_name, batch_lot, target_total_weight, status)
+                VALUES ('TEST', ?, 30, 'in_progress')
+            ''', (batch_lot,))
+            conn.commit()
+            return cursor.lastrowid
+
+    def add_input(self, work_id, lot_weights):
+        return self.client.post('/api/blending/material-input', json={
+            'blending_work_id': work_id,
+            'powder_name': POWDER,
+            'material_lot': ', '.join(self.lots),
+            'target_weight': 30,
+            'actual_weight': 30,
+            'lot_weights': lot_weights,
+        }).json
+
+    def inventory(self):
+        with closing(self.app.get_db()) as conn:
+            rows = conn.execute(f'''
+                SELECT lot_number, used_qty, received_qty - used_qty FROM lot_inventory
+                WHERE powder_name = ? AND lot_number IN ({', '.join('?' * len(self.lots))})
+                ORDER BY lot_number
+            ''', (POWDER, *self.lots)).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def test_input_then_delete_work_restores_stock(self):
+        work_id = self.create_work('T-BL-DELETE')
+
+        result = self.add_input(work_id, [10, 20])
+        self.assertTrue(result['success'], result)
+        self.assertEqual(self.inventory(), {self.lots[0]: (10, 90), self.lots[1]: (20, 80)})
+
+        result = self.client.delete(f'/api/blending/work/{work_id}').json
+        self.assertTrue(result['success'], result)
+        self.assertEqual(self.inventory(), {self.lots[0]: (0, 100), self.lots[1]: (0, 100)})
+
+    def test_archiving_completed_work_keeps_usage(self):
+        import archive
+
+        work_id = self.create_work('T-BL-ARCHIVE')
+        self.assertTrue(self.add_input(work_id, [10, 20])['success'])
+        with closing(self.app.get_db()) as conn:
+            conn.execute('''
+                UPDATE blending_work SET status = 'completed', end_time = '2020-01-02 00:00:00' WHERE id = ?
+            ''', (work_id,))
+            conn.commit()
+
+        with closing(sqlite3.connect('database.db', isolation_level=None)) as conn:
+            moved = archive.archive_old_data(conn, horizon_days=365)['moved']
+        self.assertGreaterEqual(moved['material_input'], 1)
+        self.assertEqual(self.inventory(), {self.lots[0]: (10, 90), self.lots[1]: (20, 80)})
+
+    def test_invalid_lot_weights_are_rejected(self):
+        work_id = self.create_work('T-BL-INVALID')
+
+        for lot_weights in ([10, 10], [40, -10], [30]):
+            result = self.add_input(work_id, lot_weights)
+            self.assertFalse(result['success'], lot_weights)
+
+        self.assertEqual(self.inventory(), {self.lots[0]: (0, 100), self.lots[1]: (0, 100)})
+        with closing(self.app.get_db()) as conn:
+            count = conn.execute('SELECT COUNT(*) FROM material_input WHERE blending_work_id = ?', (work_id,)).fetchone()[0]
+        self.assertEqual(count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
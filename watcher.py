@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+분말 검사 시스템 - 장비 결과 파일 투입 폴더 감시
+실험실 PC가 투입 폴더(기본 instrument_drop/)에 넣은 CSV 파일을 주기적으로 확인하여,
+크기/수정 시각이 일정 시간 변하지 않으면(복사 완료) 작업 스레드에서 importer.py로 가져옵니다.
+판정/진행 상태 갱신은 /api/import/inspections와 같은 로직을 사용합니다.
+
+처리한 파일은 processed/YYYYMMDD/로, 파일 단위 오류(헤더 불일치 등)는 failed/로 옮깁니다.
+오류 행이 있으면 같은 위치에 '<파일명>.errors.csv' 보고서를 남깁니다.
+
+중복 방지:
+    - 파일 내용 SHA-256을 import_file_log에 기록하여 같은 내용은 한 번만 가져옵니다.
+      기록은 INSERT ... ON CONFLICT DO NOTHING으로 한 작업자만 차지(claim)하며,
+      같은 내용의 파일이 가져오는 중에 또 들어오면 처리가 끝날 때까지 폴더에 둡니다.
+    - 묶음 커밋과 같은 트랜잭션에서 마지막 행 번호와 heartbeat를 기록하므로,
+      처리 중 서버가 중단되어도 heartbeat가 끊긴(CLAIM_STALE 경과) 기록만 커밋된 행 다음부터 이어서 처리합니다.
+
+폴더 위치는 환경 변수 INSPECTION_DROP_DIR로 바꿀 수 있습니다.
+폴더에 mapping.json({"장비 헤더": "표준 컬럼명"})이 있으면 헤더 매핑으로 사용합니다.
+
+사용법:
+    python watcher.py            # 폴더 감시 (Ctrl+C로 종료)
+    python watcher.py --once     # 현재 폴더의 파일만 처리하고 종료
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+
+import importer
+import specs
+
+DB_PATH = 'database.db'
+DROP_DIR = os.environ.get('INSPECTION_DROP_DIR', 'instrument_drop')
+PROCESSED_DIR = 'processed'
+FAILED_DIR = 'failed'
+MAPPING_FILE = 'mapping.json'
+POLL_INTERVAL = 2       # 폴더 확인 주기(초)
+DEBOUNCE_SECONDS = 3    # 크기/수정 시각이 이 시간 동안 그대로면 복사 완료로 판단
+WORKERS = 2             # 동시에 가져올 파일 수
+FILE_EXTENSIONS = ('.csv',)
+LOG_LIMIT = 50          # 상태 조회 시 최근 처리 기록 수
+CLAIM_STALE = 120       # 처리 중 기록의 heartbeat가 이 시간(초) 넘게 끊기면 중단된 것으로 보고 이어서 처리
+
+
+def _iso(dt):
+    return dt.isoformat(timespec='seconds') if dt else None
+
+
+def file_hash(path):
+    """파일 내용 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ClaimLost(Exception):
+    """처리 중이던 파일 기록을 다른 작업자가 이어받음 (이 작업자의 묶음은 롤백)"""
+
+
+def _move(path, target_dir):
+    """파일을 target_dir로 이동 (같은 이름이 있으면 시각 접두어 추가) 후 새 경로 반환"""
+    os.makedirs(target_dir, exist_ok=True)
+    name = os.path.basename(path)
+    target = os.path.join(target_dir, name)
+    if os.path.exists(target):
+        target = os.path.join(target_dir, f"{datetime.now().strftime('%H%M%S%f')}_{name}")
+    shutil.move(path, target)
+    return target
+
+
+class DropFolderWatcher:
+    """투입 폴더 감시 스레드 + 가져오기 작업 스레드 풀"""
+
+    def __init__(self, db_path=DB_PATH, drop_dir=DROP_DIR, spec_index=None, workers=WORKERS, lot_locks=None):
+        self.db_path = db_path
+        self.drop_dir = drop_dir
+        self.spec_index = spec_index or specs.SpecIndex()
+        self.lot_locks = lot_locks    # 서버의 LOT 잠금 (태블릿 저장과 직렬화)
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._pending = {}      # 경로 -> (크기, 수정 시각, 변화 없이 유지된 시작 시각)
+        self._active = set()    # 가져오는 중인 경로
+
+        self.last_scan = None
+        self.last_error = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute('PRAGMA busy_timeout = 30000')
+        return conn
+
+    def start(self):
+        """감시 스레드 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        os.makedirs(self.drop_dir, exist_ok=True)
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='drop-import')
+        self._thread = threading.Thread(target=self._loop, name='drop-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def _loop(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            self.scan()
+
+    def _candidates(self):
+        if not os.path.isdir(self.drop_dir):
+            return []
+        return [
+            os.path.join(self.drop_dir, name) for name in sorted(os.listdir(self.drop_dir))
+            if name.lower().endswith(FILE_EXTENSIONS) and not name.startswith(('.', '~'))
+            and os.path.isfile(os.path.join(self.drop_dir, name))
+        ]
+
+    def scan(self, debounce=DEBOUNCE_SECONDS):
+        """폴더를 한 번 확인하여 복사가 끝난 파일을 작업 스레드에 등록
+
+        Returns:
+            list: 이번에 등록한 파일 경로
+        """
+        now = time.time()
+        submitted = []
+        try:
+            paths = self._candidates()
+            with self._lock:
+                self.last_scan = datetime.now()
+                for path in list(self._pending):
+                    if path not in paths:
+                        del self._pending[path]
+
+                for path in paths:
+                    if path in self._active:
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    size, mtime = stat.st_size, stat.st_mtime
+                    previous = self._pending.get(path)
+                    if not previous or previous[:2] != (size, mtime):
+                        self._pending[path] = (size, mtime, now)
+                        if debounce > 0:
+                            continue
+                    elif now - previous[2] < debounce:
+                        continue
+
+                    del self._pending[path]
+                    self._active.add(path)
+                    submitted.append(path)
+
+            for path in submitted:
+                if self._executor:
+                    self._executor.submit(self._process_safely, path)
+                else:
+                    self._process_safely(path)
+        except Exception as e:
+            with self._lock:
+                self.last_error = f'{_iso(datetime.now())} {e}'
+            print(f"[투입 폴더] 오류: {e}")
+        return submitted
+
+    def _process_safely(self, path):
+        try:
+            self.process_file(path)
+        except Exception as e:
+            with self._lock:
+                self.last_error = f'{_iso(datetime.now())} {os.path.basename(path)}: {e}'
+            print(f"[투입 폴더] {path} 처리 오류: {e}")
+        finally:
+            with self._lock:
+                self._active.discard(path)
+
+    def _load_mapping(self):
+        path = os.path.join(self.drop_dir, MAPPING_FILE)
+        return importer.load_mapping(path) if os.path.exists(path) else None
+
+    def process_file(self, path):
+        """파일 1개 가져오기 후 보관 폴더로 이동
+
+        Returns:
+            dict: import_file_log 상태 (status, rows_*, archived_path 등)
+        """
+        digest = file_hash(path)
+        name = os.path.basename(path)
+        claim = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+        with closing(self._connect()) as conn:
+            cursor = conn.cursor()
+
+            # 새 내용이면 기록을 만들어 차지, 이미 있으면 heartbeat가 끊긴 처리 중 기록만 이어받음
+            cursor.execute('''
+                INSERT INTO import_file_log (file_name, file_hash, file_size, status, claimed_by, heartbeat_at)
+                VALUES (?, ?, ?, 'processing', ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(file_hash) DO NOTHING
+            ''', (name, digest, os.path.getsize(path), claim))
+            claimed = cursor.rowcount == 1
+            resumed = False
+            if not claimed:
+                cursor.execute(f'''
+                    UPDATE import_file_log SET claimed_by = ?, heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE file_hash = ? AND status = 'processing'
+                      AND (heartbeat_at IS NULL OR heartbeat_at < datetime('now', '-{CLAIM_STALE} seconds'))
+                ''', (claim, digest))
+                resumed = cursor.rowcount == 1
+            conn.commit()
+
+            cursor.execute('''
+                SELECT id, status, last_line, rows_read, rows_imported, rows_failed
+                FROM import_file_log WHERE file_hash = ?
+            ''', (digest,))
+            log = cursor.fetchone()
+
+            # 이미 처리한 내용 (보관 폴더 이동 전에 중단된 경우 포함)
+            if log and log[1] in ('done', 'failed'):
+                folder = os.path.join(self.drop_dir, PROCESSED_DIR, 'duplicate') if log[1] == 'done' \
+                    else os.path.join(self.drop_dir, FAILED_DIR)
+                target = _move(path, folder)
+                print(f"[투입 폴더] 이미 처리된 파일 (중복): {name}")
+                return {'status': 'duplicate', 'archived_path': target}
+
+            # 같은 내용을 다른 작업자가 가져오는 중: 끝난 뒤 다음 확인 때 중복으로 처리
+            if not claimed and not resumed:
+                return {'status': 'busy'}
+
+            log_id, _, start_line, prev_read, prev_imported, prev_failed = log
+            if resumed:
+                print(f"[투입 폴더] {name}: {start_line}행 이후부터 이어서 처리")
+
+            def checkpoint(conn, last_line):
+                cursor = conn.execute('''
+                    UPDATE import_file_log SET last_line = ?, heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND claimed_by = ?
+                ''', (last_line, log_id, claim))
+                if cursor.rowcount != 1:
+                    raise ClaimLost()
+
+            day_dir = os.path.join(self.drop_dir, PROCESSED_DIR, datetime.now().strftime('%Y%m%d'))
+            try:
+                report = importer.import_file(conn, path, self._load_mapping(), self.spec_index,
+                                              start_line=start_line, checkpoint=checkpoint,
+                                              lot_locks=self.lot_locks)
+            except ClaimLost:
+                conn.rollback()
+                print(f"[투입 폴더] {name}: 다른 작업자가 이어서 처리하므로 중단")
+                return {'status': 'busy'}
+            except (ValueError, UnicodeDecodeError) as e:
+                # 파일 단위 오류: 실패 폴더로 이동 (같은 내용은 다시 시도하지 않음)
+                target = _move(path, os.path.join(self.drop_dir, FAILED_DIR))
+                cursor.execute('''
+                    UPDATE import_file_log
+                    SET status = 'failed', message = ?, archived_path = ?, finished_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (str(e), target, log_id))
+                conn.commit()
+                print(f"[투입 폴더] {name} 가져오기 실패: {e}")
+                return {'status': 'failed', 'message': str(e), 'archived_path': target}
+
+            status = {
+                'status': 'done',
+                'rows_read': prev_read + report['rows_read'],
+                'rows_imported': prev_imported + report['rows_imported'],
+                'rows_failed': prev_failed + report['rows_failed'],
+            }
+            message = (f"판정 완료 {report['lots_completed']}건 "
+                       f"(PASS {report['final_results'].get('PASS', 0)}, FAIL {report['final_results'].get('FAIL', 0)})")
+
+            # DB에 완료 기록 후 이동 (이동 전에 중단되면 다음 확인 때 중복으로 처리되어 이동만 됨)
+            cursor.execute('''
+                UPDATE import_file_log
+                SET status = 'done', rows_read = ?, rows_imported = ?, rows_failed = ?,
+                    message = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (status['rows_read'], status['rows_imported'], status['rows_failed'], message, log_id))
+            conn.commit()
+
+            target = _move(path, day_dir)
+            if report['errors']:
+                importer.write_error_report(report['errors'], f'{target}.errors.csv')
+            cursor.execute('UPDATE import_file_log SET archived_path = ? WHERE id = ?', (target, log_id))
+            conn.commit()
+
+        print(f"[투입 폴더] {name}: {status['rows_imported']}/{status['rows_read']}행 저장, "
+              f"오류 {status['rows_failed']}행")
+        status.update({'archived_path': target, 'message': message})
+        return status
+
+    def status(self):
+        """감시 상태와 최근 처리 기록 (관리자 API용)"""
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute('''
+                SELECT file_name, status, last_line, rows_read, rows_imported, rows_failed,
+                       message, archived_path, started_at, finished_at
+                FROM import_file_log ORDER BY id DESC LIMIT ?
+            ''', (LOG_LIMIT,)).fetchall()
+
+        with self._lock:
+            return {
+                'watcher_running': bool(self._thread and self._thread.is_alive()),
+                'drop_dir': os.path.abspath(self.drop_dir),
+                'waiting_files': len(self._pending),
+                'active_files': sorted(os.path.basename(p) for p in self._active),
+                'last_scan': _iso(self.last_scan),
+                'last_error': self.last_error,
+                'recent_files': [dict(r) for r in rows],
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='장비 결과 파일 투입 폴더 감시')
+    parser.add_argument('--dir', default=DROP_DIR, help='투입 폴더 경로')
+    parser.add_argument('--once', action='store_true', help='현재 폴더의 파일만 처리하고 종료')
+    parser.add_argument('--db', default=DB_PATH, help='데이터베이스 파일 경로')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 데이터베이스 파일이 없습니다: {args.db}")
+        return
+
+    with closing(sqlite3.connect(args.db, timeout=30.0)) as conn:
+        from migrate_db import apply_migrations
+        apply_migrations(conn)
+
+    watcher = DropFolderWatcher(args.db, args.dir)
+    if args.once:
+        watcher.scan(debounce=0)
+        return
+
+    print(f"📂 투입 폴더 감시 중: {os.path.abspath(args.dir)} (종료: Ctrl+C)")
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == '__main__':
+    main()